@@ -13,6 +13,14 @@ from datetime import datetime
 from app import app, api_url
 
 
+# Number of events shown, and fetched from the API, per page
+PAGE_SIZE = 25
+
+# Pages of events last fetched, by their query, with the ETag they came
+# with, so refreshing an unchanged page is answered with a 304
+MAX_CACHED_PAGES = 100
+cached_pages = {}
+
 layout = html.Div([
     html.H1('Event Page'),
     dcc.Tabs(id='event-tabs', value='view-all-tab', children=[
@@ -24,19 +32,31 @@ layout = html.Div([
 ])
 
 
-def get_event_details(session):
+def get_event_details(session, params=None):
     headers = {
         'Authorization': session['token'], 
         'content-type': 'application/json'
         }
 
-    response = r.get(api_url + 'event/all', headers=headers)
+    key = tuple(sorted((params or {}).items()))
+    cached = cached_pages.get(key)
+    if cached is not None:
+        headers['If-None-Match'] = cached[0]
+
+    response = r.get(api_url + 'event/all', headers=headers, params=params)
+
+    if response.status_code == 304:
+        return cached[1], cached[2], None
 
     content = json.loads(response.content.decode())
  
     if response.status_code == 200:
-        return content['data'], None
-    return None, content['message']
+        if 'ETag' in response.headers:
+            if len(cached_pages) >= MAX_CACHED_PAGES:
+                cached_pages.clear()
+            cached_pages[key] = (response.headers['ETag'], content['data'], content['nextCursor'])
+        return content['data'], content['nextCursor'], None
+    return None, None, content['message']
 
 
 # Render tab content
@@ -47,9 +67,40 @@ def get_event_details(session):
 )
 def render_content(tab, session):
     if tab == 'view-all-tab':
-        content, message = get_event_details(session)
+        name_filter_input = dbc.FormGroup([
+            dbc.Label("Name", html_for="events-filter-name", width=2),
+            dbc.Col(
+                dbc.Input(
+                    type="text",
+                    id="events-filter-name",
+                    placeholder="Filter by event name",
+                    maxLength=255,
+                ),
+                width=10)
+            ], row=True)
+
+        date_filter_input = dbc.FormGroup([
+            dbc.Label("Dates", html_for="events-filter-dates", width=2),
+            dbc.Col(
+                dcc.DatePickerRange(
+                    id="events-filter-dates",
+                    display_format='DD/MM/YYYY',
+                    clearable=True
+                ),
+                width=10)
+            ], row=True)
 
-        style = {'color': 'red', 'fontSize': 14} if message is None else {'fontSize': 14}
+        author_filter_input = dbc.FormGroup([
+            dbc.Label("Author", html_for="events-filter-author", width=2),
+            dbc.Col(
+                dbc.Input(
+                    type="text",
+                    id="events-filter-author",
+                    placeholder="Filter by username of the event's author",
+                    maxLength=255,
+                ),
+                width=10)
+            ], row=True)
 
         n_tickets_add_input = dbc.FormGroup([
             dbc.Label("Additional No. Tickets", html_for="event-add-n_tickets", width=5),
@@ -69,8 +120,12 @@ def render_content(tab, session):
 
         layout = html.Div([
             dbc.Form([n_tickets_add_input, add_button, add_message]),
+            dbc.Form([name_filter_input, date_filter_input, author_filter_input]),
             html.Button('Refresh Events', id='refresh-button'),
-            html.Div(id='event-error', children=message, style=style),
+            html.Div(id='event-error', style={'color': 'red', 'fontSize': 14}),
+            # Filters of the listing, and the cursor of each page visited under them
+            dcc.Store(id='events-query'),
+            dcc.Store(id='events-cursors'),
             dash_table.DataTable(
                 id='events-table',
                 columns=[
@@ -80,13 +135,12 @@ def render_content(tab, session):
                     {"name": 'Total Number of Tickets', "id": 'number_of_tickets'},
                     {"name": 'Number of Redeemed Tickets', "id": 'number_of_redeemed_tickets'},
                 ],
-                data=content,
+                data=[],
                 row_selectable="single",
-                filter_action="native",
-                sort_action="native",
-                page_action="native",
-                page_current= 0,
-                page_size= 25)
+                page_action="custom",
+                page_current=0,
+                page_count=1,
+                page_size=PAGE_SIZE)
         ])
         return layout
 
@@ -159,25 +213,75 @@ def render_content(tab, session):
         return layout
 
 
+@app.callback(
+    [
+        Output('events-query', 'data'),
+        Output('events-table', 'page_current'),
+    ],
+    [Input('refresh-button', 'n_clicks')],
+    state=[
+        State('events-filter-name', 'value'),
+        State('events-filter-dates', 'start_date'),
+        State('events-filter-dates', 'end_date'),
+        State('events-filter-author', 'value'),
+    ]
+)
+def filter_table(n_clicks, name, date_from, date_to, author):
+    query = {
+        'name': name,
+        'dateFrom': date_from,
+        'dateTo': date_to,
+        'author': author,
+        'limit': PAGE_SIZE,
+        'refreshed': n_clicks
+    }
+    # Going back to the first page, the paging cursors no longer apply
+    return {key: value for key, value in query.items() if value}, 0
+
+
 @app.callback(
     [
         Output('events-table', 'data'),
+        Output('events-table', 'page_count'),
+        Output('events-cursors', 'data'),
         Output('event-error', 'children'),
     ],
-    [Input('refresh-button', 'n_clicks')],
-    state=[State('session', 'data')]
+    [
+        Input('events-table', 'page_current'),
+        Input('events-query', 'data'),
+    ],
+    state=[
+        State('session', 'data'),
+        State('events-cursors', 'data'),
+    ]
 )
-def populate_table(n_clicks, session):
-    if not n_clicks:
+def populate_table(page_current, query, session, cursors):
+    if query is None:
         raise PreventUpdate
 
-    data, message = get_event_details(session)
+    # The cursor of page n is stored at position n once page n - 1 has been seen
+    triggered = [trigger['prop_id'] for trigger in dash.callback_context.triggered]
+    if 'events-query.data' in triggered or not cursors:
+        cursors = [None]
+
+    if page_current >= len(cursors):
+        raise PreventUpdate
+
+    params = {key: value for key, value in query.items() if key != 'refreshed'}
+    if cursors[page_current]:
+        params['cursor'] = cursors[page_current]
+
+    data, next_cursor, message = get_event_details(session, params)
+
+    if message is not None:
+        err_msg = 'Error getting data. ' + message
+        return dash.no_update, dash.no_update, dash.no_update, err_msg
 
-    if message is None:
-        return data, None
+    cursors = cursors[:page_current + 1]
+    if next_cursor:
+        cursors.append(next_cursor)
 
-    err_msg = 'Error getting data. ' + message
-    return dash.no_update, err_msg
+    return data, len(cursors), cursors, None
 
 
 @app.callback(
@@ -3,10 +3,13 @@ from __future__ import with_statement
 import logging
 from logging.config import fileConfig
 
+import sqlalchemy as sa
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
+from sqlalchemy.ext.compiler import compiles
 
 from alembic import context
+from alembic.ddl.sqlite import SQLiteImpl
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -17,6 +20,37 @@ config = context.config
 fileConfig(config.config_file_name)
 logger = logging.getLogger('alembic.env')
 
+
+# The early revisions were written against SQLite and are left as they were
+# applied, so what they ask of the other databases is squared up here
+
+@compiles(sa.BLOB, 'postgresql')
+def compile_blob(type_, compiler, **kw):
+    # PostgreSQL has no BLOB, its binary type is BYTEA
+    return 'BYTEA'
+
+
+class SQLiteMigrationImpl(SQLiteImpl):
+    """
+    SQLite can't add or drop the constraints of a table it has, so a unique
+    constraint added or dropped outside of a batch is kept as the unique
+    index SQLite would back it with, which a batch carries over.
+    """
+    __dialect__ = 'sqlite'
+
+    def add_constraint(self, const):
+        if isinstance(const, sa.UniqueConstraint):
+            self.create_index(sa.Index(const.name, *const.columns, unique=True))
+        else:
+            super().add_constraint(const)
+
+    def drop_constraint(self, const):
+        if isinstance(const, sa.UniqueConstraint):
+            self.drop_index(sa.Index(const.name))
+        else:
+            super().drop_constraint(const)
+
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 # from myapp import mymodel
@@ -0,0 +1,43 @@
+"""Record when the ticket counters of an event last changed
+
+Revision ID: 0b7e5d2a9c48
+Revises: f3a9c1d7b250
+Create Date: 2026-10-19 01:06:52.318440
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b7e5d2a9c48'
+down_revision = 'f3a9c1d7b250'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('event', sa.Column('last_changed_utc', sa.DateTime(), nullable=True))
+
+    # Backfill from the latest redemption, or the event's creation
+    op.execute(
+        'UPDATE event SET last_changed_utc = coalesce('
+        '(SELECT max(ticket.redeemed_on_utc) FROM ticket WHERE ticket.event_id = event.id), '
+        'date_created_utc)'
+    )
+
+
+def downgrade():
+    # Recreated after the copy SQLite's batch mode makes of the table,
+    # which would drop their ordering and condition
+    op.drop_index('ix__event__live', table_name='event')
+    op.drop_index('ix__event__date_name_guid', table_name='event')
+
+    with op.batch_alter_table('event') as batch_op:
+        batch_op.drop_column('last_changed_utc')
+
+    op.create_index('ix__event__date_name_guid', 'event', [sa.text('date DESC'), 'name', 'guid'])
+    op.create_index(
+        'ix__event__live', 'event', ['id', 'number_of_tickets'],
+        sqlite_where=sa.text('is_live = 1'),
+        postgresql_where=sa.text('is_live'))
@@ -0,0 +1,46 @@
+"""Ticket jobs minting tickets in the background
+
+Revision ID: 3e8b6d2c1f47
+Revises: 7c3d9a1e4f60
+Create Date: 2026-10-18 20:05:51.302117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '3e8b6d2c1f47'
+down_revision = '7c3d9a1e4f60'
+branch_labels = None
+depends_on = None
+
+guid_type = sa.BLOB().with_variant(postgresql.UUID(), 'postgresql')
+
+
+def upgrade():
+    op.create_table('ticket_job',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('guid', guid_type, nullable=False),
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.Column('author_id', sa.Integer(), nullable=True),
+    sa.Column('number_of_tickets', sa.Integer(), nullable=False),
+    sa.Column('number_of_minted_tickets', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('state', sa.String(length=16), nullable=False),
+    sa.Column('error', sa.String(length=255), nullable=True),
+    sa.Column('owner', sa.String(length=32), nullable=True),
+    sa.Column('lease_expires_utc', sa.DateTime(), nullable=True),
+    sa.Column('date_created_utc', sa.DateTime(), nullable=False),
+    sa.Column('date_completed_utc', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['author_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['event_id'], ['event.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('guid', name='uix__ticket_job__guid')
+    )
+    op.create_index('ix__ticket_job__state', 'ticket_job', ['state'])
+
+
+def downgrade():
+    op.drop_index('ix__ticket_job__state', table_name='ticket_job')
+    op.drop_table('ticket_job')
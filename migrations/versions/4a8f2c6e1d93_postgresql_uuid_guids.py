@@ -0,0 +1,35 @@
+"""Store the guids of events and tickets as UUIDs on PostgreSQL
+
+Revision ID: 4a8f2c6e1d93
+Revises: 9c2e4a7f1b36
+Create Date: 2026-10-18 10:12:47.205318
+
+"""
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '4a8f2c6e1d93'
+down_revision = '9c2e4a7f1b36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The guids were created as BLOBs, which SQLite keeps as they are
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for table in ('event', 'ticket'):
+        op.alter_column(table, 'guid', existing_type=postgresql.BYTEA(), type_=postgresql.UUID(),
+                        existing_nullable=False, postgresql_using="encode(guid, 'hex')::uuid")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for table in ('event', 'ticket'):
+        op.alter_column(table, 'guid', existing_type=postgresql.UUID(), type_=postgresql.BYTEA(),
+                        existing_nullable=False, postgresql_using="decode(replace(guid::text, '-', ''), 'hex')")
@@ -0,0 +1,34 @@
+"""Denormalised ticket counters on event
+
+Revision ID: 5b1f0e7c2a94
+Revises: 92408c73bdb9
+Create Date: 2026-10-18 09:12:40.215733
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b1f0e7c2a94'
+down_revision = '92408c73bdb9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('event', sa.Column('number_of_tickets', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('event', sa.Column('number_of_redeemed_tickets', sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill the counters from the existing tickets
+    op.execute(
+        'UPDATE event SET '
+        'number_of_tickets = (SELECT count(*) FROM ticket WHERE ticket.event_id = event.id), '
+        'number_of_redeemed_tickets = (SELECT count(*) FROM ticket WHERE ticket.event_id = event.id AND ticket.is_redeemed)'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('event') as batch_op:
+        batch_op.drop_column('number_of_redeemed_tickets')
+        batch_op.drop_column('number_of_tickets')
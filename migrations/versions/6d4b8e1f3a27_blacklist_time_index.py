@@ -0,0 +1,24 @@
+"""Index blacklisted tokens by when they were blacklisted
+
+Revision ID: 6d4b8e1f3a27
+Revises: 0b7e5d2a9c48
+Create Date: 2026-10-19 09:21:37.604112
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6d4b8e1f3a27'
+down_revision = '0b7e5d2a9c48'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix__blacklist_tokens__blacklisted_on_utc', 'blacklist_tokens', ['blacklisted_on_utc'])
+
+
+def downgrade():
+    op.drop_index('ix__blacklist_tokens__blacklisted_on_utc', table_name='blacklist_tokens')
@@ -0,0 +1,28 @@
+"""Indexes for the ticket and event hot paths
+
+Revision ID: 7c3d9a1e4f60
+Revises: 5b1f0e7c2a94
+Create Date: 2026-10-18 19:32:05.871204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c3d9a1e4f60'
+down_revision = '5b1f0e7c2a94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('uix__ticket__guid', 'ticket', ['guid'], unique=True)
+    op.create_index('ix__ticket__event_id_is_redeemed_guid', 'ticket', ['event_id', 'is_redeemed', 'guid'])
+    op.create_index('ix__event__date_name_guid', 'event', [sa.text('date DESC'), 'name', 'guid'])
+
+
+def downgrade():
+    op.drop_index('ix__event__date_name_guid', table_name='event')
+    op.drop_index('ix__ticket__event_id_is_redeemed_guid', table_name='ticket')
+    op.drop_index('uix__ticket__guid', table_name='ticket')
@@ -0,0 +1,24 @@
+"""Index events by when they last changed
+
+Revision ID: 9c2e4a7f1b36
+Revises: 6d4b8e1f3a27
+Create Date: 2026-10-19 11:02:14.381726
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c2e4a7f1b36'
+down_revision = '6d4b8e1f3a27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix__event__last_changed_utc', 'event', ['last_changed_utc'])
+
+
+def downgrade():
+    op.drop_index('ix__event__last_changed_utc', table_name='event')
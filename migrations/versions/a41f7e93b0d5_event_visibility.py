@@ -0,0 +1,25 @@
+"""Hide events while their tickets are minted
+
+Revision ID: a41f7e93b0d5
+Revises: 3e8b6d2c1f47
+Create Date: 2026-10-18 20:48:12.640391
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41f7e93b0d5'
+down_revision = '3e8b6d2c1f47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('event', sa.Column('is_visible', sa.Boolean(), nullable=False, server_default=sa.true()))
+
+
+def downgrade():
+    with op.batch_alter_table('event') as batch_op:
+        batch_op.drop_column('is_visible')
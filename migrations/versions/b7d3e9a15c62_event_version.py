@@ -0,0 +1,34 @@
+"""Version the events by a counter every change moves
+
+Revision ID: b7d3e9a15c62
+Revises: 4a8f2c6e1d93
+Create Date: 2026-10-18 11:36:05.914427
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d3e9a15c62'
+down_revision = '4a8f2c6e1d93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    event_version = op.create_table(
+        'event_version',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.bulk_insert(event_version, [dict(id=1, version=0)])
+
+    # Superseded by the version, which moves in commit order
+    op.drop_index('ix__event__last_changed_utc', table_name='event')
+
+
+def downgrade():
+    op.create_index('ix__event__last_changed_utc', 'event', ['last_changed_utc'])
+    op.drop_table('event_version')
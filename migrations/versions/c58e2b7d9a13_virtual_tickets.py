@@ -0,0 +1,25 @@
+"""Seed of events with virtual tickets
+
+Revision ID: c58e2b7d9a13
+Revises: a41f7e93b0d5
+Create Date: 2026-10-18 21:37:05.218774
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c58e2b7d9a13'
+down_revision = 'a41f7e93b0d5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('event', sa.Column('ticket_seed', sa.LargeBinary(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('event') as batch_op:
+        batch_op.drop_column('ticket_seed')
@@ -0,0 +1,31 @@
+"""Mark events live to hold their tickets in memory
+
+Revision ID: e2a6f4c8b317
+Revises: c58e2b7d9a13
+Create Date: 2026-10-18 22:14:51.907318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a6f4c8b317'
+down_revision = 'c58e2b7d9a13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('event', sa.Column('is_live', sa.Boolean(), nullable=False, server_default=sa.false()))
+    # Partial, holding only the few live events
+    op.create_index(
+        'ix__event__live', 'event', ['id', 'number_of_tickets'],
+        sqlite_where=sa.text('is_live = 1'),
+        postgresql_where=sa.text('is_live'))
+
+
+def downgrade():
+    op.drop_index('ix__event__live', table_name='event')
+    with op.batch_alter_table('event') as batch_op:
+        batch_op.drop_column('is_live')
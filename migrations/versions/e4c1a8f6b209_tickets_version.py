@@ -0,0 +1,25 @@
+"""Version the minted tickets beside the events
+
+Revision ID: e4c1a8f6b209
+Revises: b7d3e9a15c62
+Create Date: 2026-10-18 14:03:51.270864
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4c1a8f6b209'
+down_revision = 'b7d3e9a15c62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('event_version', sa.Column('tickets_version', sa.BigInteger(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('event_version') as batch_op:
+        batch_op.drop_column('tickets_version')
@@ -0,0 +1,31 @@
+"""Record when tickets are redeemed
+
+Revision ID: f3a9c1d7b250
+Revises: e2a6f4c8b317
+Create Date: 2026-10-18 23:41:26.503118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a9c1d7b250'
+down_revision = 'e2a6f4c8b317'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('ticket', sa.Column('redeemed_on_utc', sa.DateTime(), nullable=True))
+    # Partial, holding only the redeemed tickets
+    op.create_index(
+        'ix__ticket__event_id_redeemed_on_utc', 'ticket', ['event_id', 'redeemed_on_utc'],
+        sqlite_where=sa.text('redeemed_on_utc IS NOT NULL'),
+        postgresql_where=sa.text('redeemed_on_utc IS NOT NULL'))
+
+
+def downgrade():
+    op.drop_index('ix__ticket__event_id_redeemed_on_utc', table_name='ticket')
+    with op.batch_alter_table('ticket') as batch_op:
+        batch_op.drop_column('redeemed_on_utc')
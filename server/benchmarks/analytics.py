@@ -0,0 +1,95 @@
+"""
+Benchmarks the redemption analytics of an event whose tickets have all
+been redeemed over three hours, binned with NumPy over the timestamps
+compared with reading them through the ORM and counting them row by row,
+in milliseconds per request.
+
+Run from the server directory:
+
+    python -m benchmarks.analytics [number_of_tickets]
+"""
+import sys
+import uuid
+import random
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from simple_events.models import db
+from simple_events.models.event import Event, Ticket
+from simple_events.core.minting import mint_tickets
+from simple_events.core.analytics import INTERVALS
+from benchmarks.base import benchmark_app, create_user, timer
+
+
+# Number of times each request is repeated per run
+REPEAT = 3
+
+# The doors open at six, and the last arrive three hours later
+DOORS_OPEN = datetime(2030, 1, 1, 18, 0)
+ARRIVAL_SECONDS = 3 * 60 * 60
+
+
+def count_row_by_row(event_id, interval):
+    """Bins the redemption times of an event in Python, as without NumPy."""
+    times = [row.redeemed_on_utc for row in db.session.query(Ticket.redeemed_on_utc)
+             .filter(db.and_(Ticket.event_id == event_id, Ticket.redeemed_on_utc != None))]
+
+    seconds = INTERVALS[interval]
+    start = min(times)
+    counts = Counter(int((time - start).total_seconds()) // seconds for time in times)
+
+    cumulative, total = [], 0
+    for bucket in range(max(counts) + 1):
+        total += counts[bucket]
+        cumulative.append(total)
+    return cumulative
+
+
+def main(number_of_tickets=1000000):
+    with benchmark_app() as app:
+        app.config['AUTH_TOKEN_EXPIRY_SECONDS'] = 3600
+
+        user = create_user()
+        headers = dict(Authorization=user.encode_auth_token(user.id).decode())
+
+        event = Event(name='benchmark', date=date(2030, 1, 1), initial_number_of_tickets=0, author_id=user.id)
+        db.session.add(event)
+        db.session.flush()
+        mint_tickets(event_id=event.id, author_id=user.id, number_of_tickets=number_of_tickets)
+
+        Ticket.query.update({Ticket.is_redeemed: True}, synchronize_session=False)
+        guids = [row.guid for row in db.session.query(Ticket.guid)]
+        Ticket.set_redemption_times({
+            guid: DOORS_OPEN + timedelta(seconds=random.uniform(0, ARRIVAL_SECONDS))
+            for guid in guids
+        })
+        db.session.commit()
+
+        event_id, event_identifier = event.id, uuid.UUID(bytes=event.guid)
+        client = app.test_client()
+
+        # Read once untimed, so neither path is timed reading a cold cache
+        client.get(f'/event/analytics/{event_identifier}?interval=hour', headers=headers)
+        count_row_by_row(event_id, 'hour')
+
+        timings = {}
+        for interval in INTERVALS:
+            with timer(timings, ('numpy', interval)):
+                for _ in range(REPEAT):
+                    response = client.get(f'/event/analytics/{event_identifier}?interval={interval}', headers=headers)
+            assert response.get_json()['data']['cumulative'][-1] == number_of_tickets
+
+            with timer(timings, ('row by row', interval)):
+                for _ in range(REPEAT):
+                    count_row_by_row(event_id, interval)
+
+    print(f'{number_of_tickets:,} redeemed tickets')
+    print(f'{"interval":>10} {"row by row (ms)":>16} {"numpy (ms)":>11} {"speedup":>8}')
+    for interval in INTERVALS:
+        row_by_row = timings[('row by row', interval)] * 1000 / REPEAT
+        numpy = timings[('numpy', interval)] * 1000 / REPEAT
+        print(f'{interval:>10} {row_by_row:>16.0f} {numpy:>11.0f} {row_by_row / numpy:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,45 @@
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from simple_events.app import app
+from simple_events.models import db
+from simple_events.models.auth import User
+
+
+@contextmanager
+def benchmark_app(config='simple_events.config.TestingConfig'):
+    """
+    Yields the app, within an app context, bound to a fresh file based
+    database which is removed afterwards.
+    """
+    handle, path = tempfile.mkstemp(suffix='.db')
+    os.close(handle)
+
+    app.config.from_object(config)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + path
+
+    try:
+        with app.app_context():
+            db.create_all()
+            yield app
+            db.session.remove()
+            db.get_engine(app).dispose()
+    finally:
+        os.remove(path)
+
+
+def create_user(username='benchmark_user'):
+    user = User(username=username, password='benchmark')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@contextmanager
+def timer(result, key):
+    """Stores the elapsed wall clock seconds of the block in result[key]."""
+    start = time.perf_counter()
+    yield
+    result[key] = time.perf_counter() - start
@@ -0,0 +1,72 @@
+"""
+Benchmarks polling the event listing and the status of an event while
+nothing changes, answering in full compared with a conditional request
+holding the ETag of the last answer, in milliseconds per request.
+
+Run from the server directory:
+
+    python -m benchmarks.conditional_requests [number_of_events]
+"""
+import sys
+import uuid
+from datetime import date, timedelta
+
+from simple_events.models import db
+from simple_events.models.event import Event
+from benchmarks.base import benchmark_app, create_user, timer
+
+
+# Number of times each request is repeated per run
+REPEAT = 500
+
+# Events per page of the listing, its largest
+PAGE_SIZE = 100
+
+
+def main(number_of_events=10000):
+    with benchmark_app() as app:
+        app.config['AUTH_TOKEN_EXPIRY_SECONDS'] = 3600
+
+        user = create_user()
+        headers = dict(Authorization=user.encode_auth_token(user.id).decode())
+
+        events = [
+            Event(
+                name=f'event {i}',
+                date=date(2030, 1, 1) + timedelta(days=i % 365),
+                initial_number_of_tickets=100,
+                author_id=user.id)
+            for i in range(number_of_events)
+        ]
+        db.session.add_all(events)
+        db.session.commit()
+
+        client = app.test_client()
+        urls = {
+            'listing': f'/event/all?limit={PAGE_SIZE}',
+            'status': f'/event/status/{uuid.UUID(bytes=events[0].guid)}',
+        }
+
+        timings = {}
+        for name, url in urls.items():
+            with timer(timings, (name, 'full')):
+                for _ in range(REPEAT):
+                    response = client.get(url, headers=headers)
+            assert response.status_code == 200
+
+            conditional_headers = dict(headers, **{'If-None-Match': response.headers['ETag']})
+            with timer(timings, (name, 'conditional')):
+                for _ in range(REPEAT):
+                    response = client.get(url, headers=conditional_headers)
+            assert response.status_code == 304
+
+    print(f'{number_of_events:,} events, {PAGE_SIZE} per page')
+    print(f'{"request":>10} {"full (ms)":>10} {"304 (ms)":>9} {"speedup":>8}')
+    for name in urls:
+        full = timings[(name, 'full')] * 1000 / REPEAT
+        conditional = timings[(name, 'conditional')] * 1000 / REPEAT
+        print(f'{name:>10} {full:>10.2f} {conditional:>9.2f} {full / conditional:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,88 @@
+"""
+Benchmarks the throughput of concurrent scanners redeeming tickets against
+an SQLite file with the tuned profile of ProductionConfig, with each
+redemption committed on its request compared with group commits by the
+single writer thread.
+
+Run from the server directory:
+
+    python -m benchmarks.group_commit [scanners] [seconds]
+"""
+import sys
+import uuid
+import threading
+from datetime import date
+from collections import Counter
+
+from simple_events.models import db
+from simple_events.models.event import Event, Ticket
+from simple_events.core.minting import mint_tickets
+from simple_events.core.writer import writer
+from benchmarks.base import benchmark_app, create_user
+
+
+# Maximum group size of each run, 0 commits each redemption on its request
+MAX_GROUP_SIZES = (0, 64)
+
+# Tickets minted for the scanners to redeem
+NUMBER_OF_TICKETS = 500000
+
+
+def run(max_group_size, scanners, seconds):
+    """:return: Counter of completed redemptions and errors, and the groups committed"""
+    with benchmark_app('simple_events.config.ProductionConfig') as app:
+        app.config['GROUP_COMMIT_MAX_GROUP_SIZE'] = max_group_size
+        writer.init_app(app)
+
+        user = create_user()
+        event = Event(name='benchmark', date=date(2030, 1, 1), initial_number_of_tickets=0, author_id=user.id)
+        db.session.add(event)
+        db.session.flush()
+        mint_tickets(event_id=event.id, author_id=user.id, number_of_tickets=NUMBER_OF_TICKETS)
+        db.session.commit()
+
+        tickets = [str(uuid.UUID(bytes=row.guid)) for row in db.session.query(Ticket.guid)]
+        db.session.remove()
+
+        # The first request builds the filter of ticket guids, which isn't timed
+        app.test_client().get(f'redeem/{uuid.uuid4()}')
+
+        counts = Counter()
+        stop = threading.Event()
+
+        def scan(i):
+            client = app.test_client()
+            # Each scanner redeems its own share of the tickets
+            for ticket in tickets[i::scanners]:
+                if stop.is_set():
+                    break
+                response = client.get(f'redeem/{ticket}')
+                counts['redemptions' if response.status_code == 200 else 'errors'] += 1
+
+        threads = [threading.Thread(target=scan, args=(i,)) for i in range(scanners)]
+
+        for thread in threads:
+            thread.start()
+        stop.wait(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        writer.shutdown()
+        counts['groups'] = writer.groups
+
+    return counts
+
+
+def main(scanners=16, seconds=10):
+    print(f'{"max group size":>15} {"redemptions/s":>14} {"per commit":>11} {"errors":>7}')
+    for max_group_size in MAX_GROUP_SIZES:
+        counts = run(max_group_size, scanners, seconds)
+        commits = counts['groups'] if max_group_size else counts['redemptions']
+
+        print(f'{max_group_size:>15} {counts["redemptions"] / seconds:>14.0f} '
+              f'{counts["redemptions"] / max(commits, 1):>11.1f} {counts["errors"]:>7}')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
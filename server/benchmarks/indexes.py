@@ -0,0 +1,117 @@
+"""
+Benchmarks the ticket and event hot paths with and without the indexes
+on the ticket and event tables, in milliseconds per request.
+
+Run from the server directory:
+
+    python -m benchmarks.indexes [number_of_tickets] [number_of_events]
+"""
+import sys
+import json
+import uuid
+import random
+from datetime import date, timedelta
+
+from simple_events.models import db
+from simple_events.models.event import Event, Ticket
+from simple_events.core.minting import mint_tickets
+from benchmarks.base import benchmark_app, create_user, timer
+
+
+INDEXES = (*Ticket.__table__.indexes, *Event.__table__.indexes)
+
+# Number of times each request is repeated per run
+REPEAT = 20
+
+
+def seed(user, number_of_tickets, number_of_events):
+    """Creates one event holding all the tickets amongst many empty ones."""
+    events = [
+        Event(
+            name=f'benchmark {i}',
+            date=date(2030, 1, 1) + timedelta(days=i % 365),
+            initial_number_of_tickets=0,
+            author_id=user.id)
+        for i in range(number_of_events)
+    ]
+    db.session.add_all(events)
+    db.session.flush()
+
+    event = events[0]
+    mint_tickets(event_id=event.id, author_id=user.id, number_of_tickets=number_of_tickets)
+    db.session.commit()
+
+    return uuid.UUID(bytes=event.guid)
+
+
+def run(client, headers, event_identifier, tickets, page_cursor):
+    """Times each request, returning milliseconds per request by name."""
+    timings = {}
+
+    def repeat(name, request):
+        with timer(timings, name):
+            for _ in range(REPEAT):
+                request()
+        timings[name] *= 1000 / REPEAT
+
+    repeat('redeem', lambda: client.get(
+        f'/redeem/{uuid.UUID(bytes=tickets.pop())}'))
+
+    repeat('status batch (100)', lambda: client.post(
+        '/status/batch',
+        data=json.dumps(dict(ticketIdentifiers=[
+            str(uuid.UUID(bytes=guid)) for guid in random.sample(tickets, 100)])),
+        content_type='application/json',
+        headers=headers))
+
+    repeat('event list', lambda: client.get(
+        '/event/all?limit=100', headers=headers))
+
+    repeat('event list, page 50', lambda: client.get(
+        f'/event/all?limit=100&cursor={page_cursor}', headers=headers))
+
+    with timer(timings, 'download (binary)'):
+        response = client.get(f'/event/download/{event_identifier}?format=binary', headers=headers)
+        response.get_data()
+    timings['download (binary)'] *= 1000
+
+    return timings
+
+
+def main(number_of_tickets=1000000, number_of_events=10000):
+    with benchmark_app() as app:
+        app.config['AUTH_TOKEN_EXPIRY_SECONDS'] = 3600
+
+        user = create_user()
+        headers = dict(Authorization=user.encode_auth_token(user.id).decode())
+        event_identifier = seed(user, number_of_tickets, number_of_events)
+
+        guids = [row.guid for row in db.session.query(Ticket.guid)]
+        random.shuffle(guids)
+        db.session.remove()
+
+        client = app.test_client()
+
+        # Cursor of the 50th page of 100 events
+        url = '/event/all?limit=500'
+        for _ in range(10):
+            page_cursor = client.get(url, headers=headers).get_json()['nextCursor']
+            url = f'/event/all?limit=500&cursor={page_cursor}'
+
+        for index in INDEXES:
+            index.drop(db.engine)
+        without = run(client, headers, event_identifier, guids, page_cursor)
+
+        for index in INDEXES:
+            index.create(db.engine)
+        with_indexes = run(client, headers, event_identifier, guids, page_cursor)
+
+    print(f'{number_of_tickets:,} tickets, {number_of_events:,} events')
+    print(f'{"request":>20} {"without (ms)":>13} {"with (ms)":>10} {"speedup":>8}')
+    for name in without:
+        print(f'{name:>20} {without[name]:>13.1f} {with_indexes[name]:>10.1f} '
+              f'{without[name] / with_indexes[name]:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
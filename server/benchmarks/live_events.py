@@ -0,0 +1,95 @@
+"""
+Benchmarks the scans of an event at its doors, with and without the event
+marked live, in milliseconds per request, and the memory its tickets take
+when live.
+
+Run from the server directory:
+
+    python -m benchmarks.live_events [number_of_tickets]
+"""
+import sys
+import json
+import uuid
+import random
+import time
+from datetime import date
+
+from simple_events.models import db
+from simple_events.models.event import Event, Ticket
+from simple_events.core.minting import mint_tickets
+from simple_events.core.live_events import live_events
+from benchmarks.base import benchmark_app, create_user, timer
+
+
+# Number of times each request is repeated per run
+REPEAT = 500
+
+
+def run(client, headers, guids):
+    """Times each request, returning milliseconds per request by name."""
+    timings = {}
+    identifiers = [str(uuid.UUID(bytes=guid)) for guid in guids]
+    unredeemed = identifiers[REPEAT:]
+
+    def repeat(name, request):
+        with timer(timings, name):
+            for _ in range(REPEAT):
+                request()
+        timings[name] *= 1000 / REPEAT
+
+    repeat('redeem', lambda: client.get(f'/redeem/{unredeemed.pop()}'))
+    repeat('redeem, again', lambda: client.get(f'/redeem/{random.choice(identifiers[-REPEAT:])}'))
+    repeat('status', lambda: client.get(f'/status/{random.choice(identifiers)}', headers=headers))
+    repeat('status batch (100)', lambda: client.post(
+        '/status/batch',
+        data=json.dumps(dict(ticketIdentifiers=random.sample(identifiers, 100))),
+        content_type='application/json',
+        headers=headers))
+
+    del identifiers[-REPEAT:]
+    return timings
+
+
+def main(number_of_tickets=1000000):
+    with benchmark_app() as app:
+        app.config['AUTH_TOKEN_EXPIRY_SECONDS'] = 3600
+        live_events.init_app(app)
+
+        user = create_user()
+        headers = dict(Authorization=user.encode_auth_token(user.id).decode())
+
+        event = Event(name='benchmark', date=date(2030, 1, 1), initial_number_of_tickets=0, author_id=user.id)
+        db.session.add(event)
+        db.session.flush()
+        mint_tickets(event_id=event.id, author_id=user.id, number_of_tickets=number_of_tickets)
+        db.session.commit()
+
+        event_identifier = uuid.UUID(bytes=event.guid)
+        guids = [row.guid for row in db.session.query(Ticket.guid)]
+        random.shuffle(guids)
+        db.session.remove()
+
+        client = app.test_client()
+
+        # Each run redeems its own tickets
+        without = run(client, headers, guids[:len(guids) // 2])
+
+        start = time.perf_counter()
+        client.put(
+            f'/event/live/{event_identifier}',
+            data=json.dumps({'live': True}),
+            content_type='application/json',
+            headers=headers)
+        load_seconds = time.perf_counter() - start
+
+        live = run(client, headers, guids[len(guids) // 2:])
+
+    print(f'{number_of_tickets:,} tickets, marked live in {load_seconds:.1f}s, '
+          f'holding {live_events.nbytes / 2 ** 20:.1f} MiB')
+    print(f'{"request":>20} {"not live (ms)":>14} {"live (ms)":>10} {"speedup":>8}')
+    for name in without:
+        print(f'{name:>20} {without[name]:>14.2f} {live[name]:>10.2f} {without[name] / live[name]:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
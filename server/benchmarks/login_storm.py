@@ -0,0 +1,120 @@
+"""
+Benchmarks the latency of /redeem and /event/status while a storm of
+logins runs against the server, with passwords hashed inline compared to
+hashed in the bounded process pool.
+
+Run from the server directory:
+
+    python -m benchmarks.login_storm [storm_threads] [seconds]
+"""
+import sys
+import json
+import logging
+import time
+import threading
+import statistics
+import urllib.error
+import urllib.request
+
+from werkzeug.serving import make_server
+
+from simple_events.core.hashing import password_hasher
+from benchmarks.base import benchmark_app
+
+
+BCRYPT_LOG_ROUNDS = 12
+
+
+def call(url, data=None, headers=None, method=None):
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(data).encode() if data is not None else None,
+        headers={'Content-Type': 'application/json', **(headers or {})},
+        method=method)
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run(workers, storm_threads, seconds):
+    with benchmark_app() as app:
+        app.config['BCRYPT_LOG_ROUNDS'] = BCRYPT_LOG_ROUNDS
+        app.config['AUTH_TOKEN_EXPIRY_SECONDS'] = 3600
+        app.config['PASSWORD_HASHING_WORKERS'] = workers
+        app.config['PASSWORD_HASHING_MAX_PENDING'] = 2 * workers or 1
+        password_hasher.init_app(app)
+
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_port}/'
+
+        try:
+            credentials = dict(username='benchmark_user', password='benchmark')
+            _, data = call(url + 'auth/register', credentials)
+            headers = dict(Authorization=data['auth_token'])
+
+            _, data = call(url + 'event/create', dict(
+                name='benchmark', date='2030-01-01', initial_number_of_tickets=10000), headers)
+            event_identifier = data['eventIdentifier']
+
+            _, data = call(url + f'event/download/{event_identifier}', headers=headers)
+            tickets = iter(data['data']['ticketIdentifiers'])
+
+            # Warm up the hashing pool before timing
+            call(url + 'auth/login', credentials)
+
+            stop = threading.Event()
+            logins = []
+
+            def storm():
+                while not stop.is_set():
+                    status, _ = call(url + 'auth/login', credentials)
+                    logins.append(status)
+
+            storm = [threading.Thread(target=storm) for _ in range(storm_threads)]
+            for thread in storm:
+                thread.start()
+
+            latencies = []
+            deadline = time.perf_counter() + seconds
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                call(url + f'redeem/{next(tickets)}')
+                call(url + f'event/status/{event_identifier}', headers=headers)
+                latencies.append((time.perf_counter() - start) / 2)
+
+            stop.set()
+            for thread in storm:
+                thread.join()
+        finally:
+            server.shutdown()
+            password_hasher.shutdown()
+
+    return latencies, logins
+
+
+def main(storm_threads=8, seconds=10):
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    print(f'{storm_threads} login threads, bcrypt rounds {BCRYPT_LOG_ROUNDS}, {seconds}s per run')
+    print(f'{"hashing":>10} {"requests":>9} {"p50 (ms)":>9} {"p99 (ms)":>9} {"logins ok":>10} {"logins 503":>11}')
+
+    for name, workers in (('inline', 0), ('pool', 1)):
+        latencies, logins = run(workers, storm_threads, seconds)
+
+        print(
+            f'{name:>10} {len(latencies):>9} '
+            f'{statistics.median(latencies) * 1000:>9.1f} {percentile(latencies, 0.99) * 1000:>9.1f} '
+            f'{logins.count(200):>10} {logins.count(503):>11}'
+        )
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
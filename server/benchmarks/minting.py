@@ -0,0 +1,68 @@
+"""
+Benchmarks minting tickets through the ORM unit of work against the bulk
+minting path, in tickets per second.
+
+Run from the server directory:
+
+    python -m benchmarks.minting [max_power]
+"""
+import sys
+from datetime import datetime
+
+from simple_events.models import db
+from simple_events.models.event import Event, Ticket
+from simple_events.core.minting import mint_tickets
+from benchmarks.base import benchmark_app, create_user, timer
+
+
+def create_event(user, number_of_tickets):
+    event = Event(
+        name='benchmark',
+        date=datetime.now().date(),
+        initial_number_of_tickets=number_of_tickets,
+        author_id=user.id
+    )
+    db.session.add(event)
+    db.session.flush()
+    return event
+
+
+def orm_path(user, number_of_tickets):
+    event = create_event(user, number_of_tickets)
+
+    tickets = (Ticket(author_id=user.id, event_id=event.id)
+               for _ in range(number_of_tickets))
+
+    db.session.add_all(tickets)
+    db.session.commit()
+
+
+def bulk_path(user, number_of_tickets):
+    event = create_event(user, number_of_tickets)
+
+    mint_tickets(event_id=event.id, author_id=user.id, number_of_tickets=number_of_tickets)
+
+    db.session.commit()
+
+
+def main(max_power=6):
+    print(f'{"tickets":>10} {"orm (t/s)":>12} {"bulk (t/s)":>12} {"speedup":>8}')
+
+    for power in range(3, max_power + 1):
+        number_of_tickets = 10 ** power
+        timings = {}
+
+        for name, path in (('orm', orm_path), ('bulk', bulk_path)):
+            with benchmark_app():
+                user = create_user()
+                with timer(timings, name):
+                    path(user, number_of_tickets)
+
+        orm_rate = number_of_tickets / timings['orm']
+        bulk_rate = number_of_tickets / timings['bulk']
+
+        print(f'{number_of_tickets:>10} {orm_rate:>12,.0f} {bulk_rate:>12,.0f} {bulk_rate / orm_rate:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,86 @@
+"""
+Benchmarks the latency of /redeem while a large event is created
+concurrently, with its tickets committed all at once compared with a
+chunk at a time, on the tuned SQLite profile of ProductionConfig.
+
+Run from the server directory:
+
+    python -m benchmarks.redeem_during_minting [number_of_tickets]
+"""
+import sys
+import time
+import uuid
+import logging
+import threading
+import statistics
+
+from werkzeug.serving import make_server
+
+from simple_events.models import db
+from simple_events.models.event import Ticket
+from benchmarks.base import benchmark_app, create_user
+from benchmarks.login_storm import call, percentile
+
+
+CHUNK_SIZES = (None, 10000)
+
+
+def run(number_of_tickets, chunk_size):
+    with benchmark_app('simple_events.config.ProductionConfig') as app:
+        app.config['MINTING_CHUNK_SIZE'] = chunk_size or number_of_tickets
+
+        user = create_user()
+        headers = dict(Authorization=user.encode_auth_token(user.id).decode())
+
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_port}/'
+
+        try:
+            call(url + 'event/create', dict(name='redeemed', date='2030-01-01', initial_number_of_tickets=10000), headers)
+            tickets = [str(uuid.UUID(bytes=row.guid)) for row in db.session.query(Ticket.guid)]
+            db.session.remove()
+
+            created = threading.Event()
+            timings = {}
+
+            def create():
+                start = time.perf_counter()
+                call(url + 'event/create', dict(
+                    name='large', date='2030-01-01', initial_number_of_tickets=number_of_tickets), headers)
+                timings['create'] = time.perf_counter() - start
+                created.set()
+
+            threading.Thread(target=create).start()
+
+            latencies, errors = [], 0
+            while not created.is_set():
+                start = time.perf_counter()
+                status, _ = call(url + f'redeem/{tickets.pop()}')
+                latencies.append(time.perf_counter() - start)
+                errors += status != 200
+        finally:
+            server.shutdown()
+
+    return latencies, errors, timings['create']
+
+
+def main(number_of_tickets=500000):
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    logging.getLogger('simple_events').setLevel(logging.CRITICAL)
+
+    print(f'Redeeming while creating an event of {number_of_tickets:,} tickets')
+    print(f'{"chunk size":>10} {"create (s)":>11} {"redeems":>8} {"p50 (ms)":>9} {"p99 (ms)":>9} {"max (ms)":>9} {"errors":>7}')
+
+    for chunk_size in CHUNK_SIZES:
+        latencies, errors, create_seconds = run(number_of_tickets, chunk_size)
+
+        print(
+            f'{chunk_size or "all":>10} {create_seconds:>11.1f} {len(latencies):>8} '
+            f'{statistics.median(latencies) * 1000:>9.1f} {percentile(latencies, 0.99) * 1000:>9.1f} '
+            f'{max(latencies) * 1000:>9.1f} {errors:>7}'
+        )
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
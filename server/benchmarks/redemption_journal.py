@@ -0,0 +1,94 @@
+"""
+Benchmarks the throughput of concurrent scanners redeeming tickets against
+an SQLite file with the tuned profile of ProductionConfig, with each
+redemption committed to the database compared with appended to the
+redemption journal, and how long the journal then takes to be applied.
+
+Run from the server directory:
+
+    python -m benchmarks.redemption_journal [scanners] [seconds]
+"""
+import os
+import shutil
+import sys
+import uuid
+import tempfile
+import threading
+from datetime import date
+from collections import Counter
+
+from simple_events.models import db
+from simple_events.models.event import Event, Ticket
+from simple_events.core.minting import mint_tickets
+from simple_events.core.journal import redemption_journal
+from benchmarks.base import benchmark_app, create_user, timer
+
+# Tickets minted for the scanners to redeem
+NUMBER_OF_TICKETS = 500000
+
+
+def run(journal_path, scanners, seconds):
+    """:return: Counter of completed redemptions and errors, and the seconds left applying the journal"""
+    with benchmark_app('simple_events.config.ProductionConfig') as app:
+        app.config['REDEMPTION_JOURNAL_FILE'] = journal_path
+        redemption_journal.init_app(app)
+
+        user = create_user()
+        event = Event(name='benchmark', date=date(2030, 1, 1), initial_number_of_tickets=0, author_id=user.id)
+        db.session.add(event)
+        db.session.flush()
+        mint_tickets(event_id=event.id, author_id=user.id, number_of_tickets=NUMBER_OF_TICKETS)
+        db.session.commit()
+
+        tickets = [str(uuid.UUID(bytes=row.guid)) for row in db.session.query(Ticket.guid)]
+        db.session.remove()
+
+        # The first request builds the filter of ticket guids, which isn't timed
+        app.test_client().get(f'redeem/{uuid.uuid4()}')
+
+        counts = Counter()
+        stop = threading.Event()
+
+        def scan(i):
+            client = app.test_client()
+            # Each scanner redeems its own share of the tickets
+            for ticket in tickets[i::scanners]:
+                if stop.is_set():
+                    break
+                response = client.get(f'redeem/{ticket}')
+                counts['redemptions' if response.status_code == 200 else 'errors'] += 1
+
+        threads = [threading.Thread(target=scan, args=(i,)) for i in range(scanners)]
+
+        for thread in threads:
+            thread.start()
+        stop.wait(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        timings = {}
+        with timer(timings, 'applying'):
+            redemption_journal.shutdown()
+
+    return counts, timings['applying']
+
+
+def main(scanners=16, seconds=10):
+    directory = tempfile.mkdtemp()
+    journal_path = os.path.join(directory, 'redemptions.journal')
+
+    print(f'{"redeemed in":>12} {"redemptions/s":>14} {"errors":>7} {"left applying (s)":>18}')
+    try:
+        for name, path in (('database', None), ('journal', journal_path)):
+            counts, applying_seconds = run(path, scanners, seconds)
+
+            print(f'{name:>12} {counts["redemptions"] / seconds:>14.0f} {counts["errors"]:>7} '
+                  f'{applying_seconds if path else 0:>18.2f}')
+    finally:
+        # Along with any journals rotated out
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,98 @@
+"""
+Benchmarks mixed read and write throughput against an SQLite file with
+the default storage settings compared with the tuned profile of
+ProductionConfig (WAL, pragmas and a connection pool).
+
+Run from the server directory:
+
+    python -m benchmarks.storage [readers] [writers] [seconds]
+"""
+import sys
+import json
+import uuid
+import logging
+import threading
+from collections import Counter
+
+from simple_events.models import db
+from simple_events.models.event import Ticket
+from benchmarks.base import benchmark_app, create_user
+
+
+PROFILES = (
+    ('default', 'simple_events.config.TestingConfig'),
+    ('tuned', 'simple_events.config.ProductionConfig'),
+)
+
+# Tickets minted by each write
+TICKETS_PER_EVENT = 20000
+
+
+def run(config, readers, writers, seconds):
+    """:return: Counter of completed reads, writes and errors"""
+    with benchmark_app(config) as app:
+        app.config['AUTH_TOKEN_EXPIRY_SECONDS'] = 3600
+
+        user = create_user()
+        headers = dict(Authorization=user.encode_auth_token(user.id).decode())
+
+        data = app.test_client().post(
+            'event/create',
+            data=json.dumps(dict(name='benchmark', date='2030-01-01', initial_number_of_tickets=TICKETS_PER_EVENT)),
+            content_type='application/json',
+            headers=headers).get_json()
+        event_identifier = data['eventIdentifier']
+        tickets = [str(uuid.UUID(bytes=row.guid)) for row in db.session.query(Ticket.guid)]
+        db.session.remove()
+
+        counts = Counter()
+        stop = threading.Event()
+
+        def read(i):
+            client = app.test_client()
+            while not stop.is_set():
+                ticket = client.get(f'status/{tickets[i % len(tickets)]}', headers=headers)
+                event = client.get(f'event/status/{event_identifier}', headers=headers)
+                ok = ticket.status_code == 200 and event.status_code == 200
+                counts['reads' if ok else 'errors'] += 2
+                i += 1
+
+        def write(i):
+            client = app.test_client()
+            while not stop.is_set():
+                response = client.post(
+                    'event/create',
+                    data=json.dumps(dict(name=f'benchmark {i}', date='2030-01-01',
+                                         initial_number_of_tickets=TICKETS_PER_EVENT)),
+                    content_type='application/json',
+                    headers=headers)
+                counts['writes' if response.status_code == 200 else 'errors'] += 1
+                i += 1
+
+        threads = [threading.Thread(target=read, args=(i * 97,)) for i in range(readers)]
+        threads += [threading.Thread(target=write, args=(i * 1000,)) for i in range(writers)]
+
+        for thread in threads:
+            thread.start()
+        stop.wait(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    return counts
+
+
+def main(readers=8, writers=2, seconds=10):
+    # Locked database errors are counted rather than logged
+    logging.getLogger('simple_events').setLevel(logging.CRITICAL)
+
+    print(f'{readers} readers, {writers} writers of {TICKETS_PER_EVENT} tickets, {seconds}s per profile')
+    print(f'{"profile":>8} {"reads/s":>9} {"writes/s":>9} {"errors":>7}')
+
+    for name, config in PROFILES:
+        counts = run(config, readers, writers, seconds)
+        print(f'{name:>8} {counts["reads"] / seconds:>9.1f} {counts["writes"] / seconds:>9.1f} {counts["errors"]:>7}')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,81 @@
+"""
+Benchmarks redeeming and checking the status of identifiers of no ticket,
+with and without the Bloom filter of ticket guids, in milliseconds per
+request, along with the time taken to build the filter.
+
+Run from the server directory:
+
+    python -m benchmarks.ticket_filter [number_of_tickets]
+"""
+import sys
+import uuid
+import time
+from datetime import date
+
+from simple_events.models import db
+from simple_events.models.event import Event
+from simple_events.core.minting import mint_tickets
+from simple_events.core.ticket_filter import ticket_filter
+from benchmarks.base import benchmark_app, create_user, timer
+
+
+# Number of times each request is repeated per run
+REPEAT = 1000
+
+
+def run(client, headers):
+    """Times each request, returning milliseconds per request by name."""
+    timings = {}
+
+    def repeat(name, request):
+        with timer(timings, name):
+            for _ in range(REPEAT):
+                request()
+        timings[name] *= 1000 / REPEAT
+
+    repeat('redeem', lambda: client.get(f'/redeem/{uuid.uuid4()}'))
+    repeat('status', lambda: client.get(f'/status/{uuid.uuid4()}', headers=headers))
+
+    return timings
+
+
+def main(number_of_tickets=1000000):
+    with benchmark_app() as app:
+        app.config['AUTH_TOKEN_EXPIRY_SECONDS'] = 3600
+
+        user = create_user()
+        headers = dict(Authorization=user.encode_auth_token(user.id).decode())
+
+        event = Event(name='benchmark', date=date(2030, 1, 1), initial_number_of_tickets=0, author_id=user.id)
+        db.session.add(event)
+        db.session.flush()
+        mint_tickets(event_id=event.id, author_id=user.id, number_of_tickets=number_of_tickets)
+        db.session.commit()
+        db.session.remove()
+
+        client = app.test_client()
+
+        app.config['TICKET_FILTER_CAPACITY'] = 0
+        ticket_filter.init_app(app)
+        without = run(client, headers)
+
+        app.config['TICKET_FILTER_CAPACITY'] = number_of_tickets
+        ticket_filter.init_app(app)
+
+        start = time.perf_counter()
+        ticket_filter.sync()
+        build_seconds = time.perf_counter() - start
+
+        with_filter = run(client, headers)
+        metrics = ticket_filter.metrics()
+
+    print(f'{number_of_tickets:,} tickets, filter of {metrics["size_in_bytes"] / 2 ** 20:.1f} MiB '
+          f'built in {build_seconds:.1f}s, rejected {metrics["rejected"]:,} of {metrics["checked"]:,}')
+    print(f'{"request":>10} {"without (ms)":>13} {"with (ms)":>10} {"speedup":>8}')
+    for name in without:
+        print(f'{name:>10} {without[name]:>13.2f} {with_filter[name]:>10.2f} '
+              f'{without[name] / with_filter[name]:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -1,4 +1,5 @@
 import os
+import uuid
 import unittest
 import coverage
 
@@ -7,6 +8,7 @@ from flask_migrate import MigrateCommand
 
 from simple_events.app import app
 from simple_events.models import db
+from simple_events.core.counters import find_counter_discrepancies, recompute_counters
 
 
 COV = coverage.coverage(
@@ -67,5 +69,30 @@ def drop_db():
     db.drop_all()
 
 
+@manager.command
+def check_counters(fix=False):
+    """Verifies the event ticket counters against the ticket table, optionally fixing them."""
+    discrepancies = find_counter_discrepancies()
+
+    for row in discrepancies:
+        print(
+            f'Event {uuid.UUID(bytes=row.guid)}: '
+            f'tickets {row.number_of_tickets} != {row.counted_number_of_tickets} counted, '
+            f'redeemed {row.number_of_redeemed_tickets} != {row.counted_number_of_redeemed_tickets} counted'
+        )
+
+    if not discrepancies:
+        print('All event counters are correct.')
+        return 0
+
+    if fix:
+        recompute_counters()
+        db.session.commit()
+        print(f'Recomputed the counters of the {len(discrepancies)} incorrect events.')
+        return 0
+
+    return 1
+
+
 if __name__ == '__main__':
     manager.run()
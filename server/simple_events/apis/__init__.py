@@ -3,6 +3,7 @@ from flask_restx import Api
 from simple_events.apis.auth import api as ns_auth
 from simple_events.apis.event import api as ns_event
 from simple_events.apis.ticket import api as ns_ticket
+from simple_events.apis.metrics import api as ns_metrics
 
 
 api = Api(
@@ -15,3 +16,4 @@ api = Api(
 api.add_namespace(ns_auth)
 api.add_namespace(ns_event)
 api.add_namespace(ns_ticket)
+api.add_namespace(ns_metrics)
@@ -1,8 +1,11 @@
 import logging
 from flask_restx import Namespace, Resource, fields, reqparse
 
-from simple_events.models import db, bcrypt
+from simple_events.models import db
 from simple_events.models.auth import User, BlacklistToken
+from simple_events.core.token_cache import token_cache
+from simple_events.core.hashing import password_hasher, HashingServiceBusy
+from simple_events.core.writer import writer
 
 # Get logger
 logger = logging.getLogger(__name__)
@@ -71,6 +74,11 @@ status_message_data_model = api.inherit('StatusMessageData', status_message_mode
 })
 
 
+def blacklist(auth_token):
+    """Blacklists an auth token within the current transaction."""
+    db.session.add(BlacklistToken(token=auth_token))
+
+
 @api.route('/register')
 @api.expect(usr_pwd_parser)
 class Register(Resource):
@@ -81,7 +89,8 @@ class Register(Resource):
         200: 'Successfully registered.',
         201: 'User already exists. Please Log in.',
         400: 'Bad Request',
-        500: 'An Internal Server Error Occurred.'
+        500: 'An Internal Server Error Occurred.',
+        503: 'The server is busy. Please try again.'
     })
     @api.marshal_with(status_message_token_model)
     def post(self):
@@ -119,6 +128,13 @@ class Register(Resource):
                 }
                 return response_object, 201
 
+        except HashingServiceBusy:
+            response_object = {
+                'status': 'fail',
+                'message': 'The server is busy. Please try again.',
+            }
+            return response_object, 503, {'Retry-After': '1'}
+
         except Exception:
             logger.error('An error occurred registering a user', exc_info=True)
 
@@ -139,7 +155,8 @@ class Login(Resource):
         200: 'Successfully logged in.',
         400: 'Bad Request',
         404: 'User does not exist.',
-        500: 'An Internal Server Error Occurred.'
+        500: 'An Internal Server Error Occurred.',
+        503: 'The server is busy. Please try again.'
     })
     @api.marshal_with(status_message_token_model)
     def post(self):
@@ -150,7 +167,7 @@ class Login(Resource):
             # fetch the user data
             user = User.query.filter_by(username=post_data['username']).first()
 
-            if user and bcrypt.check_password_hash(
+            if user and password_hasher.check_password_hash(
                 pw_hash=user.password, password=post_data['password']
             ):
                 auth_token = user.encode_auth_token(user.id)
@@ -170,6 +187,13 @@ class Login(Resource):
                 }
                 return response_object, 404
 
+        except HashingServiceBusy:
+            response_object = {
+                'status': 'fail',
+                'message': 'The server is busy. Please try again.',
+            }
+            return response_object, 503, {'Retry-After': '1'}
+
         except Exception:
             logger.error('An error occurred logging in a user', exc_info=True)
 
@@ -253,11 +277,9 @@ class Logout(Resource):
 
             if not isinstance(resp, str):
                 # mark the token as blacklisted
-                blacklist_token = BlacklistToken(token=auth_token)
+                writer.run(blacklist, auth_token)
 
-                # insert the token
-                db.session.add(blacklist_token)
-                db.session.commit()
+                token_cache.blacklist(auth_token)
 
                 response_object = {
                     'status': 'success',
@@ -1,11 +1,28 @@
+import base64
+import json
 import logging
 import uuid
-from flask_restx import Namespace, Resource, fields
+from datetime import date, timezone
+from functools import wraps
+from flask import Response, current_app, request, stream_with_context
+from flask_restx import Namespace, Resource, fields, marshal
 from flask_restx import inputs
+from flask_restx.utils import unpack
+from werkzeug.http import quote_etag
 
 from simple_events.models import db
 from simple_events.models.auth import User
-from simple_events.models.event import Event, Ticket
+from simple_events.models.event import Event
+from simple_events.models.job import TicketJob
+from simple_events.core.minting import mint_tickets_in_chunks
+from simple_events.core.jobs import ticket_jobs
+from simple_events.core.live_events import live_events
+from simple_events.core.export import MIMETYPES, export_unredeemed_tickets, unredeemed_tickets, ticket_identifier
+from simple_events.core.signed_tickets import ticket_signer, ALGORITHM, SCANNER_TAG_SIZE
+from simple_events.core.virtual_tickets import new_seed
+from simple_events.core.writer import writer
+from simple_events.core.analytics import INTERVALS, MAX_BUCKETS, redemption_times, number_of_buckets, bin_redemptions
+from simple_events.core.event_versions import event_version
 from simple_events.apis.auth import token_parser, status_message_model
 
 
@@ -24,6 +41,46 @@ def natural_num_type(value):
 
 natural_num_type.__schema__ = {'type': 'integer', 'format': 'my-custom-natural-num'}
 
+# Page sizes of the event listing
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def page_size_type(value):
+    value = inputs.natural(value)
+    if 1 <= value <= MAX_PAGE_SIZE:
+        return value
+    raise ValueError(f'limit must be an integer between 1 and {MAX_PAGE_SIZE}.')
+
+page_size_type.__schema__ = {'type': 'integer', 'minimum': 1, 'maximum': MAX_PAGE_SIZE}
+
+
+def encode_cursor(row):
+    """Encodes the sort key of a listed event into an opaque cursor."""
+    key = [row.date.isoformat(), row.name, row.guid.hex()]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def cursor_type(value):
+    """Decodes a cursor back into the (date, name, guid) sort key it was made from."""
+    try:
+        event_date, name, guid = json.loads(base64.urlsafe_b64decode(value.encode()))
+        return date.fromisoformat(event_date), name, bytes.fromhex(guid)
+    except Exception:
+        raise ValueError('cursor is invalid.')
+
+cursor_type.__schema__ = {'type': 'string'}
+
+
+def utc_datetime_type(value):
+    """Parses an ISO 8601 time, UTC unless it has an offset, into a naive UTC datetime."""
+    value = inputs.datetime_from_iso8601(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+utc_datetime_type.__schema__ = {'type': 'string', 'format': 'date-time'}
+
 # Parser
 create_event_parser = token_parser.copy()
 create_event_parser.add_argument('name', required=True, location='json')
@@ -33,12 +90,59 @@ create_event_parser.add_argument(
     type=natural_num_type,
     required=True,
     location='json')
+create_event_parser.add_argument(
+    'async',
+    type=inputs.boolean,
+    default=False,
+    location='json')
+create_event_parser.add_argument(
+    'virtual',
+    type=inputs.boolean,
+    default=False,
+    location='json')
 
 event_status_parser = token_parser.copy()
 
 event_all_parser = token_parser.copy()
+event_all_parser.add_argument(
+    'limit',
+    type=page_size_type,
+    default=DEFAULT_PAGE_SIZE,
+    location='args')
+event_all_parser.add_argument(
+    'cursor',
+    type=cursor_type,
+    location='args')
+event_all_parser.add_argument(
+    'name',
+    location='args')
+event_all_parser.add_argument(
+    'dateFrom',
+    type=inputs.date,
+    location='args')
+event_all_parser.add_argument(
+    'dateTo',
+    type=inputs.date,
+    location='args')
+event_all_parser.add_argument(
+    'author',
+    location='args')
+
+# Download formats, the streamed ones besides JSON
+JSON = 'json'
+DOWNLOAD_MIMETYPES = {JSON: 'application/json', **MIMETYPES}
+DOWNLOAD_FORMATS = {mimetype: download_format for download_format, mimetype in DOWNLOAD_MIMETYPES.items()}
 
 event_download_parser = token_parser.copy()
+event_download_parser.add_argument(
+    'format',
+    choices=tuple(DOWNLOAD_MIMETYPES),
+    location='args')
+event_download_parser.add_argument(
+    'signed',
+    type=inputs.boolean,
+    default=False,
+    location='args')
 
 event_add_parser = token_parser.copy()
 event_add_parser.add_argument(
@@ -46,12 +150,82 @@ event_add_parser.add_argument(
     type=natural_num_type,
     required=True,
     location='json')
+event_add_parser.add_argument(
+    'async',
+    type=inputs.boolean,
+    default=False,
+    location='json')
+
+event_job_parser = token_parser.copy()
+
+event_key_parser = token_parser.copy()
+
+event_live_parser = token_parser.copy()
+event_live_parser.add_argument(
+    'live',
+    type=inputs.boolean,
+    default=True,
+    location='json')
+
+event_analytics_parser = token_parser.copy()
+event_analytics_parser.add_argument(
+    'interval',
+    choices=tuple(INTERVALS),
+    default='minute',
+    location='args')
+event_analytics_parser.add_argument(
+    'timeFrom',
+    type=utc_datetime_type,
+    help='UTC time of the earliest redemption counted.',
+    location='args')
+event_analytics_parser.add_argument(
+    'timeTo',
+    type=utc_datetime_type,
+    help='UTC time redemptions before which are counted.',
+    location='args')
 
 # Models
 event_create_model = api.inherit('EventCreateData', status_message_model, {
     'eventIdentifier': fields.String(
         required=True,
-        description='The unique identifier of the event.')
+        description='The unique identifier of the event.'),
+    'jobIdentifier': fields.String(
+        required=False,
+        description='The unique identifier of the job minting the tickets, when async.')
+})
+
+event_add_model = api.inherit('EventAddData', status_message_model, {
+    'jobIdentifier': fields.String(
+        required=False,
+        description='The unique identifier of the job minting the tickets, when async.')
+})
+
+job_data_model = api.model('EventJobData', {
+    'eventIdentifier': fields.String(required=True, description='Identifier of the event.'),
+    'state': fields.String(
+        required=True,
+        description='One of pending, running, complete or failed.'),
+    'number_of_tickets': fields.Integer(
+        required=True,
+        description='The number of tickets the job mints.'),
+    'number_of_minted_tickets': fields.Integer(
+        required=True,
+        description='The number of tickets minted so far.'),
+    'error': fields.String(required=False, description='Why the job failed, if it did.')
+})
+
+event_job_model = api.inherit('EventJobModel', status_message_model, {
+    'data': fields.Nested(job_data_model, required=True)
+})
+
+key_data_model = api.model('EventKeyData', {
+    'algorithm': fields.String(required=True, description='The MAC of the scanner tag.'),
+    'key': fields.String(required=True, description='The scanner key of the event, base64 encoded.'),
+    'tagSize': fields.Integer(required=True, description='The number of bytes the tag is truncated to.')
+})
+
+event_key_model = api.inherit('EventKeyModel', status_message_model, {
+    'data': fields.Nested(key_data_model, required=True)
 })
 
 status_data_model = api.model('EventStatusData', {
@@ -62,19 +236,47 @@ status_data_model = api.model('EventStatusData', {
         description='The total number of tickets of the event.'),
     'number_of_redeemed_tickets': fields.Integer(
         required=True,
-        description='The number of redeemed tickets of the event.')
+        description='The number of redeemed tickets of the event.'),
+    'last_changed_utc': fields.DateTime(
+        required=True,
+        description='When the ticket counters of the event last changed.')
 })
 
 event_status_model = api.inherit('StatusDataModel', status_message_model, {
     'data': fields.Nested(status_data_model, required=True)
 })
 
+analytics_data_model = api.model('EventAnalyticsData', {
+    'interval': fields.String(
+        required=True,
+        description='The length of each bucket, one of minute or hour.',
+        enum=list(INTERVALS)),
+    'start_utc': fields.DateTime(
+        required=False,
+        description='Start of the first bucket, that of the first timed redemption, null without any.'),
+    'redeemed': fields.List(
+        fields.Integer,
+        required=True,
+        description='The number of tickets redeemed in each bucket, from the first redemption to the last.'),
+    'cumulative': fields.List(
+        fields.Integer,
+        required=True,
+        description='The number of tickets redeemed by the end of each bucket.')
+})
+
+event_analytics_model = api.inherit('AnalyticsDataModel', status_message_model, {
+    'data': fields.Nested(analytics_data_model, required=True)
+})
+
 all_data_model = api.inherit('EventAllData', status_data_model, {
     'guid': fields.String(required=True, description='Identifier of the event.'),
 })
 
 event_all_model = api.inherit('AllDataModel', status_message_model, {
-    'data': fields.List(fields.Nested(all_data_model))
+    'data': fields.List(fields.Nested(all_data_model)),
+    'nextCursor': fields.String(
+        required=False,
+        description='Cursor of the next page, null on the last page.')
 })
 
 download_data_model = api.model('EventDowloadData', {
@@ -90,6 +292,87 @@ event_dowload_model = api.inherit('EventDowloadModel', status_message_model, {
 })
 
 
+def conditional_on_event_version(f):
+    """
+    Tags the successful responses of an event resource with the version of
+    the events as an ETag, and answers a request already holding that
+    version with a 304 once authorised, without calling the resource. The
+    version is read first, so a response is never tagged with one newer
+    than its data.
+    """
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        version = event_version()
+        etag = quote_etag(version)
+
+        if request.if_none_match.contains_weak(version):
+            auth_token = request.headers.get('Authorization')
+            if auth_token and not isinstance(User.decode_auth_token(auth_token), str):
+                return Response(status=304, headers={'ETag': etag})
+
+        data, code, headers = unpack(f(*args, **kwargs))
+        if code == 200:
+            headers = dict(headers, ETag=etag)
+        return data, code, headers
+
+    return wrapper
+
+
+def create_ticket_job(event_id, author_id, number_of_tickets):
+    """
+    Creates a job minting tickets for an event within the current transaction
+    :return: tuple of the job's id and guid
+    """
+    job = TicketJob(event_id=event_id, author_id=author_id, number_of_tickets=number_of_tickets)
+
+    db.session.add(job)
+    db.session.flush()
+
+    return job.id, job.guid
+
+
+def create_event(name, date, initial_number_of_tickets, author_id, virtual, mint_async):
+    """
+    Creates an event within the current transaction. Events with virtual
+    tickets are visible at once, others are hidden until their tickets
+    are minted, by a ticket job if mint_async
+    :return: tuple of the event's id and guid, and the job's id and guid or Nones
+    """
+    event = Event(
+        name=name,
+        date=date,
+        initial_number_of_tickets=initial_number_of_tickets,
+        author_id=author_id,
+        is_visible=virtual,
+        ticket_seed=new_seed() if virtual else None
+    )
+
+    db.session.add(event)
+    db.session.flush()
+
+    job_id, job_guid = None, None
+    if mint_async:
+        job_id, job_guid = create_ticket_job(event.id, author_id, initial_number_of_tickets)
+
+    return event.id, event.guid, job_id, job_guid
+
+
+def add_virtual_tickets(event_id, number_of_tickets):
+    """Adds tickets to an event with virtual tickets within the current transaction."""
+    Event.increment_additional_tickets(event_id, number_of_tickets)
+    Event.increment_counters(event_id, number_of_tickets=number_of_tickets)
+
+
+def add_ticket_job(event_id, author_id, number_of_tickets):
+    """
+    Adds tickets to an event, to be minted by a ticket job, within the
+    current transaction
+    :return: tuple of the job's id and guid
+    """
+    Event.increment_additional_tickets(event_id, number_of_tickets)
+    return create_ticket_job(event_id, author_id, number_of_tickets)
+
+
 @api.route('/create')
 @api.expect(create_event_parser)
 class Create(Resource):
@@ -98,39 +381,58 @@ class Create(Resource):
     """
     @api.doc(responses={
         200: 'Successfully created event.',
+        202: 'Created event, its tickets are being minted.',
         400: 'Bad Request',
         401: 'The token is blacklisted, invalid, or the signature expired.',
         500: 'An Internal Server Error Occurred.'
     })
-    @api.marshal_with(event_create_model)
+    @api.marshal_with(event_create_model, skip_none=True)
     def post(self):
-        """Create an event"""
+        """Create an event, minting its tickets in the background if async, or not at all if virtual"""
         post_data = create_event_parser.parse_args()
+        event_id = None
 
         try:
             resp = User.decode_auth_token(post_data['Authorization'])
 
             if not isinstance(resp, str):
-                event = Event(
-                    name=post_data['name'],
-                    date=post_data['date'],
-                    initial_number_of_tickets=post_data['initial_number_of_tickets'],
-                    author_id=resp
-                )
+                # Hidden until its tickets are minted, unless they're virtual
+                created_event_id, event_guid, job_id, job_guid = writer.run(
+                    create_event,
+                    post_data['name'],
+                    post_data['date'],
+                    post_data['initial_number_of_tickets'],
+                    resp,
+                    post_data['virtual'],
+                    post_data['async'] and not post_data['virtual'])
+
+                if job_id is not None:
+                    response_object = {
+                        'status': 'success',
+                        'message': f'Created event "{post_data["name"]}", its tickets are being minted.',
+                        'eventIdentifier': str(uuid.UUID(bytes=event_guid)),
+                        'jobIdentifier': str(uuid.UUID(bytes=job_guid))
+                        }
 
-                db.session.add(event)
-                db.session.flush()
+                    ticket_jobs.submit(job_id)
+                    return response_object, 202
 
-                tickets = (Ticket(author_id=resp, event_id=event.id)
-                           for _ in range(post_data['initial_number_of_tickets']))
+                if not post_data['virtual']:
+                    # Discarded should minting fail
+                    event_id = created_event_id
 
-                db.session.add_all(tickets)
-                db.session.commit()
+                    mint_tickets_in_chunks(
+                        event_id=event_id,
+                        author_id=resp,
+                        number_of_tickets=post_data['initial_number_of_tickets'],
+                        chunk_size=current_app.config['MINTING_CHUNK_SIZE'])
+
+                    writer.run(Event.publish, event_id)
 
                 response_object = {
                     'status': 'success',
-                    'message': f'Successfully created event "{event.name}".',
-                    'eventIdentifier': str(uuid.UUID(bytes=event.guid))
+                    'message': f'Successfully created event "{post_data["name"]}".',
+                    'eventIdentifier': str(uuid.UUID(bytes=event_guid))
                     }
                 return response_object, 200
 
@@ -142,6 +444,15 @@ class Create(Resource):
 
         except Exception:
             logger.error('An error occurred creating an event.', exc_info=True)
+            db.session.rollback()
+
+            # Remove the tickets of the chunks which were committed
+            if event_id is not None:
+                try:
+                    Event.discard(event_id)
+                    db.session.commit()
+                except Exception:
+                    logger.error('An error occurred discarding a failed event.', exc_info=True)
 
             response_object = {
                 'status': 'fail',
@@ -158,11 +469,13 @@ class All(Resource):
     """
     @api.doc(responses={
         200: 'Successfully retrieved event status.',
+        304: 'The events are unchanged since the version in If-None-Match.',
         400: 'Bad Request',
         401: 'The token is blacklisted, invalid, or the signature expired.',
         402: 'Invalid eventIdentifier.',
         500: 'An Internal Server Error Occurred.'
     })
+    @conditional_on_event_version
     @api.marshal_with(event_all_model)
     def get(self):
         """Get status of an event"""
@@ -172,41 +485,72 @@ class All(Resource):
             resp = User.decode_auth_token(params['Authorization'])
 
             if not isinstance(resp, str):
-                result = db.session.query(
+                query = db.session.query(
                         Event.guid.label('guid'),
                         Event.name.label('name'),
                         Event.date.label('date'),
-                        db.func.count(Ticket.id).label('total'),
-                        db.func.sum(Ticket.is_redeemed).label('redeemed')
+                        Event.number_of_tickets.label('total'),
+                        Event.number_of_redeemed_tickets.label('redeemed'),
+                        Event.last_changed_utc.label('last_changed_utc')
                     )\
-                    .join(Event)\
-                    .group_by(
-                        Event.guid,
-                        Event.name,
-                        Event.date
-                        )\
+                    .filter(Event.is_visible == True)
+
+                if params['name']:
+                    name = params['name'].replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+                    query = query.filter(Event.name.ilike(f'%{name}%', escape='\\'))
+
+                if params['dateFrom']:
+                    query = query.filter(Event.date >= params['dateFrom'])
+
+                if params['dateTo']:
+                    query = query.filter(Event.date <= params['dateTo'])
+
+                if params['author']:
+                    query = query\
+                        .join(User, User.id == Event.author_id)\
+                        .filter(User.username == params['author'])
+
+                # Keyset pagination, continuing after the last event of the previous page
+                if params['cursor']:
+                    event_date, name, guid = params['cursor']
+                    query = query.filter(
+                        # Redundant bound, letting the date index seek to the page
+                        Event.date <= event_date,
+                        db.or_(
+                            Event.date < event_date,
+                            db.and_(Event.date == event_date, Event.name > name),
+                            db.and_(Event.date == event_date, Event.name == name, Event.guid > guid)
+                        ))
+
+                # Fetch one more than the page, to know if there is a next page
+                result = query\
                     .order_by(
                         Event.date.desc(),
                         Event.name.asc(),
                         Event.guid.asc()
                         )\
+                    .limit(params['limit'] + 1)\
                     .all()
 
+                page, more = result[:params['limit']], len(result) > params['limit']
+
                 data = [
                     {
                         'guid': str(uuid.UUID(bytes=row.guid)),
                         'name': row.name,
                         'date': row.date,
                         'number_of_tickets': row.total,
-                        'number_of_redeemed_tickets': int(row.redeemed)
+                        'number_of_redeemed_tickets': row.redeemed,
+                        'last_changed_utc': row.last_changed_utc
                     }
-                    for row in result
+                    for row in page
                 ]
 
                 response_object = {
                     'status': 'success',
                     'message': 'Successfully retrieved event status.',
-                    'data': data
+                    'data': data,
+                    'nextCursor': encode_cursor(page[-1]) if more else None
                 }
                 return response_object, 200
 
@@ -234,11 +578,13 @@ class Status(Resource):
     """
     @api.doc(responses={
         200: 'Successfully retrieved event status.',
+        304: 'The events are unchanged since the version in If-None-Match.',
         400: 'Bad Request',
         401: 'The token is blacklisted, invalid, or the signature expired.',
         402: 'Invalid eventIdentifier.',
         500: 'An Internal Server Error Occurred.'
     })
+    @conditional_on_event_version
     @api.marshal_with(event_status_model)
     def get(self, eventIdentifier):
         """Get status of an event"""
@@ -257,25 +603,15 @@ class Status(Resource):
                         }
                     return response_object, 402
 
-                result = db.session.query(
-                            Event.name.label('name'),
-                            Event.date.label('date'),
-                            db.func.count(Ticket.id).label('total'),
-                            db.func.sum(Ticket.is_redeemed).label('redeemed')
-                        )\
-                        .join(Event)\
-                        .filter(Event.guid == eventIdentifier.bytes)\
-                        .group_by(Event.name, Event.date)\
-                        .first()
-
                 response_object = {
                     'status': 'success',
                     'message': 'Successfully retrieved event status.',
                     'data': {
-                        'name': result.name,
-                        'date': result.date,
-                        'number_of_tickets': result.total,
-                        'number_of_redeemed_tickets': int(result.redeemed)
+                        'name': event.name,
+                        'date': event.date,
+                        'number_of_tickets': event.number_of_tickets,
+                        'number_of_redeemed_tickets': event.number_of_redeemed_tickets,
+                        'last_changed_utc': event.last_changed_utc
                     }}
                 return response_object, 200
 
@@ -295,6 +631,76 @@ class Status(Resource):
             return response_object, 500
 
 
+@api.route('/analytics/<uuid:eventIdentifier>')
+@api.expect(event_analytics_parser)
+class Analytics(Resource):
+    """
+    Event Analytics Resource
+    """
+    @api.doc(responses={
+        200: 'Successfully retrieved event analytics.',
+        400: 'Bad Request, or too many buckets.',
+        401: 'The token is blacklisted, invalid, or the signature expired.',
+        402: 'Invalid eventIdentifier.',
+        500: 'An Internal Server Error Occurred.'
+    })
+    @api.marshal_with(event_analytics_model)
+    def get(self, eventIdentifier):
+        """Get the number of an event's tickets redeemed per minute or hour, and the running total"""
+        params = event_analytics_parser.parse_args()
+
+        try:
+            resp = User.decode_auth_token(params['Authorization'])
+
+            if not isinstance(resp, str):
+                event_id = db.session.query(Event.id).filter_by(guid=eventIdentifier.bytes).scalar()
+
+                if event_id is None:
+                    response_object = {
+                        'status': 'fail',
+                        'message': 'Invalid eventIdentifier.'
+                        }
+                    return response_object, 402
+
+                interval = INTERVALS[params['interval']]
+                times = redemption_times(event_id, params['timeFrom'], params['timeTo'])
+
+                if number_of_buckets(times, interval) > MAX_BUCKETS:
+                    response_object = {
+                        'status': 'fail',
+                        'message': f'More than {MAX_BUCKETS} buckets, narrow timeFrom and timeTo or widen the interval.'
+                        }
+                    return response_object, 400
+
+                start_utc, redeemed, cumulative = bin_redemptions(times, interval)
+
+                response_object = {
+                    'status': 'success',
+                    'message': 'Successfully retrieved event analytics.',
+                    'data': {
+                        'interval': params['interval'],
+                        'start_utc': start_utc,
+                        'redeemed': redeemed.tolist(),
+                        'cumulative': cumulative.tolist()
+                    }}
+                return response_object, 200
+
+            response_object = {
+                'status': 'fail',
+                'message': resp
+                }
+            return response_object, 401
+
+        except Exception:
+            logger.error('An error occurred retrieving event analytics.', exc_info=True)
+
+            response_object = {
+                'status': 'fail',
+                'message': 'An Internal Server Error Occurred.',
+            }
+            return response_object, 500
+
+
 @api.route('/download/<uuid:eventIdentifier>')
 @api.expect(event_download_parser)
 class Download(Resource):
@@ -306,13 +712,20 @@ class Download(Resource):
         400: 'Bad Request',
         401: 'The token is blacklisted, invalid, or the signature expired.',
         402: 'Invalid eventIdentifier.',
+        409: 'The tickets of the event are still being minted.',
         500: 'An Internal Server Error Occurred.'
     })
-    @api.marshal_with(event_dowload_model)
+    @api.response(200, 'Success', event_dowload_model)
+    @api.produces(list(DOWNLOAD_MIMETYPES.values()))
     def get(self, eventIdentifier):
-        """Get download of an events unreemed tickets"""
+        """Get download of an events unreemed tickets, as signed tickets if signed"""
         params = event_download_parser.parse_args()
 
+        # Without a format argument, the format is negotiated from the Accept header
+        mimetype = request.accept_mimetypes.best_match(
+            DOWNLOAD_MIMETYPES.values(), default=DOWNLOAD_MIMETYPES[JSON])
+        download_format = params['format'] or DOWNLOAD_FORMATS[mimetype]
+
         try:
             resp = User.decode_auth_token(params['Authorization'])
 
@@ -325,18 +738,37 @@ class Download(Resource):
                         'status': 'fail',
                         'message': 'Invalid eventIdentifier.'
                         }
-                    return response_object, 402
+                    return marshal(response_object, event_dowload_model), 402
 
-                result = db.session.query(
-                            Ticket.guid.label('guid')
-                        )\
-                    .filter(db.and_(
-                        Ticket.event_id == event.id,
-                        Ticket.is_redeemed == False # Doesn't select if "is" is used instead of "=="
-                    ))\
-                    .all()
+                if not event.is_visible:
+                    response_object = {
+                        'status': 'fail',
+                        'message': 'The tickets of the event are still being minted.'
+                        }
+                    return marshal(response_object, event_dowload_model), 409
 
-                ticket_identifiers = [str(uuid.UUID(bytes=row.guid)) for row in result]
+                if download_format != JSON:
+                    compress = 'gzip' in request.accept_encodings
+                    chunks = export_unredeemed_tickets(
+                        event, download_format, compress=compress, signed=params['signed'])
+                    filename = f'{uuid.UUID(bytes=event.guid)}.{download_format}'
+
+                    headers = {
+                        'Content-Disposition': f'attachment; filename="{filename}"',
+                        'Vary': 'Accept, Accept-Encoding'
+                    }
+                    if compress:
+                        headers['Content-Encoding'] = 'gzip'
+
+                    return Response(
+                        stream_with_context(chunks),
+                        mimetype=DOWNLOAD_MIMETYPES[download_format],
+                        headers=headers)
+
+                ticket_identifiers = [
+                    ticket_identifier(ticket, params['signed'])
+                    for ticket in unredeemed_tickets(event, params['signed'])
+                ]
 
                 response_object = {
                     'status': 'success',
@@ -344,13 +776,13 @@ class Download(Resource):
                     'data': {
                         'ticketIdentifiers': ticket_identifiers
                     }}
-                return response_object, 200
+                return marshal(response_object, event_dowload_model), 200
 
             response_object = {
                 'status': 'fail',
                 'message': resp
                 }
-            return response_object, 401
+            return marshal(response_object, event_dowload_model), 401
 
         except Exception:
             logger.error('An error occurred creating an event.', exc_info=True)
@@ -359,7 +791,7 @@ class Download(Resource):
                 'status': 'fail',
                 'message': 'An Internal Server Error Occurred.',
             }
-            return response_object, 500
+            return marshal(response_object, event_dowload_model), 500
 
 
 @api.route('/add/<uuid:eventIdentifier>')
@@ -370,13 +802,16 @@ class Add(Resource):
     """
     @api.doc(responses={
         200: 'Successfully added tickets to event.',
+        202: 'The tickets are being minted.',
         400: 'Bad Request',
         401: 'The token is blacklisted, invalid, or the signature expired.',
         402: 'Invalid eventIdentifier.',
+        409: 'Too many tickets are live.',
         500: 'An Internal Server Error Occurred.'
     })
+    @api.marshal_with(event_add_model, skip_none=True)
     def put(self, eventIdentifier):
-        """Add more tickets to an existing event"""
+        """Add more tickets to an existing event, minting them in the background if async"""
         params = event_add_parser.parse_args()
 
         try:
@@ -392,16 +827,51 @@ class Add(Resource):
                         }
                     return response_object, 402
 
-                if event.additional_number_of_tickets:
-                    event.additional_number_of_tickets += params['additionalNumberOfTickets']
-                else:
-                    event.additional_number_of_tickets = params['additionalNumberOfTickets']
+                if event.is_live:
+                    live_events.sync()
 
-                tickets = (Ticket(author_id=resp, event_id=event.id)
-                           for _ in range(params['additionalNumberOfTickets']))
+                    if not live_events.has_room_for(event, params['additionalNumberOfTickets']):
+                        response_object = {
+                            'status': 'fail',
+                            'message': 'Too many tickets are live.'
+                            }
+                        return response_object, 409
 
-                db.session.add_all(tickets)
-                db.session.commit()
+                # Virtual tickets need nothing minting, only counting
+                if event.is_virtual:
+                    writer.run(add_virtual_tickets, event.id, params['additionalNumberOfTickets'])
+
+                    if event.is_live:
+                        live_events.changed()
+
+                    response_object = {
+                        'status': 'success',
+                        'message': f'Successfully added {params["additionalNumberOfTickets"]} event tickets.',
+                    }
+                    return response_object, 200
+
+                if params['async']:
+                    job_id, job_guid = writer.run(add_ticket_job, event.id, resp, params['additionalNumberOfTickets'])
+
+                    response_object = {
+                        'status': 'success',
+                        'message': f'Adding {params["additionalNumberOfTickets"]} event tickets, they are being minted.',
+                        'jobIdentifier': str(uuid.UUID(bytes=job_guid))
+                    }
+
+                    ticket_jobs.submit(job_id)
+                    return response_object, 202
+
+                # Counted as added chunk by chunk, as they're committed
+                mint_tickets_in_chunks(
+                    event_id=event.id,
+                    author_id=resp,
+                    number_of_tickets=params['additionalNumberOfTickets'],
+                    chunk_size=current_app.config['MINTING_CHUNK_SIZE'],
+                    additional=True)
+
+                if event.is_live:
+                    live_events.changed()
 
                 response_object = {
                     'status': 'success',
@@ -423,3 +893,196 @@ class Add(Resource):
                 'message': 'An Internal Server Error Occurred.',
             }
             return response_object, 500
+
+
+@api.route('/jobs/<uuid:jobIdentifier>')
+@api.expect(event_job_parser)
+class Job(Resource):
+    """
+    Event Ticket Job Resource
+    """
+    @api.doc(responses={
+        200: 'Successfully retrieved job status.',
+        400: 'Bad Request',
+        401: 'The token is blacklisted, invalid, or the signature expired.',
+        402: 'Invalid jobIdentifier.',
+        500: 'An Internal Server Error Occurred.'
+    })
+    @api.marshal_with(event_job_model)
+    def get(self, jobIdentifier):
+        """Get the progress of a job minting an event's tickets"""
+        params = event_job_parser.parse_args()
+
+        try:
+            resp = User.decode_auth_token(params['Authorization'])
+
+            if not isinstance(resp, str):
+                result = db.session.query(TicketJob, Event.guid)\
+                    .join(Event, Event.id == TicketJob.event_id)\
+                    .filter(TicketJob.guid == jobIdentifier.bytes)\
+                    .first()
+
+                if not result:
+                    response_object = {
+                        'status': 'fail',
+                        'message': 'Invalid jobIdentifier.'
+                        }
+                    return response_object, 402
+
+                job, event_guid = result
+
+                response_object = {
+                    'status': 'success',
+                    'message': 'Successfully retrieved job status.',
+                    'data': {
+                        'eventIdentifier': str(uuid.UUID(bytes=event_guid)),
+                        'state': job.state,
+                        'number_of_tickets': job.number_of_tickets,
+                        'number_of_minted_tickets': job.number_of_minted_tickets,
+                        'error': job.error
+                    }}
+                return response_object, 200
+
+            response_object = {
+                'status': 'fail',
+                'message': resp
+                }
+            return response_object, 401
+
+        except Exception:
+            logger.error('An error occurred retrieving a job.', exc_info=True)
+
+            response_object = {
+                'status': 'fail',
+                'message': 'An Internal Server Error Occurred.',
+            }
+            return response_object, 500
+
+
+@api.route('/live/<uuid:eventIdentifier>')
+@api.expect(event_live_parser)
+class Live(Resource):
+    """
+    Event Live Resource
+    """
+    @api.doc(responses={
+        200: 'Successfully marked event.',
+        400: 'Bad Request',
+        401: 'The token is blacklisted, invalid, or the signature expired.',
+        402: 'Invalid eventIdentifier.',
+        409: 'Too many tickets are live.',
+        500: 'An Internal Server Error Occurred.'
+    })
+    @api.marshal_with(status_message_model)
+    def put(self, eventIdentifier):
+        """Mark an event live, holding its tickets in memory while it is scanned, or not"""
+        params = event_live_parser.parse_args()
+
+        try:
+            resp = User.decode_auth_token(params['Authorization'])
+
+            if not isinstance(resp, str):
+                event = Event.query.filter_by(guid=eventIdentifier.bytes).first()
+
+                if not event:
+                    response_object = {
+                        'status': 'fail',
+                        'message': 'Invalid eventIdentifier.'
+                        }
+                    return response_object, 402
+
+                live_events.sync()
+
+                if params['live'] and not live_events.has_room_for(event):
+                    response_object = {
+                        'status': 'fail',
+                        'message': 'Too many tickets are live.'
+                        }
+                    return response_object, 409
+
+                event.is_live = params['live']
+                db.session.commit()
+
+                # Loaded now, rather than by the first scan
+                live_events.changed()
+                live_events.sync()
+
+                response_object = {
+                    'status': 'success',
+                    'message': f'Successfully marked event "{event.name}" {"live" if params["live"] else "not live"}.'
+                    }
+                return response_object, 200
+
+            response_object = {
+                'status': 'fail',
+                'message': resp
+                }
+            return response_object, 401
+
+        except Exception:
+            logger.error('An error occurred marking an event live.', exc_info=True)
+
+            response_object = {
+                'status': 'fail',
+                'message': 'An Internal Server Error Occurred.',
+            }
+            return response_object, 500
+
+
+@api.route('/key/<uuid:eventIdentifier>')
+@api.expect(event_key_parser)
+class Key(Resource):
+    """
+    Event Scanner Key Resource
+    """
+    @api.doc(responses={
+        200: 'Successfully retrieved scanner key.',
+        400: 'Bad Request',
+        401: 'The token is blacklisted, invalid, or the signature expired.',
+        402: 'Invalid eventIdentifier.',
+        500: 'An Internal Server Error Occurred.'
+    })
+    @api.marshal_with(event_key_model)
+    def get(self, eventIdentifier):
+        """Get the key scanners verify the signed tickets of an event with"""
+        params = event_key_parser.parse_args()
+
+        try:
+            resp = User.decode_auth_token(params['Authorization'])
+
+            if not isinstance(resp, str):
+                exists = db.session.query(
+                        Event.query.filter_by(guid=eventIdentifier.bytes).exists()
+                    ).scalar()
+
+                if not exists:
+                    response_object = {
+                        'status': 'fail',
+                        'message': 'Invalid eventIdentifier.'
+                        }
+                    return response_object, 402
+
+                response_object = {
+                    'status': 'success',
+                    'message': 'Successfully retrieved scanner key.',
+                    'data': {
+                        'algorithm': ALGORITHM,
+                        'key': base64.b64encode(ticket_signer.scanner_key(eventIdentifier.bytes)).decode(),
+                        'tagSize': SCANNER_TAG_SIZE
+                    }}
+                return response_object, 200
+
+            response_object = {
+                'status': 'fail',
+                'message': resp
+                }
+            return response_object, 401
+
+        except Exception:
+            logger.error('An error occurred retrieving a scanner key.', exc_info=True)
+
+            response_object = {
+                'status': 'fail',
+                'message': 'An Internal Server Error Occurred.',
+            }
+            return response_object, 500
@@ -0,0 +1,85 @@
+import logging
+from flask_restx import Namespace, Resource, fields
+
+from simple_events.models.auth import User
+from simple_events.core.ticket_filter import ticket_filter
+from simple_events.apis.auth import status_message_model, token_parser
+
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+# Namespace
+api = Namespace('metrics', description='Metrics of the server process')
+
+# Parsers
+metrics_parser = token_parser.copy()
+
+# Models
+ticket_filter_data_model = api.model('TicketFilterData', {
+    'enabled': fields.Boolean(required=True, description='Whether ticket identifiers are filtered.'),
+    'number_of_insertions': fields.Integer(
+        required=True,
+        description='The number of ticket guids added to the filter.'),
+    'size_in_bytes': fields.Integer(required=True, description='The memory taken by the filter.'),
+    'checked': fields.Integer(required=True, description='The number of guids checked against the filter.'),
+    'rejected': fields.Integer(
+        required=True,
+        description='The number of guids rejected without a database query.'),
+    'hit_rate': fields.Float(description='The share of checked guids passed to the database.'),
+    'false_positives': fields.Integer(
+        required=True,
+        description='The number of passed guids the database found no ticket for.'),
+    'false_positive_rate': fields.Float(
+        description='The share of guids of no ticket which were passed to the database.'),
+    'estimated_false_positive_rate': fields.Float(
+        description='The false positive rate expected from the share of bits set.')
+})
+
+ticket_filter_model = api.inherit('TicketFilterModel', status_message_model, {
+    'data': fields.Nested(ticket_filter_data_model, required=True)
+})
+
+
+@api.route('/ticket-filter')
+@api.expect(metrics_parser)
+class TicketFilter(Resource):
+    """
+    Ticket Filter Metrics Resource
+    """
+    @api.doc(responses={
+        200: 'Successfully retrieved metrics.',
+        400: 'Bad Request',
+        401: 'The token is blacklisted, invalid, or the signature expired.',
+        500: 'An Internal Server Error Occurred.'
+    })
+    @api.marshal_with(ticket_filter_model)
+    def get(self):
+        """Get the metrics of this process's filter of ticket identifiers"""
+        params = metrics_parser.parse_args()
+
+        try:
+            resp = User.decode_auth_token(params['Authorization'])
+
+            if not isinstance(resp, str):
+                response_object = {
+                    'status': 'success',
+                    'message': 'Successfully retrieved metrics.',
+                    'data': ticket_filter.metrics()
+                    }
+                return response_object, 200
+
+            response_object = {
+                'status': 'fail',
+                'message': resp
+                }
+            return response_object, 401
+
+        except Exception:
+            logger.error('An error occurred retrieving metrics.', exc_info=True)
+
+            response_object = {
+                'status': 'fail',
+                'message': 'An Internal Server Error Occurred.',
+            }
+            return response_object, 500
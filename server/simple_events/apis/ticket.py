@@ -1,9 +1,14 @@
 import logging
-from flask_restx import Namespace, Resource
+import uuid
+from flask_restx import Namespace, Resource, fields, reqparse
 
-from simple_events.models import db
 from simple_events.models.auth import User
-from simple_events.models.event import Ticket
+from simple_events.models.event import Ticket, INVALID, ALREADY_REDEEMED, REDEEMED
+from simple_events.core.signed_tickets import ticket_signer, CODE_PREFIX
+from simple_events.core.live_events import live_events
+from simple_events.core.ticket_filter import ticket_filter
+from simple_events.core.writer import writer
+from simple_events.core.journal import redemption_journal
 from simple_events.apis.auth import status_message_model, token_parser
 
 
@@ -13,8 +18,158 @@ logger = logging.getLogger(__name__)
 # Namespace
 api = Namespace('', description='All Things Ticket Related')
 
+# Maximum number of tickets which can be redeemed or looked up in one batch
+MAX_REDEEM_BATCH_SIZE = 1000
+MAX_STATUS_BATCH_SIZE = 10000
 
-@api.route('/redeem/<uuid:ticketIdentifier>')
+
+# Custom types
+def ticket_identifiers_type(max_size):
+    def validate(value):
+        if (isinstance(value, list)
+                and 1 <= len(value) <= max_size
+                and all(isinstance(item, str) for item in value)):
+            return value
+        raise ValueError(f'ticketIdentifiers must be a list of between 1 and {max_size} strings.')
+
+    validate.__schema__ = {'type': 'array', 'items': {'type': 'string'}, 'maxItems': max_size}
+    return validate
+
+# Parsers
+redeem_batch_parser = reqparse.RequestParser()
+redeem_batch_parser.add_argument(
+    'ticketIdentifiers',
+    type=ticket_identifiers_type(MAX_REDEEM_BATCH_SIZE),
+    required=True,
+    location='json')
+
+status_batch_parser = token_parser.copy()
+status_batch_parser.add_argument(
+    'ticketIdentifiers',
+    type=ticket_identifiers_type(MAX_STATUS_BATCH_SIZE),
+    required=True,
+    location='json')
+
+# Models
+outcomes_field = api.model('TicketOutcomes', {
+    '*': fields.Wildcard(fields.String)
+})
+
+redeem_batch_model = api.inherit('RedeemBatchModel', status_message_model, {
+    'data': fields.Nested(
+        outcomes_field,
+        required=True,
+        description='Mapping of ticketIdentifier to one of redeemed, already_redeemed or invalid.')
+})
+
+status_batch_model = api.inherit('StatusBatchModel', status_message_model, {
+    'data': fields.Nested(
+        outcomes_field,
+        required=True,
+        description='Mapping of ticketIdentifier to one of unredeemed, redeemed or invalid.')
+})
+
+
+def parse_ticket_identifier(ticket_identifier):
+    """
+    Parses a ticket identifier, a UUID or signed ticket code, checking the
+    signature of a code without the database
+    :return: guid bytes, or None if the identifier is invalid or forged
+    """
+    if isinstance(ticket_identifier, uuid.UUID):
+        return ticket_identifier.bytes
+
+    if isinstance(ticket_identifier, str) and ticket_identifier.startswith(CODE_PREFIX):
+        return ticket_signer.verify_code(ticket_identifier)
+
+    try:
+        return uuid.UUID(ticket_identifier).bytes
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_ticket_identifiers(ticket_identifiers):
+    """
+    Parses ticket identifiers, dropping any which are invalid or forged
+    :return: dict of ticket identifier to guid bytes
+    """
+    guids = {}
+    for ticket_identifier in ticket_identifiers:
+        guid = parse_ticket_identifier(ticket_identifier)
+        if guid is not None:
+            guids[ticket_identifier] = guid
+    return guids
+
+
+def redeem(guids):
+    """
+    Redeems tickets within the current transaction
+    :return: dict of guid to one of REDEEMED, ALREADY_REDEEMED or INVALID
+    """
+    if len(guids) == 1:
+        return {guids[0]: Ticket.redeem(guids[0])}
+    return Ticket.redeem_many(guids)
+
+
+def redeem_tickets(guids):
+    """
+    Redeems tickets, in the redemption journal if there is one, or else
+    committed through the writer, answering the scans of guids of no
+    ticket, and of tickets known to be redeemed, from memory
+    :return: dict of guid to one of REDEEMED, ALREADY_REDEEMED or INVALID
+    """
+    passed, rejected = ticket_filter.screen(guids)
+
+    outcomes = dict.fromkeys(rejected, INVALID)
+    outcomes.update(dict.fromkeys(live_events.known_redeemed(passed), ALREADY_REDEEMED))
+    outcomes.update(dict.fromkeys(redemption_journal.known_redeemed(passed), ALREADY_REDEEMED))
+    remaining = [guid for guid in passed if guid not in outcomes]
+
+    if remaining:
+        if redemption_journal.enabled:
+            redeemed = redemption_journal.redeem(remaining)
+        else:
+            redeemed = writer.run(redeem, remaining)
+
+        live_events.record(redeemed)
+        ticket_filter.record_false_positives(guid for guid, outcome in redeemed.items() if outcome == INVALID)
+        outcomes.update(redeemed)
+
+    return outcomes
+
+
+def ticket_states(guids):
+    """
+    Looks up the state of tickets, from memory for guids of no ticket and
+    tickets of live events
+    :return: dict of guid to one of UNREDEEMED, REDEEMED or INVALID
+    """
+    passed, rejected = ticket_filter.screen(guids)
+
+    states = dict.fromkeys(rejected, INVALID)
+    states.update(live_events.states(passed))
+    # Redeemed in the journal, though perhaps not yet in the database
+    states.update(dict.fromkeys(redemption_journal.known_redeemed(passed), REDEEMED))
+    remaining = [guid for guid in passed if guid not in states]
+
+    if remaining:
+        found = Ticket.status_many(remaining)
+
+        ticket_filter.record_false_positives(guid for guid, state in found.items() if state == INVALID)
+        states.update(found)
+
+    return states
+
+
+def invalid_ticket_identifier():
+    response_object = {
+        'status': 'fail',
+        'message': 'Invalid ticketIdentifier.'
+        }
+    return response_object, 402
+
+
+@api.route('/redeem/<uuid:ticketIdentifier>', '/redeem/<string:ticketCode>')
 class Redeem(Resource):
     """
     Ticket Redeem Resource
@@ -27,29 +182,31 @@ class Redeem(Resource):
         500: 'An Internal Server Error Occurred.'
     })
     @api.marshal_with(status_message_model)
-    def get(self, ticketIdentifier):
-        """Redeem a ticket"""
+    def get(self, ticketIdentifier=None, ticketCode=None):
+        """Redeem a ticket, by its identifier or signed ticket code"""
+        guid = parse_ticket_identifier(ticketIdentifier or ticketCode)
+
+        # Garbage and forged codes are turned away without the database
+        if guid is None:
+            return invalid_ticket_identifier()
+
         try:
-            ticket = Ticket.query.filter_by(guid=ticketIdentifier.bytes).first()
+            outcome = redeem_tickets([guid])[guid]
 
-            if not ticket:
+            if outcome == INVALID:
                 response_object = {
                     'status': 'fail',
                     'message': 'Invalid ticketIdentifier.'
                     }
                 return response_object, 402
 
-            if ticket.is_redeemed:
+            if outcome == ALREADY_REDEEMED:
                 response_object = {
                     'status': 'success',
                     'message': 'GONE: ticket has already been redeemed.'
                 }
                 return response_object, 410
 
-            ticket.is_redeemed = True
-
-            db.session.commit()
-
             response_object = {
                     'status': 'success',
                     'message': 'OK: ticket redeemed.'
@@ -57,7 +214,105 @@ class Redeem(Resource):
             return response_object
 
         except Exception:
-            logger.error('An error occurred creating an event.', exc_info=True)
+            logger.error('An error occurred redeeming a ticket.', exc_info=True)
+
+            response_object = {
+                'status': 'fail',
+                'message': 'An Internal Server Error Occurred.',
+            }
+            return response_object, 500
+
+
+@api.route('/redeem/batch')
+@api.expect(redeem_batch_parser)
+class RedeemBatch(Resource):
+    """
+    Ticket Batch Redeem Resource
+    """
+    @api.doc(responses={
+        200: 'Ok',
+        400: 'Bad Request',
+        500: 'An Internal Server Error Occurred.'
+    })
+    @api.marshal_with(redeem_batch_model)
+    def post(self):
+        """Redeem a batch of tickets"""
+        post_data = redeem_batch_parser.parse_args()
+        ticket_identifiers = post_data['ticketIdentifiers']
+
+        try:
+            guids = parse_ticket_identifiers(ticket_identifiers)
+
+            outcomes = redeem_tickets(list(dict.fromkeys(guids.values())))
+
+            data = {
+                ticket_identifier: outcomes[guids[ticket_identifier]] if ticket_identifier in guids else INVALID
+                for ticket_identifier in ticket_identifiers
+            }
+
+            response_object = {
+                'status': 'success',
+                'message': 'OK: batch redeemed.',
+                'data': data
+            }
+            return response_object, 200
+
+        except Exception:
+            logger.error('An error occurred redeeming a batch of tickets.', exc_info=True)
+
+            response_object = {
+                'status': 'fail',
+                'message': 'An Internal Server Error Occurred.',
+            }
+            return response_object, 500
+
+
+@api.route('/status/batch')
+@api.expect(status_batch_parser)
+class StatusBatch(Resource):
+    """
+    Ticket Batch Status Resource
+    """
+    @api.doc(responses={
+        200: 'Ok',
+        400: 'Bad Request',
+        401: 'The token is blacklisted, invalid, or the signature expired.',
+        500: 'An Internal Server Error Occurred.'
+    })
+    @api.marshal_with(status_batch_model)
+    def post(self):
+        """Check status of a batch of tickets"""
+        post_data = status_batch_parser.parse_args()
+        ticket_identifiers = post_data['ticketIdentifiers']
+
+        try:
+            resp = User.decode_auth_token(post_data['Authorization'])
+
+            if not isinstance(resp, str):
+                guids = parse_ticket_identifiers(ticket_identifiers)
+
+                states = ticket_states(list(dict.fromkeys(guids.values())))
+
+                data = {
+                    ticket_identifier: states[guids[ticket_identifier]] if ticket_identifier in guids else INVALID
+                    for ticket_identifier in ticket_identifiers
+                }
+
+                response_object = {
+                    'status': 'success',
+                    'message': 'OK.',
+                    'data': data
+                }
+                return response_object, 200
+
+            response_object = {
+                'status': 'fail',
+                'message': resp
+                }
+            return response_object, 401
+
+        except Exception:
+            logger.error('An error occurred checking status of a batch of tickets.', exc_info=True)
 
             response_object = {
                 'status': 'fail',
@@ -66,7 +321,7 @@ class Redeem(Resource):
             return response_object, 500
 
 
-@api.route('/status/<uuid:ticketIdentifier>')
+@api.route('/status/<uuid:ticketIdentifier>', '/status/<string:ticketCode>')
 @api.expect(token_parser)
 class Status(Resource):
     """
@@ -81,24 +336,22 @@ class Status(Resource):
         500: 'An Internal Server Error Occurred.'
     })
     @api.marshal_with(status_message_model)
-    def get(self, ticketIdentifier):
-        """Check status of ticket"""
+    def get(self, ticketIdentifier=None, ticketCode=None):
+        """Check status of ticket, by its identifier or signed ticket code"""
         params = token_parser.parse_args()
 
         try:
             resp = User.decode_auth_token(params['Authorization'])
 
             if not isinstance(resp, str):
-                ticket = Ticket.query.filter_by(guid=ticketIdentifier.bytes).first()
+                guid = parse_ticket_identifier(ticketIdentifier or ticketCode)
 
-                if not ticket:
-                    response_object = {
-                        'status': 'fail',
-                        'message': 'Invalid ticketIdentifier.'
-                        }
-                    return response_object, 402
+                state = ticket_states([guid])[guid] if guid is not None else INVALID
+
+                if state == INVALID:
+                    return invalid_ticket_identifier()
 
-                if ticket.is_redeemed:
+                if state == REDEEMED:
                     response_object = {
                         'status': 'success',
                         'message': 'GONE: ticket redeemed.'
@@ -118,7 +371,7 @@ class Status(Resource):
             return response_object, 401
 
         except Exception:
-            logger.error('An error occurred creating an event.', exc_info=True)
+            logger.error('An error occurred checking status of a ticket.', exc_info=True)
 
             response_object = {
                 'status': 'fail',
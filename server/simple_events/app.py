@@ -13,6 +13,14 @@ from flask_migrate import Migrate
 from simple_events.apis import api
 from simple_events.models import db, bcrypt
 from simple_events.core.utils import get_app_settings
+from simple_events.core.token_cache import token_cache
+from simple_events.core.hashing import password_hasher
+from simple_events.core.jobs import ticket_jobs
+from simple_events.core.signed_tickets import ticket_signer
+from simple_events.core.live_events import live_events
+from simple_events.core.ticket_filter import ticket_filter
+from simple_events.core.writer import writer
+from simple_events.core.journal import redemption_journal
 
 
 app = Flask(__name__, instance_relative_config=True)
@@ -31,6 +39,30 @@ db.init_app(app)
 # Initialise Bcrypt
 bcrypt.init_app(app)
 
+# Initialise auth token cache
+token_cache.init_app(app)
+
+# Initialise password hashing pool
+password_hasher.init_app(app)
+
+# Initialise ticket minting jobs
+ticket_jobs.init_app(app)
+
+# Initialise ticket signing
+ticket_signer.init_app(app)
+
+# Initialise live event tickets
+live_events.init_app(app)
+
+# Initialise the filter of ticket guids
+ticket_filter.init_app(app)
+
+# Initialise the single writer
+writer.init_app(app)
+
+# Initialise the redemption journal
+redemption_journal.init_app(app)
+
 # Initialise API
 api.init_app(app)
 
@@ -0,0 +1,74 @@
+from datetime import datetime, timezone
+
+import numpy as np
+
+from simple_events.models import db
+from simple_events.models.event import Ticket
+
+
+# Seconds per bucket of each interval redemptions can be counted by
+INTERVALS = {
+    'minute': 60,
+    'hour': 60 * 60,
+}
+
+# Most buckets counted at once, so a stray redemption time can't have a
+# bucket allocated for every interval between it and the rest
+MAX_BUCKETS = 10000
+
+
+def redemption_times(event_id, from_utc=None, to_utc=None):
+    """
+    Reads when an event's tickets were redeemed, as whole seconds since the
+    epoch computed by the database, from the index of redemption times
+    :param from_utc: datetime, if given, of the earliest redemption read
+    :param to_utc: datetime, if given, redemptions before which are read
+    :return: numpy array of int64, in no particular order
+    """
+    if db.session.connection().dialect.name == 'postgresql':
+        seconds = db.cast(db.func.floor(db.func.extract('epoch', Ticket.redeemed_on_utc)), db.BigInteger)
+    else:
+        seconds = db.cast(db.func.strftime('%s', Ticket.redeemed_on_utc), db.Integer)
+
+    statement = db.select([seconds])\
+        .where(db.and_(
+            Ticket.event_id == event_id,
+            Ticket.redeemed_on_utc != None
+        ))
+    if from_utc is not None:
+        statement = statement.where(Ticket.redeemed_on_utc >= from_utc)
+    if to_utc is not None:
+        statement = statement.where(Ticket.redeemed_on_utc < to_utc)
+
+    # Fetched as the DBAPI's own tuples, which numpy converts in one go,
+    # rather than wrapped row by row by SQLAlchemy
+    rows = db.session.execute(statement).cursor.fetchall()
+    return np.array(rows, dtype=np.int64).reshape(-1)
+
+
+def number_of_buckets(times, interval):
+    """:return: integer, the number of buckets bin_redemptions would count times in"""
+    if not len(times):
+        return 0
+    return int(times.max() // interval - times.min() // interval) + 1
+
+
+def bin_redemptions(times, interval):
+    """
+    Counts redemptions per bucket of interval seconds, from the bucket of
+    the first redemption to that of the last, including empty ones
+    :param times: numpy array of int64 seconds since the epoch
+    :return: tuple of the start of the first bucket as a UTC datetime, or
+             None if there are no times, and numpy arrays of the count of
+             each bucket and the running total to the end of each
+    """
+    if not len(times):
+        empty = np.zeros(0, dtype=np.int64)
+        return None, empty, empty
+
+    start = times.min() // interval * interval
+    counts = np.bincount((times - start) // interval)
+
+    # Naive, as every other UTC datetime
+    start_utc = datetime.fromtimestamp(int(start), timezone.utc).replace(tzinfo=None)
+    return start_utc, counts, np.cumsum(counts)
@@ -0,0 +1,75 @@
+from datetime import datetime
+
+from simple_events.models import db
+from simple_events.models.event import Event, Ticket
+
+
+def counted_tickets(is_redeemed=None):
+    """
+    Correlated subquery counting an event's tickets from the ticket table
+    :param is_redeemed: if given, only count tickets with this redemption state
+    """
+    query = db.session.query(db.func.count(Ticket.id))\
+        .filter(Ticket.event_id == Event.id)
+
+    if is_redeemed is not None:
+        query = query.filter(Ticket.is_redeemed == is_redeemed)
+
+    return query.correlate(Event).as_scalar()
+
+
+def total_tickets():
+    """
+    An event's total number of tickets. Only the redeemed tickets of virtual
+    events have rows, so their stored total is taken as it is.
+    """
+    return db.case([(Event.ticket_seed != None, Event.number_of_tickets)], else_=counted_tickets())
+
+
+def find_counter_discrepancies():
+    """
+    Compares every event's ticket counters against the ticket table
+    :return: list of rows of the event guid, stored and counted totals
+    """
+    total = total_tickets()
+    redeemed = counted_tickets(is_redeemed=True)
+
+    return db.session.query(
+            Event.guid.label('guid'),
+            Event.number_of_tickets.label('number_of_tickets'),
+            total.label('counted_number_of_tickets'),
+            Event.number_of_redeemed_tickets.label('number_of_redeemed_tickets'),
+            redeemed.label('counted_number_of_redeemed_tickets')
+        )\
+        .filter(db.or_(
+            Event.number_of_tickets != total,
+            Event.number_of_redeemed_tickets != redeemed
+        ))\
+        .all()
+
+
+def recompute_counters():
+    """
+    Recomputes the ticket counters of every event whose counters are
+    incorrect from the ticket table in a single statement, marking them as
+    changed. The caller is responsible for committing.
+    :return: integer, the number of events updated
+    """
+    total = total_tickets()
+    redeemed = counted_tickets(is_redeemed=True)
+
+    updated = Event.query\
+        .filter(db.or_(
+            Event.number_of_tickets != total,
+            Event.number_of_redeemed_tickets != redeemed
+        ))\
+        .update(
+            {
+                Event.number_of_tickets: total,
+                Event.number_of_redeemed_tickets: redeemed,
+                Event.last_changed_utc: datetime.utcnow()
+            },
+            synchronize_session=False)
+    if updated:
+        Event.changed()
+    return updated
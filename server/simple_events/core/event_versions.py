@@ -0,0 +1,14 @@
+from simple_events.models.event import EventVersion
+
+
+def event_version():
+    """
+    Reads the version of the events as listed, which every transaction
+    changing an event, be it a change of counters, visibility, or a new
+    event, moves as it commits, in commit order. It's one query of one row,
+    so the listing and status of events can answer a conditional request
+    for an unchanged version before running theirs, and it's the same for
+    every process, whichever node wrote the change.
+    :return: string, the version of the events, to be quoted as an ETag
+    """
+    return f'events-{EventVersion.current()}'
@@ -0,0 +1,158 @@
+import json
+import struct
+import uuid
+import zlib
+from itertools import islice
+
+from simple_events.models import db
+from simple_events.models.event import Ticket
+from simple_events.core.virtual_tickets import derive_guids
+from simple_events.core import signed_tickets
+from simple_events.core.signed_tickets import ticket_signer
+
+
+# Number of rows fetched from the database, and written out, at a time
+EXPORT_BATCH_SIZE = 10000
+
+# Streamed export formats and their mimetypes
+CSV = 'csv'
+NDJSON = 'ndjson'
+BINARY = 'binary'
+
+MIMETYPES = {
+    CSV: 'text/csv',
+    NDJSON: 'application/x-ndjson',
+    BINARY: 'application/vnd.simple-events.tickets',
+}
+
+# Header of the binary format: magic, format version, size of each ticket,
+# two reserved bytes, then the guid of the event. The raw tickets follow
+# the header until the end of the stream, 16 byte guids, or the payloads
+# of signed tickets.
+BINARY_MAGIC = b'SETK'
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct('>4sBBxx16s')
+
+
+def unredeemed_ticket_guids(event, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Iterates the guids of an event's unredeemed tickets, fetching them from
+    the database a batch at a time rather than all at once. Virtual tickets
+    are derived, skipping those with a row, which have been redeemed.
+    """
+    if event.is_virtual:
+        redeemed = {
+            row.guid for row in db.session.query(Ticket.guid).filter(Ticket.event_id == event.id)
+        }
+        for guid in derive_guids(event.id, event.ticket_seed, event.number_of_tickets):
+            if guid not in redeemed:
+                yield guid
+        return
+
+    query = db.session.query(Ticket.guid)\
+        .filter(db.and_(
+            Ticket.event_id == event.id,
+            Ticket.is_redeemed == False
+        ))\
+        .yield_per(batch_size)
+
+    for row in query:
+        yield row.guid
+
+
+def unredeemed_tickets(event, signed=False):
+    """Iterates an event's unredeemed tickets, as guids or signed payloads."""
+    guids = unredeemed_ticket_guids(event)
+
+    if not signed:
+        return guids
+
+    return (ticket_signer.sign(guid, event.guid) for guid in guids)
+
+
+def ticket_identifier(ticket, signed=False):
+    """The text form of a ticket, its UUID or signed code."""
+    return signed_tickets.encode(ticket) if signed else str(uuid.UUID(bytes=ticket))
+
+
+def batched(iterable, size):
+    """Yields successive lists of at most size items from an iterable."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def csv_chunks(event, tickets, signed=False, batch_size=EXPORT_BATCH_SIZE):
+    yield 'ticketIdentifier\n'.encode()
+
+    for batch in batched(tickets, batch_size):
+        yield ''.join(f'{ticket_identifier(ticket, signed)}\n' for ticket in batch).encode()
+
+
+def ndjson_chunks(event, tickets, signed=False, batch_size=EXPORT_BATCH_SIZE):
+    for batch in batched(tickets, batch_size):
+        yield ''.join(
+            json.dumps({'ticketIdentifier': ticket_identifier(ticket, signed)}) + '\n'
+            for ticket in batch
+        ).encode()
+
+
+def binary_chunks(event, tickets, signed=False, batch_size=EXPORT_BATCH_SIZE):
+    size = signed_tickets.PAYLOAD.size if signed else 16
+    yield BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, size, event.guid)
+
+    # The tickets are written exactly as they are, without encoding them
+    for batch in batched(tickets, batch_size):
+        yield b''.join(batch)
+
+
+def gzip_chunks(chunks):
+    """Compresses a stream of chunks into a gzip stream."""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+
+    yield compressor.flush()
+
+
+def read_binary_export(data):
+    """
+    Reads an export in the binary format
+    :param data: bytes
+    :return: tuple of the event guid and list of ticket guids, or payloads
+    """
+    magic, version, guid_size, event_guid = BINARY_HEADER.unpack_from(data)
+
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError('Not a binary ticket export.')
+
+    body = data[BINARY_HEADER.size:]
+    return event_guid, [body[i:i + guid_size] for i in range(0, len(body), guid_size)]
+
+
+WRITERS = {
+    CSV: csv_chunks,
+    NDJSON: ndjson_chunks,
+    BINARY: binary_chunks,
+}
+
+
+def export_unredeemed_tickets(event, export_format, compress=False, signed=False):
+    """
+    Generates the chunks of an event's unredeemed tickets in a streamed
+    export format, so memory use stays flat whatever the number of tickets.
+    :param compress: gzip the stream
+    :param signed: export signed tickets rather than their guids
+    """
+    chunks = WRITERS[export_format](event, unredeemed_tickets(event, signed), signed=signed)
+
+    if compress:
+        chunks = gzip_chunks(chunks)
+
+    return chunks
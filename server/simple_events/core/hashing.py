@@ -0,0 +1,78 @@
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+
+
+class HashingServiceBusy(Exception):
+    """Raised when more password hashes are pending than allowed."""
+
+
+def hash_password(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def check_password(pw_hash, password):
+    return bcrypt.checkpw(password.encode('utf-8'), pw_hash.encode('utf-8'))
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and checking in a bounded pool of worker processes,
+    so logins and registrations can't take over the request workers. When
+    more than the allowed number of hashes are pending, new ones are
+    refused with HashingServiceBusy rather than queued.
+
+    With no workers configured hashes are computed inline.
+    """
+
+    def __init__(self):
+        self.workers = 0
+        self.timeout = None
+        self._executor = None
+        self._pending = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.shutdown()
+        self.workers = app.config['PASSWORD_HASHING_WORKERS']
+        self.timeout = app.config['PASSWORD_HASHING_TIMEOUT_SECONDS']
+        self._pending = threading.BoundedSemaphore(app.config['PASSWORD_HASHING_MAX_PENDING'])
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Spawned rather than forked, as forking a threaded server is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+
+        if not self._pending.acquire(blocking=False):
+            raise HashingServiceBusy()
+
+        try:
+            return self.executor.submit(fn, *args).result(timeout=self.timeout)
+        finally:
+            self._pending.release()
+
+    def generate_password_hash(self, password, rounds):
+        return self.run(hash_password, password, rounds)
+
+    def check_password_hash(self, pw_hash, password):
+        return self.run(check_password, pw_hash, password)
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,155 @@
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from simple_events.models import db
+from simple_events.models.event import Event
+from simple_events.models.job import TicketJob, COMPLETE
+from simple_events.core.minting import mint_tickets
+
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+
+class TicketJobRunner:
+    """
+    Mints the tickets of ticket jobs on a local pool of worker threads, a
+    chunk per transaction, so large events can be created without holding
+    up the request. Job state lives in the database, so jobs left
+    unfinished by a stopped process are resumed, by this process when it
+    serves its first request or by any other once their lease lapses.
+    Failed jobs are likewise retried, from where they got to, a lease
+    period after they failed, until they complete, so no event is left
+    hidden with only some of its tickets for good.
+
+    With no workers configured jobs run inline.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.workers = 0
+        self.chunk_size = 0
+        self.lease_seconds = 0
+        # Identifies this process as the holder of a job's lease
+        self.owner = uuid.uuid4().hex
+        self._executor = None
+        # Set to stop the current sweeper thread
+        self._stopped = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.shutdown()
+        self.app = app
+        self.workers = app.config['TICKET_JOB_WORKERS']
+        self.chunk_size = app.config['MINTING_CHUNK_SIZE']
+        self.lease_seconds = app.config['TICKET_JOB_LEASE_SECONDS']
+
+        if self.start not in app.before_first_request_funcs:
+            app.before_first_request(self.start)
+
+    def start(self):
+        """Resumes unfinished jobs, then keeps looking for abandoned ones."""
+        if not self.workers:
+            return
+
+        with self._lock:
+            if self._stopped is None:
+                self._stopped = threading.Event()
+                threading.Thread(target=self._sweep, args=(self._stopped,), daemon=True).start()
+
+    def shutdown(self):
+        with self._lock:
+            if self._stopped is not None:
+                self._stopped.set()
+                self._stopped = None
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def submit(self, job_id):
+        if not self.workers:
+            return self.run(job_id)
+
+        self.executor.submit(self._run_in_app_context, job_id)
+
+    def resume(self):
+        """
+        Submits every unfinished job no process holds, and every failed
+        one due a retry.
+        :return: list of the submitted job ids
+        """
+        job_ids = TicketJob.claimable_ids()
+        db.session.commit()
+
+        for job_id in job_ids:
+            self.submit(job_id)
+
+        return job_ids
+
+    def run(self, job_id):
+        """Mints the remaining tickets of a job, unless another process holds it."""
+        if not TicketJob.claim(job_id, self.owner, self.lease_seconds):
+            db.session.rollback()
+            return
+        db.session.commit()
+
+        try:
+            job = TicketJob.query.get(job_id)
+            event_id, author_id = job.event_id, job.author_id
+            remaining = job.number_of_tickets - job.number_of_minted_tickets
+
+            while remaining > 0:
+                n = min(self.chunk_size, remaining)
+
+                mint_tickets(event_id=event_id, author_id=author_id, number_of_tickets=n)
+
+                if not TicketJob.record_progress(job_id, self.owner, n, self.lease_seconds):
+                    # Taken over by another process after our lease lapsed
+                    db.session.rollback()
+                    return
+
+                db.session.commit()
+                remaining -= n
+
+            if TicketJob.finish(job_id, self.owner, COMPLETE):
+                Event.publish(event_id)
+            db.session.commit()
+
+        except Exception:
+            logger.error(f'An error occurred running ticket job {job_id}.', exc_info=True)
+            db.session.rollback()
+
+            TicketJob.fail(job_id, self.owner, 'An Internal Server Error Occurred.', self.lease_seconds)
+            db.session.commit()
+
+    def _run_in_app_context(self, job_id):
+        with self.app.app_context():
+            try:
+                self.run(job_id)
+            finally:
+                db.session.remove()
+
+    def _sweep(self, stopped):
+        while not stopped.is_set():
+            try:
+                with self.app.app_context():
+                    try:
+                        self.resume()
+                    finally:
+                        db.session.remove()
+            except Exception:
+                logger.error('An error occurred resuming ticket jobs.', exc_info=True)
+
+            stopped.wait(self.lease_seconds)
+
+
+ticket_jobs = TicketJobRunner()
@@ -0,0 +1,336 @@
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime
+
+from simple_events.models import db
+from simple_events.models.event import Ticket, INVALID, REDEEMED, ALREADY_REDEEMED
+
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+# Suffix of the file holding the offset of the journal applied to the database
+CHECKPOINT_SUFFIX = '.applied'
+
+# Suffix of the journal being rotated in, before it replaces the current one
+ROTATING_SUFFIX = '.tmp'
+
+
+def format_entry(guid, redeemed_on_utc):
+    """:return: bytes, a journal line of when the ticket was redeemed and its guid"""
+    return f'{redeemed_on_utc.isoformat(timespec="microseconds")}Z {uuid.UUID(bytes=guid)}\n'.encode()
+
+
+def parse_entry(line):
+    """:return: tuple of the guid bytes and redemption time of a journal line, or None if it isn't one"""
+    try:
+        redeemed_on_utc, ticket_identifier = line.decode().split()
+        return uuid.UUID(ticket_identifier).bytes, datetime.fromisoformat(redeemed_on_utc.rstrip('Z'))
+    except (UnicodeDecodeError, ValueError):
+        return None
+
+
+class RedemptionJournal:
+    """
+    Redeems tickets by appending them to a local journal file, answering
+    scans as soon as their entries are on disk rather than once committed
+    to the database. Appends are written by the request, and the threads
+    waiting on the disk share each fsync. A background thread applies the
+    journal to the ticket table, recording how far it got in a checkpoint
+    file beside the journal. Applying is idempotent, so on starting, the
+    entries beyond the checkpoint, left by a crash, are applied before
+    any scan is taken.
+
+    Once the applied part of the journal reaches rotate_bytes, it's kept
+    beside the journal under the time it was rotated, and the journal
+    starts again from the entries yet to be applied, so starting never
+    reads more than that.
+
+    Every guid yet to be applied is held in memory, and those applied are
+    redeemed in the database, so duplicate scans are detected exactly, even
+    before the database has caught up. That makes the journal fit for one
+    process taking the scans, which any others must not redeem alongside.
+    Each line is the time a ticket was redeemed and its identifier, so the
+    journal and those rotated out double as an audit trail.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.path = None
+        self.apply_seconds = 0
+        self.apply_batch_size = 0
+        self.rotate_bytes = 0
+        self._file = None
+        self._started = False
+        # Guids in the journal yet to be applied
+        self._redeemed = set()
+        # Moved whenever applied guids are dropped from memory
+        self._trimmed = 0
+        # Byte offsets of the journal written, on disk, and in the database
+        self._written = 0
+        self._synced = 0
+        self._applied = 0
+        self._thread = None
+        # Set to stop the current applier thread
+        self._stopped = None
+        # Held to start or stop
+        self._start_lock = threading.Lock()
+        # Held to append
+        self._lock = threading.Lock()
+        # Held to fsync, so threads queue up behind the one syncing
+        self._sync_lock = threading.Lock()
+        # Held to apply, by the applier or a replay
+        self._apply_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.shutdown()
+        self.app = app
+        self.path = app.config['REDEMPTION_JOURNAL_FILE']
+        self.apply_seconds = app.config['REDEMPTION_JOURNAL_APPLY_MS'] / 1000
+        self.apply_batch_size = app.config['REDEMPTION_JOURNAL_APPLY_BATCH_SIZE']
+        self.rotate_bytes = app.config['REDEMPTION_JOURNAL_ROTATE_BYTES']
+
+        if self.start not in app.before_first_request_funcs:
+            app.before_first_request(self.start)
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    @property
+    def checkpoint_path(self):
+        return self.path + CHECKPOINT_SUFFIX
+
+    def start(self):
+        """Opens the journal, applies what the database is missing, then starts the applier."""
+        if not self.enabled or self._started:
+            return
+
+        with self._start_lock:
+            if self._started:
+                return
+
+            self._open()
+            self.apply()
+
+            self._stopped = threading.Event()
+            self._thread = threading.Thread(target=self._apply_periodically, args=(self._stopped,), daemon=True)
+            self._thread.start()
+            self._started = True
+
+    def shutdown(self):
+        """Stops the applier, once it has applied the journal, and closes it."""
+        with self._start_lock:
+            stopped, thread = self._stopped, self._thread
+            self._stopped = self._thread = None
+
+            if stopped is not None:
+                stopped.set()
+                thread.join()
+
+            with self._lock:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._started = False
+                self._redeemed = set()
+                self._written = self._synced = self._applied = 0
+
+    def _open(self):
+        self._file = open(self.path, 'a+b')
+        self._file.seek(0)
+        data = self._file.read()
+
+        # A line cut short by a crash was never acknowledged
+        end = data.rfind(b'\n') + 1
+        if end < len(data):
+            logger.warning(f'Dropping {len(data) - end} bytes of an incomplete entry from {self.path}.')
+            self._file.truncate(end)
+
+        self._written = self._synced = end
+
+        try:
+            with open(self.checkpoint_path) as checkpoint:
+                self._applied = min(int(checkpoint.read()), end)
+        except (FileNotFoundError, ValueError):
+            self._applied = 0
+
+        lines = data[self._applied:end].splitlines()
+        self._redeemed = {entry[0] for entry in map(parse_entry, lines) if entry is not None}
+
+    def known_redeemed(self, guids):
+        """:return: list of the guids redeemed through the journal"""
+        if not self.enabled:
+            return []
+
+        self.start()
+        return [guid for guid in guids if guid in self._redeemed]
+
+    def redeem(self, guids):
+        """
+        Redeems tickets, returning once their entries are on disk. Whether
+        each ticket exists and was already redeemed is read from the
+        database, then settled against the journal.
+        :return: dict of guid to one of REDEEMED, ALREADY_REDEEMED or INVALID
+        """
+        self.start()
+
+        while True:
+            trimmed = self._trimmed
+            states = Ticket.status_many(guids)
+            redeemed_on_utc = datetime.utcnow()
+
+            self._lock.acquire()
+            # Guids applied since their states were read are no longer held
+            # in memory, but may not have been redeemed when they were read
+            if self._trimmed == trimmed:
+                break
+            self._lock.release()
+
+        outcomes = {}
+        entries = []
+        try:
+            for guid, state in states.items():
+                if state == INVALID:
+                    outcomes[guid] = INVALID
+                elif state == REDEEMED or guid in self._redeemed:
+                    outcomes[guid] = ALREADY_REDEEMED
+                else:
+                    outcomes[guid] = REDEEMED
+                    self._redeemed.add(guid)
+                    entries.append(format_entry(guid, redeemed_on_utc))
+
+            if entries:
+                self._file.write(b''.join(entries))
+                self._written = self._file.tell()
+            written = self._written
+        finally:
+            self._lock.release()
+
+        if entries:
+            try:
+                self._sync(written)
+            except Exception:
+                # Not acknowledged, so may be scanned again
+                with self._lock:
+                    self._redeemed.difference_update(
+                        guid for guid, outcome in outcomes.items() if outcome == REDEEMED)
+                raise
+
+        return outcomes
+
+    def _sync(self, offset):
+        """Waits until the journal is on disk up to offset."""
+        with self._sync_lock:
+            # Synced along with an earlier thread's entries
+            if self._synced >= offset:
+                return
+
+            with self._lock:
+                self._file.flush()
+                written = self._written
+
+            os.fsync(self._file.fileno())
+            self._synced = written
+
+    def apply(self):
+        """
+        Applies the journal entries on disk to the ticket table, dropping
+        their guids from memory, and rotates the journal once the applied
+        part has reached rotate_bytes
+        :return: integer, the number of entries applied
+        """
+        with self._apply_lock:
+            with open(self.path, 'rb') as journal:
+                journal.seek(self._applied)
+                data = journal.read(self._synced - self._applied)
+
+            lines = data.splitlines(keepends=True)
+            for start in range(0, len(lines), self.apply_batch_size):
+                batch = lines[start:start + self.apply_batch_size]
+                entries = dict(entry for entry in map(parse_entry, batch) if entry is not None)
+
+                if entries:
+                    outcomes = Ticket.redeem_many(entries)
+                    # Timed by when they were scanned, not applied
+                    Ticket.set_redemption_times({
+                        guid: redeemed_on_utc for guid, redeemed_on_utc in entries.items()
+                        if outcomes[guid] == REDEEMED
+                    })
+                    db.session.commit()
+
+                    with self._lock:
+                        self._redeemed.difference_update(entries)
+                        self._trimmed += 1
+
+                self._applied += sum(map(len, batch))
+                self._checkpoint()
+
+            if self.rotate_bytes and self._applied >= self.rotate_bytes:
+                self._rotate()
+
+            return len(lines)
+
+    def _rotate(self):
+        """
+        Keeps the applied part of the journal beside it, and starts it
+        again from the entries yet to be applied. Until the new journal
+        replaces it, a crash leaves the whole of the old one to be applied
+        again, as the checkpoint is reset first.
+        """
+        rotated_path = f'{self.path}.{datetime.utcnow():%Y%m%dT%H%M%S%f}'
+        rotating_path = self.path + ROTATING_SUFFIX
+
+        with self._sync_lock, self._lock:
+            self._file.flush()
+            with open(self.path, 'rb') as journal:
+                journal.seek(self._applied)
+                pending = journal.read(self._written - self._applied)
+
+            with open(rotating_path, 'wb') as rotating:
+                rotating.write(pending)
+                rotating.flush()
+                os.fsync(rotating.fileno())
+
+            self._applied = 0
+            self._checkpoint()
+
+            os.link(self.path, rotated_path)
+            os.replace(rotating_path, self.path)
+
+            self._file.close()
+            self._file = open(self.path, 'a+b')
+            self._file.seek(0, os.SEEK_END)
+            self._written = self._synced = len(pending)
+
+    def _checkpoint(self):
+        temporary_path = self.checkpoint_path + '.tmp'
+        with open(temporary_path, 'w') as checkpoint:
+            checkpoint.write(str(self._applied))
+        os.replace(temporary_path, self.checkpoint_path)
+
+    def _apply_periodically(self, stopped):
+        while True:
+            is_stopping = stopped.wait(self.apply_seconds)
+
+            try:
+                with self.app.app_context():
+                    try:
+                        self.apply()
+                    finally:
+                        db.session.remove()
+            except Exception:
+                logger.error('An error occurred applying the redemption journal.', exc_info=True)
+
+            if is_stopping:
+                return
+
+    @property
+    def backlog(self):
+        """Bytes of the journal on disk but yet to be applied to the database."""
+        return self._synced - self._applied
+
+
+redemption_journal = RedemptionJournal()
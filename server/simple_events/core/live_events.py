@@ -0,0 +1,297 @@
+import logging
+import threading
+import time
+
+import numpy as np
+
+from simple_events.models import db
+from simple_events.models.event import Event, Ticket, REDEEMED, ALREADY_REDEEMED, UNREDEEMED
+from simple_events.core.generations import Generation
+from simple_events.core.virtual_tickets import derive_guids
+
+
+# Get logger
+logger = logging.getLogger(__name__)
+
+GUID_SIZE = 16
+
+# Rows read at a time while loading the tickets of an event
+LOAD_BATCH_SIZE = 10000
+
+
+class LiveEvent:
+    """
+    The tickets of a live event, as its guids sorted and packed end to end
+    in one bytes object, with a bitmap of which are redeemed, indexed by a
+    guid's position. That is 16 bytes and 1 bit per ticket, about 16.1 MB
+    per million tickets.
+    """
+
+    def __init__(self, event_id, guids, redeemed_guids):
+        self.event_id = event_id
+
+        # Packed as they're read then sorted in place, as 16 byte strings,
+        # rather than held as a list of bytes objects while sorting
+        packed = bytearray()
+        for guid in guids:
+            packed += guid
+        np.frombuffer(packed, dtype=f'S{GUID_SIZE}').sort()
+
+        self.size = len(packed) // GUID_SIZE
+        self.guids = bytes(packed)
+
+        self.redeemed = bytearray((self.size + 7) // 8)
+        self.number_of_redeemed_tickets = 0
+        self.refreshed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+        for guid in redeemed_guids:
+            index = self.index(guid)
+            if index is not None:
+                self.set_redeemed(index)
+
+    @property
+    def nbytes(self):
+        return len(self.guids) + len(self.redeemed)
+
+    def index(self, guid):
+        """:return: the position of a guid, or None if it isn't the event's"""
+        guids = self.guids
+        low, high = 0, self.size
+
+        while low < high:
+            middle = (low + high) // 2
+            offset = middle * GUID_SIZE
+            candidate = guids[offset:offset + GUID_SIZE]
+
+            if candidate < guid:
+                low = middle + 1
+            elif candidate > guid:
+                high = middle
+            else:
+                return middle
+
+        return None
+
+    def is_redeemed(self, index):
+        return bool(self.redeemed[index >> 3] & (1 << (index & 7)))
+
+    def set_redeemed(self, index):
+        with self._lock:
+            if not self.is_redeemed(index):
+                self.redeemed[index >> 3] |= 1 << (index & 7)
+                self.number_of_redeemed_tickets += 1
+
+
+class LiveEventCache:
+    """
+    Holds the tickets of events marked live in memory, so the scans of an
+    event at its doors are answered without the database where they can
+    be. Tickets seen redeemed are known to stay so, answering repeated
+    scans and status checks from memory. Redemptions still go to the
+    database, which settles races, and are written through to the bitmap
+    once committed.
+
+    Other processes redeem tickets too, so before telling a ticket is
+    unredeemed an event last refreshed over refresh_seconds ago has its
+    redeemed counter compared with the bitmap's, re-reading the redeemed
+    tickets if they differ. Processes on the same node share a generation
+    file, bumped whenever an event is marked live, or not, or has tickets
+    added, which has every process reload its live events.
+
+    Guids of no live event may be of any other, so are left to the database.
+    So are the tickets of events being loaded by another thread, as scans
+    don't wait for a load to finish.
+    """
+
+    def __init__(self):
+        self.max_tickets = 0
+        self.refresh_seconds = 0
+        self.generation = Generation()
+        self._lock = threading.Lock()
+        # Held while loading, so concurrent requests don't load events twice
+        self._sync_lock = threading.Lock()
+        self.clear()
+
+    def init_app(self, app):
+        self.max_tickets = app.config['LIVE_EVENT_MAX_TICKETS']
+        self.refresh_seconds = app.config['LIVE_EVENT_REFRESH_SECONDS']
+        self.generation = Generation(app.config['LIVE_EVENT_GENERATION_FILE'])
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            # event id: LiveEvent
+            self._events = {}
+            self._synced_generation = None
+            self._synced = False
+
+    @property
+    def number_of_tickets(self):
+        return sum(live_event.size for live_event in self._events.values())
+
+    @property
+    def nbytes(self):
+        return sum(live_event.nbytes for live_event in self._events.values())
+
+    def has_room_for(self, event, additional_number_of_tickets=0):
+        """Whether an event's tickets, with any being added, fit in the bound on live tickets."""
+        live_event = self._events.get(event.id)
+        others = self.number_of_tickets - (live_event.size if live_event else 0)
+        return others + event.number_of_tickets + additional_number_of_tickets <= self.max_tickets
+
+    def changed(self):
+        """
+        Signals every process to reload its live events, after the change
+        has been committed.
+        """
+        with self._lock:
+            self._synced = False
+        self.generation.bump()
+
+    def sync(self, wait=True):
+        """
+        Loads newly live events and drops those no longer live. Live events
+        beyond the bound on live tickets, which grew by tickets added since
+        they were marked, are left to the database.
+        :param wait: boolean, whether to wait for a sync another thread is
+            making, rather than carry on with the events as they are
+        """
+        if self._synced and self.generation.current() == self._synced_generation:
+            return
+
+        if not self._sync_lock.acquire(blocking=wait):
+            return
+
+        try:
+            generation = self.generation.current()
+            if self._synced and generation == self._synced_generation:
+                return
+
+            live = db.session.query(Event.id, Event.number_of_tickets)\
+                .filter(Event.is_live == True)\
+                .order_by(Event.id)\
+                .all()
+
+            events = {}
+            number_of_tickets = 0
+            for event_id, event_number_of_tickets in live:
+                number_of_tickets += event_number_of_tickets
+                if number_of_tickets > self.max_tickets:
+                    logger.warning(f'Live event {event_id} is beyond the bound on live tickets, it is not held.')
+                    number_of_tickets -= event_number_of_tickets
+                    continue
+
+                live_event = self._events.get(event_id)
+
+                # Reloaded when tickets were added
+                if live_event is None or live_event.size != event_number_of_tickets:
+                    live_event = load(event_id)
+
+                events[event_id] = live_event
+
+            with self._lock:
+                self._events = events
+                self._synced_generation = generation
+                self._synced = True
+        finally:
+            self._sync_lock.release()
+
+    def find(self, guid):
+        """:return: tuple of the LiveEvent and position of a guid, or None"""
+        for live_event in self._events.values():
+            index = live_event.index(guid)
+            if index is not None:
+                return live_event, index
+        return None
+
+    def known_redeemed(self, guids):
+        """
+        :return: set of the guids known to be redeemed, the rest are left
+            to the database
+        """
+        self.sync(wait=False)
+
+        redeemed = set()
+        for guid in guids:
+            found = self.find(guid)
+            if found and found[0].is_redeemed(found[1]):
+                redeemed.add(guid)
+        return redeemed
+
+    def record(self, outcomes):
+        """
+        Writes committed redemptions through to memory
+        :param outcomes: dict of guid to the outcome of redeeming it
+        """
+        for guid, outcome in outcomes.items():
+            if outcome in (REDEEMED, ALREADY_REDEEMED):
+                found = self.find(guid)
+                if found:
+                    found[0].set_redeemed(found[1])
+
+    def states(self, guids):
+        """
+        :return: dict of the guids of live events' tickets to REDEEMED or
+            UNREDEEMED, the rest are left to the database
+        """
+        self.sync(wait=False)
+
+        states = {}
+        for guid in guids:
+            found = self.find(guid)
+            if not found:
+                continue
+
+            live_event, index = found
+            if not live_event.is_redeemed(index):
+                self.refresh(live_event)
+
+            states[guid] = REDEEMED if live_event.is_redeemed(index) else UNREDEEMED
+        return states
+
+    def refresh(self, live_event):
+        """Catches up with the redemptions of other processes, at most every refresh_seconds."""
+        if time.monotonic() - live_event.refreshed_at < self.refresh_seconds:
+            return
+
+        number_of_redeemed_tickets = db.session.query(Event.number_of_redeemed_tickets)\
+            .filter(Event.id == live_event.event_id)\
+            .scalar()
+
+        if number_of_redeemed_tickets != live_event.number_of_redeemed_tickets:
+            for guid in redeemed_ticket_guids(live_event.event_id):
+                index = live_event.index(guid)
+                if index is not None:
+                    live_event.set_redeemed(index)
+
+        live_event.refreshed_at = time.monotonic()
+
+
+def redeemed_ticket_guids(event_id):
+    query = db.session.query(Ticket.guid)\
+        .filter(db.and_(
+            Ticket.event_id == event_id,
+            Ticket.is_redeemed == True
+        ))\
+        .yield_per(LOAD_BATCH_SIZE)
+
+    return (row.guid for row in query)
+
+
+def load(event_id):
+    """Reads the tickets of an event into a LiveEvent."""
+    event = Event.query.get(event_id)
+
+    if event.is_virtual:
+        guids = derive_guids(event.id, event.ticket_seed, event.number_of_tickets)
+    else:
+        query = db.session.query(Ticket.guid)\
+            .filter(Ticket.event_id == event.id)\
+            .yield_per(LOAD_BATCH_SIZE)
+        guids = (row.guid for row in query)
+
+    return LiveEvent(event.id, guids, redeemed_ticket_guids(event.id))
+
+
+live_events = LiveEventCache()
@@ -0,0 +1,118 @@
+import io
+import os
+import uuid
+from datetime import datetime
+
+from simple_events.models import db
+from simple_events.models.event import Event, Ticket
+from simple_events.core.ticket_filter import ticket_filter
+
+
+# Number of tickets generated and inserted per executemany call
+MINTING_BLOCK_SIZE = 10000
+
+# Translation tables which stamp the uuid4 version and variant bits onto
+# random bytes, so a whole block of GUIDs can be fixed up at C speed.
+_VERSION_TABLE = bytes((b & 0x0f) | 0x40 for b in range(256))
+_VARIANT_TABLE = bytes((b & 0x3f) | 0x80 for b in range(256))
+
+
+def generate_guids(n):
+    """
+    Generates a block of random version 4 GUIDs
+    :param n: number of GUIDs to generate
+    :return: list of 16 byte GUIDs
+    """
+    block = bytearray(os.urandom(16 * n))
+    block[6::16] = block[6::16].translate(_VERSION_TABLE)
+    block[8::16] = block[8::16].translate(_VARIANT_TABLE)
+
+    block = bytes(block)
+    return [block[i:i + 16] for i in range(0, 16 * n, 16)]
+
+
+def insert_tickets(event_id, author_id, guids, date_created_utc):
+    """Inserts a block of tickets with a single executemany."""
+    rows = [
+        {
+            'event_id': event_id,
+            'guid': guid,
+            'is_redeemed': False,
+            'date_created_utc': date_created_utc,
+            'author_id': author_id
+        }
+        for guid in guids
+    ]
+
+    db.session.execute(Ticket.__table__.insert(), rows)
+
+
+def copy_tickets(event_id, author_id, guids, date_created_utc):
+    """
+    Streams a block of tickets into PostgreSQL with COPY, on the session's
+    own connection so it joins the current transaction.
+    """
+    # Rows in COPY's text format, where \N is NULL
+    author = '\\N' if author_id is None else author_id
+    prefix = f'{event_id}\t'
+    suffix = f'\tf\t{date_created_utc.isoformat()}\t{author}\n'
+
+    data = io.StringIO(''.join(prefix + str(uuid.UUID(bytes=guid)) + suffix for guid in guids))
+
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            'COPY ticket (event_id, guid, is_redeemed, date_created_utc, author_id) FROM STDIN',
+            data)
+    finally:
+        cursor.close()
+
+
+def mint_tickets(event_id, author_id, number_of_tickets, block_size=MINTING_BLOCK_SIZE):
+    """
+    Inserts tickets for an event using set-based inserts, or COPY on
+    PostgreSQL, bypassing the ORM unit of work, and increments the event's
+    ticket counter to match. Runs within the current session's transaction,
+    so the caller is responsible for committing.
+    :return: integer, the number of tickets minted
+    """
+    if db.session.connection().dialect.name == 'postgresql':
+        insert = copy_tickets
+    else:
+        insert = insert_tickets
+
+    date_created_utc = datetime.utcnow()
+
+    minted = 0
+    while minted < number_of_tickets:
+        n = min(block_size, number_of_tickets - minted)
+        guids = generate_guids(n)
+        insert(event_id, author_id, guids, date_created_utc)
+        ticket_filter.minted(guids)
+        minted += n
+
+    Event.increment_counters(event_id, number_of_tickets=minted)
+
+    return minted
+
+
+def mint_tickets_in_chunks(event_id, author_id, number_of_tickets, chunk_size, additional=False):
+    """
+    Mints tickets for an event, committing every chunk_size tickets, so the
+    database write lock is only held for one chunk at a time and other
+    writers, such as redemptions, can go in between.
+    :param additional: boolean, whether to count the tickets as added to the
+        event since it was created, with each chunk, so the count matches
+        the tickets committed should minting fail part way
+    :return: integer, the number of tickets minted
+    """
+    minted = 0
+    while minted < number_of_tickets:
+        n = min(chunk_size, number_of_tickets - minted)
+        mint_tickets(event_id=event_id, author_id=author_id, number_of_tickets=n)
+        if additional:
+            Event.increment_additional_tickets(event_id, n)
+        db.session.commit()
+        minted += n
+
+    return minted
@@ -0,0 +1,339 @@
+import hashlib
+import math
+import os
+import struct
+import threading
+import time
+
+from sqlalchemy import event as sa_event
+
+from simple_events.models import db
+from simple_events.models.event import Event, EventVersion, Ticket
+from simple_events.core.generations import Generation
+from simple_events.core.virtual_tickets import parse_guid
+
+
+# Key of the session's info marking that its transaction minted tickets
+MINTED = 'ticket_filter_minted'
+
+# Rows of tickets read from the database at a time
+READ_BATCH_SIZE = 10000
+
+# Each position is 8 bytes of one BLAKE2b digest, at most 64 bytes long
+MAX_HASHES = 8
+
+
+class BloomFilter:
+    """
+    A Bloom filter over byte strings, sized for a capacity and false
+    positive rate. Positions are derived from a keyed BLAKE2b of the item,
+    the key random per filter, so items can't be crafted to collide.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = min(MAX_HASHES, max(1, round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        self._key = os.urandom(16)
+        self._digest = struct.Struct(f'<{self.hashes}Q')
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item, digest_size=self._digest.size, key=self._key).digest()
+        return [h % self.size for h in self._digest.unpack(digest)]
+
+    def add(self, item):
+        self.update((item,))
+
+    def update(self, items):
+        # Inlined, as the whole ticket table is added when the filter is built
+        bits, size, key, unpack = self.bits, self.size, self._key, self._digest.unpack
+        digest_size = self._digest.size
+        blake2b = hashlib.blake2b
+
+        count = 0
+        for item in items:
+            for h in unpack(blake2b(item, digest_size=digest_size, key=key).digest()):
+                position = h % size
+                bits[position >> 3] |= 1 << (position & 7)
+            count += 1
+
+        self.count += count
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    @property
+    def estimated_false_positive_rate(self):
+        """The chance an absent item hits only set bits, from the share of bits set."""
+        fill = bin(int.from_bytes(self.bits, 'little')).count('1') / self.size
+        return fill ** self.hashes
+
+
+class TicketFilter:
+    """
+    Holds a Bloom filter of every minted ticket's guid, so identifiers of
+    no ticket are turned away without looking them up. Tickets minted by
+    this process are added as they're minted. Those minted by any other
+    are added from the database once the version of the minted tickets,
+    which every transaction minting tickets moves in commit order, has
+    moved, which is checked every sync_seconds. Processes on the same node share a generation file,
+    bumped whenever a transaction which minted tickets commits, on which
+    the others check at once.
+
+    A guid the filter misses is only turned away once the database shows
+    no tickets were minted since the filter was last synced, which is
+    checked whenever one is missed. Otherwise it's looked up, and the
+    filter catches up.
+
+    Only tickets with ids above the highest read are read, unless an
+    event's counter shows tickets committed out of id order, when that
+    event's tickets are read again. Requests don't wait for another
+    thread's build or catch up: until the filter is built, every guid is
+    let through.
+
+    The filter is sized for the larger of the configured capacity and
+    twice the tickets there are when it's built, and is rebuilt when
+    outgrown. Virtual tickets, which have no rows until redeemed, are
+    always let through.
+    """
+
+    def __init__(self):
+        self.capacity = 0
+        self.error_rate = 0
+        self.sync_seconds = 0
+        self.generation = Generation()
+        self._lock = threading.Lock()
+        # Held while building or catching up, so it's done once
+        self._sync_lock = threading.Lock()
+        self.clear()
+
+    def init_app(self, app):
+        self.capacity = app.config['TICKET_FILTER_CAPACITY']
+        self.error_rate = app.config['TICKET_FILTER_ERROR_RATE']
+        self.sync_seconds = app.config['TICKET_FILTER_SYNC_SECONDS']
+        self.generation = Generation(app.config['TICKET_FILTER_GENERATION_FILE'])
+        self.clear()
+
+        if not sa_event.contains(db.session, 'after_commit', signal_minted):
+            sa_event.listen(db.session, 'after_commit', signal_minted)
+
+        if self.sync not in app.before_first_request_funcs:
+            app.before_first_request(self.sync)
+
+    def clear(self):
+        with self._lock:
+            self._filter = None
+            # The filter being built, which is added to alongside the current one
+            self._building = None
+            # event id: number of its tickets read from the database, at least
+            self._counts = {}
+            # Highest ticket id read from the database
+            self._last_id = 0
+            # The version of the minted tickets the filter holds every ticket of
+            self._tickets_version = None
+            self._synced_generation = None
+            self._synced_at = None
+            self.checked = 0
+            self.rejected = 0
+            self.false_positives = 0
+
+    @property
+    def enabled(self):
+        return self.capacity > 0
+
+    def sync(self, wait=True, force=False):
+        """
+        Builds the filter, or adds the tickets other processes minted.
+        :param wait: boolean, whether to wait for a sync another thread is
+            making, rather than carry on with the filter as it is
+        :param force: boolean, whether to check the database even if it was
+            checked within sync_seconds and no other process signalled
+        """
+        if not self.enabled:
+            return
+        if not force and self._filter is not None \
+                and time.monotonic() - self._synced_at < self.sync_seconds \
+                and self.generation.current() == self._synced_generation:
+            return
+
+        if not self._sync_lock.acquire(blocking=wait):
+            return
+
+        try:
+            generation = self.generation.current()
+
+            # Checked before the tickets are read, so it's never ahead of them
+            tickets_version = EventVersion.current_tickets()
+
+            if self._filter is None:
+                self.build()
+            elif tickets_version != self._tickets_version:
+                self.catch_up()
+
+            self._tickets_version = tickets_version
+            self._synced_generation = generation
+            self._synced_at = time.monotonic()
+        finally:
+            self._sync_lock.release()
+
+    def ticket_counts(self):
+        """:return: dict of the id of every event with minted tickets to their number"""
+        return dict(
+            db.session.query(Event.id, Event.number_of_tickets)
+                .filter(Event.ticket_seed == None)
+                .all())
+
+    def build(self):
+        # Counted before the tickets are read, so the counts are never ahead
+        counts = self.ticket_counts()
+        bloom = BloomFilter(max(self.capacity, 2 * sum(counts.values())), self.error_rate)
+
+        with self._lock:
+            self._building = bloom
+
+        last_id = 0
+        rows = db.session.execute(db.select([Ticket.id, Ticket.guid]))
+        while True:
+            batch = rows.fetchmany(READ_BATCH_SIZE)
+            if not batch:
+                break
+            bloom.update(row[1] for row in batch)
+            last_id = max(last_id, max(row[0] for row in batch))
+
+        with self._lock:
+            self._filter = bloom
+            self._building = None
+            self._counts = counts
+            self._last_id = last_id
+
+    def catch_up(self):
+        counts = self.ticket_counts()
+
+        if sum(counts.values()) > self._filter.capacity:
+            return self.build()
+
+        rows = db.session.execute(
+            db.select([Ticket.id, Ticket.event_id, Ticket.guid])
+                .where(Ticket.id > self._last_id))
+        while True:
+            batch = rows.fetchmany(READ_BATCH_SIZE)
+            if not batch:
+                break
+
+            with self._lock:
+                self._filter.update(row[2] for row in batch)
+
+            for _, event_id, _ in batch:
+                self._counts[event_id] = self._counts.get(event_id, 0) + 1
+            self._last_id = max(self._last_id, max(row[0] for row in batch))
+
+        # Tickets committed after others with higher ids, by concurrent
+        # transactions, are below the highest id read, so are read again
+        for event_id, number_of_tickets in counts.items():
+            if self._counts.get(event_id, 0) >= number_of_tickets:
+                continue
+
+            guids = [row.guid for row in db.session.query(Ticket.guid).filter(Ticket.event_id == event_id)]
+            with self._lock:
+                self._filter.update(guids)
+            self._counts[event_id] = len(guids)
+
+    def minted(self, guids):
+        """
+        Adds the guids of tickets being minted by the current transaction,
+        and marks it to signal the other processes once committed.
+        """
+        if not self.enabled:
+            return
+
+        db.session.info[MINTED] = True
+
+        with self._lock:
+            for bloom in (self._filter, self._building):
+                if bloom is not None:
+                    bloom.update(guids)
+
+    def screen(self, guids):
+        """
+        Splits guids into those which may be of a ticket, and those which
+        are certainly not. Those the filter misses are only certainly not
+        if no tickets were minted since it was synced, or else are passed.
+        :return: tuple of the lists of passed and rejected guids
+        """
+        if not self.enabled:
+            return list(guids), []
+
+        self.sync(wait=False)
+        # Read before the filter, which holds every ticket of at least this version
+        tickets_version = self._tickets_version
+        bloom = self._filter
+
+        # Being built by another thread
+        if bloom is None:
+            return list(guids), []
+
+        passed, rejected = [], []
+        checked = 0
+        for guid in guids:
+            if parse_guid(guid):
+                passed.append(guid)
+                continue
+
+            checked += 1
+            (passed if guid in bloom else rejected).append(guid)
+
+        if rejected and EventVersion.current_tickets() != tickets_version:
+            # Perhaps minted since, so they're looked up while it catches up
+            self.sync(wait=False, force=True)
+            checked -= len(rejected)
+            passed, rejected = list(guids), []
+
+        with self._lock:
+            self.checked += checked
+            self.rejected += len(rejected)
+
+        return passed, rejected
+
+    def record_false_positives(self, guids):
+        """Counts guids the filter holds which the database then found no ticket for."""
+        if not self.enabled:
+            return
+
+        bloom = self._filter
+        if bloom is None:
+            return
+
+        number = sum(1 for guid in guids if not parse_guid(guid) and guid in bloom)
+        with self._lock:
+            self.false_positives += number
+
+    def metrics(self):
+        with self._lock:
+            checked, rejected, false_positives = self.checked, self.rejected, self.false_positives
+            bloom = self._filter
+
+        passed = checked - rejected
+        # Of the guids with no ticket, those the filter failed to reject
+        absent = rejected + false_positives
+
+        return {
+            'enabled': self.enabled,
+            'number_of_insertions': bloom.count if bloom else 0,
+            'size_in_bytes': len(bloom.bits) if bloom else 0,
+            'checked': checked,
+            'rejected': rejected,
+            'hit_rate': passed / checked if checked else None,
+            'false_positives': false_positives,
+            'false_positive_rate': false_positives / absent if absent else None,
+            'estimated_false_positive_rate': bloom.estimated_false_positive_rate if bloom else None,
+        }
+
+
+def signal_minted(session):
+    if session.info.pop(MINTED, False):
+        ticket_filter.generation.bump()
+
+
+ticket_filter = TicketFilter()
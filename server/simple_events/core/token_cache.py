@@ -0,0 +1,137 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from simple_events.core.generations import Generation
+
+
+# Tokens blacklisted this long before the last sync are re-read on the
+# next one, in case their transactions committed out of order.
+BLACKLIST_SYNC_MARGIN_SECONDS = 60
+
+
+class TokenCache:
+    """
+    Caches verified auth tokens until they expire, and holds the token
+    blacklist in memory, so checking a valid, non-revoked token needs no
+    signature verification or database query.
+
+    Processes on the same node share a generation file, bumped whenever a
+    token is blacklisted. A process re-reads recently blacklisted tokens
+    from the database whenever it sees the generation change, and at least
+    every sync_seconds, which bounds how long a token revoked by a process
+    on another node keeps working.
+    """
+
+    def __init__(self):
+        self.max_size = 0
+        self.expiry_seconds = 0
+        self.sync_seconds = 0
+        self.generation = Generation()
+        self._lock = threading.Lock()
+        self.clear()
+
+    def init_app(self, app):
+        self.max_size = app.config['TOKEN_CACHE_SIZE']
+        self.expiry_seconds = app.config['AUTH_TOKEN_EXPIRY_SECONDS']
+        self.sync_seconds = app.config['TOKEN_BLACKLIST_SYNC_SECONDS']
+        self.generation = Generation(app.config['TOKEN_BLACKLIST_GENERATION_FILE'])
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            # token: (user id, expiry timestamp), least recently used first
+            self._verified = OrderedDict()
+            # token: expiry timestamp
+            self._blacklist = {}
+            self._synced_generation = None
+            self._synced_until = None
+            self._synced_at = None
+
+    def get(self, auth_token):
+        """
+        :return: the user id of a verified, unexpired token, else None
+        """
+        with self._lock:
+            entry = self._verified.get(auth_token)
+
+            if entry is None:
+                return None
+
+            if entry[1] <= time.time():
+                del self._verified[auth_token]
+                return None
+
+            self._verified.move_to_end(auth_token)
+            return entry[0]
+
+    def put(self, auth_token, user_id, expires_at):
+        if not self.max_size:
+            return
+
+        with self._lock:
+            self._verified[auth_token] = (user_id, expires_at)
+            self._verified.move_to_end(auth_token)
+
+            while len(self._verified) > self.max_size:
+                self._verified.popitem(last=False)
+
+    def is_blacklisted(self, auth_token):
+        if self._synced_until is None \
+                or time.monotonic() - self._synced_at >= self.sync_seconds \
+                or self.generation.current() != self._synced_generation:
+            self.sync_blacklist()
+
+        return auth_token in self._blacklist
+
+    def blacklist(self, auth_token):
+        """
+        Records a token as blacklisted, after it has been committed to the
+        database, and signals the other processes to sync.
+        """
+        with self._lock:
+            entry = self._verified.pop(auth_token, None)
+            expires_at = entry[1] if entry else time.time() + self.expiry_seconds
+            self._blacklist[auth_token] = expires_at
+
+        self.generation.bump()
+
+    def sync_blacklist(self):
+        """
+        Loads the blacklisted tokens which could still be unexpired on the
+        first call, and those blacklisted since the last sync after that.
+        """
+        from simple_events.models.auth import BlacklistToken
+
+        generation = self.generation.current()
+        now = datetime.utcnow()
+
+        since = now - timedelta(seconds=self.expiry_seconds)
+        if self._synced_until is not None:
+            since = max(since, self._synced_until - timedelta(seconds=BLACKLIST_SYNC_MARGIN_SECONDS))
+
+        rows = BlacklistToken.query\
+            .with_entities(BlacklistToken.token, BlacklistToken.blacklisted_on_utc)\
+            .filter(BlacklistToken.blacklisted_on_utc >= since)\
+            .all()
+
+        timestamp = time.time()
+
+        with self._lock:
+            for row in rows:
+                blacklisted_ago = (now - row.blacklisted_on_utc).total_seconds()
+                self._blacklist[row.token] = timestamp - blacklisted_ago + self.expiry_seconds
+
+            # Expired tokens are rejected before the blacklist is checked
+            self._blacklist = {
+                token: expires_at for token, expires_at in self._blacklist.items()
+                if expires_at > timestamp
+            }
+
+            self._synced_generation = generation
+            self._synced_until = now
+            self._synced_at = time.monotonic()
+
+
+token_cache = TokenCache()
@@ -13,3 +13,9 @@ def get_config():
     app_settings = get_app_settings()
     config_name = app_settings.split('.')[-1]
     return configs[config_name]
+
+
+def chunked(sequence, size):
+    """Yields successive slices of sequence of at most size items."""
+    for i in range(0, len(sequence), size):
+        yield sequence[i:i + size]
@@ -0,0 +1,52 @@
+import hmac
+import os
+
+# Virtual tickets aren't stored until redeemed, their guids are derived
+# from the event's secret seed. They are version 8 (custom) UUIDs laid out
+# as the event id, a MAC of the ticket's index under the seed, then the
+# index, each big-endian:
+#
+#   bytes 0-3    event id
+#   bytes 4-11   HMAC-SHA256(seed, index) truncated, with the UUID version
+#                and variant stamped over bytes 6 and 8
+#   bytes 12-15  ticket index
+#
+# so a guid leads straight to its event, and can only be made with the seed.
+SEED_SIZE = 32
+VERSION = 8
+
+
+def new_seed():
+    return os.urandom(SEED_SIZE)
+
+
+def derive_guid(event_id, seed, index):
+    """
+    :return: the 16 byte guid of an event's virtual ticket
+    """
+    index = index.to_bytes(4, 'big')
+    guid = bytearray(event_id.to_bytes(4, 'big') + hmac.digest(seed, index, 'sha256')[:8] + index)
+    guid[6] = (guid[6] & 0x0f) | (VERSION << 4)
+    guid[8] = (guid[8] & 0x3f) | 0x80
+    return bytes(guid)
+
+
+def derive_guids(event_id, seed, number_of_tickets):
+    """Iterates the guids of all of an event's virtual tickets, in index order."""
+    for index in range(number_of_tickets):
+        yield derive_guid(event_id, seed, index)
+
+
+def parse_guid(guid):
+    """
+    :return: tuple of the event id and ticket index of a virtual ticket
+        guid, or None if the guid isn't laid out as one
+    """
+    if len(guid) != 16 or guid[6] >> 4 != VERSION or guid[8] >> 6 != 0b10:
+        return None
+    return int.from_bytes(guid[:4], 'big'), int.from_bytes(guid[12:], 'big')
+
+
+def is_valid(guid, index, event_id, seed, number_of_tickets):
+    """Checks a parsed guid is one of the event's virtual tickets."""
+    return index < number_of_tickets and hmac.compare_digest(derive_guid(event_id, seed, index), guid)
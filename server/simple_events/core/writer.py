@@ -0,0 +1,162 @@
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+
+from simple_events.models import db
+
+
+# A write to make, fn called with args within the writer's transaction
+Intent = namedtuple('Intent', ['fn', 'args', 'future'])
+
+
+class TransactionEnded(Exception):
+    """Raised when an intent committed or rolled back a group's transaction."""
+
+
+class Writer:
+    """
+    Makes the writes of requests on a single thread, so they no longer
+    contend with each other for the database's write lock. Requests
+    submit write intents, functions making their changes within the
+    current transaction, and wait for them to be committed. The intents
+    pending when the writer is free, along with any arriving within the
+    window, up to the maximum group size, are made in one transaction and
+    committed together, so many requests share the cost of a commit.
+
+    If a group's transaction fails, each of its intents is retried in a
+    transaction of its own, so one failing intent doesn't fail the others.
+    Intents which commit or roll back themselves, as redeeming a batch of
+    tickets does when it races another process, are retried likewise.
+
+    With a maximum group size of 0 intents are made inline, and committed
+    with the request's own transaction.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.max_group_size = 0
+        self.window_seconds = 0
+        self.timeout = None
+        self.groups = 0
+        self.intents = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        # Set to stop the current writer thread
+        self._stopped = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.shutdown()
+        self.app = app
+        self.max_group_size = app.config['GROUP_COMMIT_MAX_GROUP_SIZE']
+        self.window_seconds = app.config['GROUP_COMMIT_WINDOW_MS'] / 1000
+        self.timeout = app.config['GROUP_COMMIT_TIMEOUT_SECONDS']
+        self.groups = 0
+        self.intents = 0
+
+    @property
+    def enabled(self):
+        return self.max_group_size > 0
+
+    def start(self):
+        with self._lock:
+            if self._stopped is None:
+                self._stopped = threading.Event()
+                self._thread = threading.Thread(target=self._write, args=(self._stopped,), daemon=True)
+                self._thread.start()
+
+    def shutdown(self):
+        """Stops the writer thread, once it has committed the intents already submitted."""
+        with self._lock:
+            stopped, thread = self._stopped, self._thread
+            self._stopped = self._thread = None
+
+        if stopped is not None:
+            stopped.set()
+            thread.join()
+
+    def run(self, fn, *args):
+        """
+        Makes a write and waits for it to be committed. The caller's own
+        transaction is ended first, so it can't hold up the writer.
+        :return: the return value of fn
+        """
+        if not self.enabled:
+            result = fn(*args)
+            db.session.commit()
+            return result
+
+        db.session.commit()
+        return self.submit(fn, *args).result(timeout=self.timeout)
+
+    def submit(self, fn, *args):
+        """:return: Future of the return value of fn, set once committed"""
+        self.start()
+
+        future = Future()
+        self._queue.put(Intent(fn, args, future))
+        return future
+
+    def _write(self, stopped):
+        with self.app.app_context():
+            try:
+                while not (stopped.is_set() and self._queue.empty()):
+                    group = self._gather()
+                    if group:
+                        self._commit(group)
+            finally:
+                db.session.remove()
+
+    def _gather(self):
+        """:return: list of the intents to commit together, empty if none arrived"""
+        try:
+            group = [self._queue.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.window_seconds
+        while len(group) < self.max_group_size:
+            try:
+                # Whatever is already pending is taken without waiting
+                group.append(self._queue.get(timeout=max(0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+
+        return group
+
+    def _commit(self, group):
+        try:
+            results = [self._apply(intent, grouped=len(group) > 1) for intent in group]
+            db.session.commit()
+
+        except Exception as e:
+            db.session.rollback()
+
+            if len(group) > 1:
+                for intent in group:
+                    self._commit([intent])
+            else:
+                group[0].future.set_exception(e)
+            return
+
+        self.groups += 1
+        self.intents += len(group)
+
+        for intent, result in zip(group, results):
+            intent.future.set_result(result)
+
+    def _apply(self, intent, grouped):
+        session = db.session()
+        transaction = session.transaction
+        result = intent.fn(*intent.args)
+
+        # The work of the intents before it would have gone with it
+        if grouped and session.transaction is not transaction:
+            raise TransactionEnded()
+
+        return result
+
+
+writer = Writer()
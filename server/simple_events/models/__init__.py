@@ -1,6 +1,7 @@
 from simple_events.models.db import db, bcrypt
 from simple_events.models.auth import User, BlacklistToken
-from simple_events.models.event import Event, Ticket
+from simple_events.models.event import Event, EventVersion, Ticket
+from simple_events.models.job import TicketJob
 
 # Imports into here so that imports of all the models are made
 # before db is imported into app.py and migration initialised.
\ No newline at end of file
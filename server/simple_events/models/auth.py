@@ -1,7 +1,9 @@
 import jwt
 import datetime
 
-from simple_events.models.db import db, bcrypt
+from simple_events.models.db import db
+from simple_events.core.token_cache import token_cache
+from simple_events.core.hashing import password_hasher
 
 
 class User(db.Model):
@@ -17,8 +19,8 @@ class User(db.Model):
         from simple_events.app import app
 
         self.username = username
-        self.password = bcrypt.generate_password_hash(
-            password, app.config['BCRYPT_LOG_ROUNDS']).decode()
+        self.password = password_hasher.generate_password_hash(
+            password, app.config['BCRYPT_LOG_ROUNDS'])
         self.registered_on_utc = datetime.datetime.utcnow()
 
     def encode_auth_token(self, user_id):
@@ -46,18 +48,23 @@ class User(db.Model):
     @staticmethod
     def decode_auth_token(auth_token):
         """
-        Validates the auth token
+        Validates the auth token, verifying its signature only when it's
+        not already in the token cache
         :param auth_token:
         :return: integer|string
         """
         try:
             from simple_events.app import app
-            payload = jwt.decode(auth_token, app.config['SECRET_KEY'])
-            is_blacklisted_token = BlacklistToken.check_blacklist(auth_token)
+            user_id = token_cache.get(auth_token)
+            if user_id is None:
+                payload = jwt.decode(auth_token, app.config['SECRET_KEY'])
+                user_id = payload['sub']
+                token_cache.put(auth_token, user_id, payload['exp'])
+            is_blacklisted_token = token_cache.is_blacklisted(auth_token)
             if is_blacklisted_token:
                 return 'Token blacklisted. Please log in again.'
             else:
-                return payload['sub']
+                return user_id
         except jwt.ExpiredSignatureError:
             return 'Signature expired. Please log in again.'
         except jwt.InvalidTokenError:
@@ -74,18 +81,14 @@ class BlacklistToken(db.Model):
     token = db.Column(db.String(500), unique=True, nullable=False)
     blacklisted_on_utc = db.Column(db.DateTime, nullable=False)
 
+    __table_args__ = (
+        # Every process re-reads the recently blacklisted tokens every few seconds
+        db.Index('ix__blacklist_tokens__blacklisted_on_utc', blacklisted_on_utc),
+    )
+
     def __init__(self, token):
         self.token = token
         self.blacklisted_on_utc = datetime.datetime.utcnow()
 
     def __repr__(self):
         return f'<id: token: {self.token}'
-
-    @staticmethod
-    def check_blacklist(auth_token):
-        # check whether auth token has been blacklisted
-        res = BlacklistToken.query.filter_by(token=str(auth_token)).first()
-        if res:
-            return True
-        else:
-            return False
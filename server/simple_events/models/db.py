@@ -1,5 +1,39 @@
-from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy import SQLAlchemy as BaseSQLAlchemy
 from flask_bcrypt import Bcrypt
+from sqlalchemy import event
+
+
+def apply_sqlite_pragmas(pragmas, dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+    finally:
+        cursor.close()
+
+
+class SQLAlchemy(BaseSQLAlchemy):
+    """
+    Runs the SQLITE_PRAGMAS of the app's config on every new connection to
+    an SQLite database, as most pragmas only last for the connection.
+    """
+
+    def apply_driver_hacks(self, app, sa_url, options):
+        super().apply_driver_hacks(app, sa_url, options)
+
+        if sa_url.drivername.startswith('sqlite'):
+            # Carried through to create_engine, which pops it
+            options['sqlite_pragmas'] = app.config.get('SQLITE_PRAGMAS', {})
+
+    def create_engine(self, sa_url, engine_opts):
+        pragmas = engine_opts.pop('sqlite_pragmas', None)
+        engine = super().create_engine(sa_url, engine_opts)
+
+        if pragmas:
+            event.listen(engine, 'connect', lambda *args: apply_sqlite_pragmas(pragmas, *args))
+
+        return engine
+
 
 # Instantiate database
 db = SQLAlchemy()
@@ -1,6 +1,32 @@
 import uuid
+from collections import Counter
 from datetime import datetime
+from sqlalchemy import event as sa_event
+from sqlalchemy.dialects import postgresql
 from simple_events.models.db import db
+from simple_events.models.types import GUID
+from simple_events.core.utils import chunked
+from simple_events.core import virtual_tickets
+
+# Outcomes of redeeming a ticket
+REDEEMED = 'redeemed'
+ALREADY_REDEEMED = 'already_redeemed'
+INVALID = 'invalid'
+
+# States of a ticket, alongside REDEEMED and INVALID
+UNREDEEMED = 'unredeemed'
+
+# Maximum number of bound parameters used in an IN clause
+IN_CLAUSE_SIZE = 500
+
+# Maximum number of rows inserted by one multi-row INSERT
+INSERT_BATCH_SIZE = 100
+
+# Key of the session's info marking that its transaction changed events
+EVENTS_CHANGED = 'events_changed'
+
+# Key of the session's info marking that its transaction minted tickets
+TICKETS_MINTED = 'tickets_minted'
 
 
 class Event(db.Model):
@@ -12,19 +38,158 @@ class Event(db.Model):
     date = db.Column(db.Date, nullable=False)
     initial_number_of_tickets = db.Column(db.Integer, nullable=False)
     additional_number_of_tickets = db.Column(db.Integer, nullable=True)
-    guid = db.Column(db.BLOB, nullable=False)
+    guid = db.Column(GUID, nullable=False)
     author_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     date_created_utc = db.Column(db.DateTime, nullable=False)
+    # Denormalised counters, kept in step with the ticket table by every write path
+    number_of_tickets = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    number_of_redeemed_tickets = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # When the counters, or the event's visibility, last changed
+    last_changed_utc = db.Column(db.DateTime, nullable=True)
+    # Hidden from listings and downloads while its tickets are being minted
+    is_visible = db.Column(db.Boolean, nullable=False, default=True, server_default=db.true())
+    # Secret the guids of virtual tickets are derived from, only set for
+    # events whose tickets are virtual, see core.virtual_tickets
+    ticket_seed = db.Column(db.LargeBinary, nullable=True)
+    # Tickets held in memory by every process while scanning, see core.live_events
+    is_live = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
 
-    db.UniqueConstraint(guid, name='uix__event__guid')
+    __table_args__ = (
+        db.UniqueConstraint(guid, name='uix__event__guid'),
+        # Matches the ordering of the event listing, so pages are read in
+        # index order rather than sorted
+        db.Index('ix__event__date_name_guid', date.desc(), name, guid),
+        # Only the few live events, which every process reads when they change
+        db.Index(
+            'ix__event__live', id, number_of_tickets,
+            sqlite_where=is_live == True,
+            postgresql_where=is_live == True),
+    )
 
-    def __init__(self, name, date, initial_number_of_tickets, author_id):
+    def __init__(self, name, date, initial_number_of_tickets, author_id, is_visible=True, ticket_seed=None):
         self.name = name
         self.date = date
         self.initial_number_of_tickets = initial_number_of_tickets
         self.author_id = author_id
         self.guid = uuid.uuid4().bytes
         self.date_created_utc = datetime.utcnow()
+        self.last_changed_utc = self.date_created_utc
+        self.number_of_redeemed_tickets = 0
+        self.is_visible = is_visible
+        self.ticket_seed = ticket_seed
+        self.is_live = False
+        # Virtual tickets exist as soon as the event does, others once minted
+        self.number_of_tickets = initial_number_of_tickets if ticket_seed is not None else 0
+
+    @property
+    def is_virtual(self):
+        return self.ticket_seed is not None
+
+    @staticmethod
+    def increment_counters(event_id, number_of_tickets=0, number_of_redeemed_tickets=0):
+        """
+        Atomically increments the ticket counters of an event in the
+        database, within the current transaction.
+        :param event_id: integer, or a scalar subquery selecting it
+        """
+        values = {}
+        if number_of_tickets:
+            values[Event.number_of_tickets] = Event.number_of_tickets + number_of_tickets
+        if number_of_redeemed_tickets:
+            values[Event.number_of_redeemed_tickets] = \
+                Event.number_of_redeemed_tickets + number_of_redeemed_tickets
+
+        if values:
+            values[Event.last_changed_utc] = datetime.utcnow()
+            Event.query\
+                .filter(Event.id == event_id)\
+                .update(values, synchronize_session=False)
+            Event.changed(minted=bool(number_of_tickets))
+
+    @staticmethod
+    def increment_additional_tickets(event_id, number_of_tickets):
+        """
+        Atomically adds to the number of tickets added to an event since it
+        was created, within the current transaction.
+        """
+        Event.query\
+            .filter(Event.id == event_id)\
+            .update(
+                {Event.additional_number_of_tickets:
+                    db.func.coalesce(Event.additional_number_of_tickets, 0) + number_of_tickets},
+                synchronize_session=False)
+
+    @staticmethod
+    def publish(event_id):
+        """Makes an event visible, once its tickets are minted."""
+        Event.query\
+            .filter(Event.id == event_id)\
+            .update(
+                {Event.is_visible: True, Event.last_changed_utc: datetime.utcnow()},
+                synchronize_session=False)
+        Event.changed()
+
+    @staticmethod
+    def discard(event_id):
+        """Deletes a hidden event whose minting failed, with its tickets, leaving a visible one be."""
+        hidden = db.session.query(Event.id)\
+            .filter(db.and_(Event.id == event_id, Event.is_visible == False))
+        Ticket.query\
+            .filter(Ticket.event_id.in_(hidden.subquery()))\
+            .delete(synchronize_session=False)
+        Event.query\
+            .filter(db.and_(Event.id == event_id, Event.is_visible == False))\
+            .delete(synchronize_session=False)
+        Event.changed()
+
+    @staticmethod
+    def changed(minted=False):
+        """
+        Marks the current transaction as changing events, so it moves the
+        version of the events as it commits, see EventVersion.
+        :param minted: boolean, whether it minted tickets, moving the
+            version of the tickets too
+        """
+        db.session.info[EVENTS_CHANGED] = True
+        if minted:
+            db.session.info[TICKETS_MINTED] = True
+
+
+class EventVersion(db.Model):
+    """
+    The version of the events, and of the minted tickets, in its one row,
+    which every transaction changing events, or minting tickets, moves as
+    it commits. The row stays locked from then until the commit, so
+    versions are taken in the order the transactions commit, and the
+    latest version read always moves on the next change.
+    """
+    __tablename__ = "event_version"
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False)
+    tickets_version = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+
+    @staticmethod
+    def current():
+        """:return: integer, the latest committed version of the events"""
+        return db.session.query(EventVersion.version).scalar() or 0
+
+    @staticmethod
+    def current_tickets():
+        """:return: integer, the latest committed version of the minted tickets"""
+        return db.session.query(EventVersion.tickets_version).scalar() or 0
+
+    @staticmethod
+    def move(session, minted=False):
+        values = {EventVersion.version: EventVersion.version + 1}
+        if minted:
+            values[EventVersion.tickets_version] = EventVersion.tickets_version + 1
+        session.execute(EventVersion.__table__.update().values(values))
+
+
+sa_event.listen(
+    EventVersion.__table__, 'after_create',
+    db.DDL('INSERT INTO event_version (id, version) VALUES (1, 0)'))
 
 
 class Ticket(db.Model):
@@ -32,12 +197,23 @@ class Ticket(db.Model):
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     event_id = db.Column(db.Integer, db.ForeignKey('event.id'))
-    guid = db.Column(db.BLOB, nullable=False)
+    guid = db.Column(GUID, nullable=False)
     is_redeemed = db.Column(db.Boolean)
     date_created_utc = db.Column(db.DateTime, nullable=False)
     author_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    # Unset for tickets redeemed before redemptions were timed
+    redeemed_on_utc = db.Column(db.DateTime, nullable=True)
 
-    db.UniqueConstraint('guid', name='uix__ticket__guid')
+    __table_args__ = (
+        db.Index('uix__ticket__guid', guid, unique=True),
+        # Covers downloads and counts of an event's (un)redeemed tickets
+        db.Index('ix__ticket__event_id_is_redeemed_guid', event_id, is_redeemed, guid),
+        # Covers an event's redemption times, without its unredeemed tickets
+        db.Index(
+            'ix__ticket__event_id_redeemed_on_utc', event_id, redeemed_on_utc,
+            sqlite_where=redeemed_on_utc != None,
+            postgresql_where=redeemed_on_utc != None),
+    )
 
     def __init__(self, event_id, author_id):
         self.event_id = event_id
@@ -45,3 +221,307 @@ class Ticket(db.Model):
         self.is_redeemed = False
         self.date_created_utc = datetime.utcnow()
         self.author_id = author_id
+
+    @staticmethod
+    def redeem(ticket_guid):
+        """
+        Redeems a ticket with a single conditional update, so a ticket is
+        redeemed exactly once however many requests race for it. The
+        caller is responsible for committing.
+        :param ticket_guid: bytes
+        :return: string, one of REDEEMED, ALREADY_REDEEMED or INVALID
+        """
+        if virtual_tickets.parse_guid(ticket_guid):
+            return Ticket._redeem_virtual([ticket_guid])[ticket_guid]
+
+        updated = Ticket.query\
+            .filter(db.and_(
+                Ticket.guid == ticket_guid,
+                Ticket.is_redeemed == False
+            ))\
+            .update(
+                {Ticket.is_redeemed: True, Ticket.redeemed_on_utc: datetime.utcnow()},
+                synchronize_session=False)
+
+        if updated:
+            Event.increment_counters(
+                event_id=db.session.query(Ticket.event_id).filter_by(guid=ticket_guid).as_scalar(),
+                number_of_redeemed_tickets=1)
+            return REDEEMED
+
+        # Only reached for failed redemptions, to tell them apart
+        exists = db.session.query(
+                Ticket.query.filter_by(guid=ticket_guid).exists()
+            ).scalar()
+
+        return ALREADY_REDEEMED if exists else INVALID
+
+    @staticmethod
+    def redeem_many(ticket_guids, retries=3):
+        """
+        Redeems a batch of tickets within the current transaction using
+        set-based statements. An attempt raced by a concurrent redemption
+        is undone, without the rest of the transaction, and tried again.
+        The caller is responsible for committing.
+        :param ticket_guids: iterable of bytes
+        :return: dict of ticket guid to one of REDEEMED, ALREADY_REDEEMED or INVALID
+        """
+        ticket_guids = list(dict.fromkeys(ticket_guids))
+
+        for _ in range(retries):
+            savepoint = Ticket._begin_attempt()
+            outcomes = Ticket._redeem_many(ticket_guids)
+
+            if outcomes is not None:
+                if savepoint is not None:
+                    savepoint.commit()
+                return outcomes
+
+            # Raced with a concurrent redemption, undo the attempt and start again
+            if savepoint is not None:
+                savepoint.rollback()
+            else:
+                db.session.rollback()
+
+        # Persistently contended, settle each ticket individually
+        return {ticket_guid: Ticket.redeem(ticket_guid) for ticket_guid in ticket_guids}
+
+    @staticmethod
+    def _begin_attempt():
+        """
+        Begins a savepoint an attempt at redeeming a batch can be undone to.
+        Not on SQLite while nothing has been written in the transaction, as
+        the savepoint would begin it deferred, so its reads couldn't then be
+        upgraded to a write while another connection writes, and rolling
+        the transaction back loses nothing.
+        :return: the savepoint, or None when the transaction is to be rolled back
+        """
+        db.session.flush()
+        connection = db.session.connection()
+        if connection.dialect.name == 'sqlite' and not connection.connection.in_transaction:
+            return None
+        return db.session.begin_nested()
+
+    @staticmethod
+    def _redeem_many(ticket_guids):
+        """
+        Reads the state of the tickets, then redeems the unredeemed ones
+        with a conditional update. If the update touches fewer rows than
+        were read as unredeemed another redemption got in between, which
+        is signalled by returning None.
+        """
+        virtual_guids = [guid for guid in ticket_guids if virtual_tickets.parse_guid(guid)]
+        if virtual_guids:
+            ticket_guids = [guid for guid in ticket_guids if not virtual_tickets.parse_guid(guid)]
+
+            outcomes = Ticket._redeem_virtual(virtual_guids)
+            if outcomes is None:
+                return None
+        else:
+            outcomes = {}
+
+        outcomes.update(dict.fromkeys(ticket_guids, INVALID))
+
+        for chunk in chunked(ticket_guids, IN_CLAUSE_SIZE):
+            # Locked in guid order, so overlapping batches can't deadlock
+            rows = db.session.query(Ticket.guid, Ticket.is_redeemed, Ticket.event_id)\
+                .filter(Ticket.guid.in_(chunk))\
+                .order_by(Ticket.guid)\
+                .with_for_update()\
+                .all()
+
+            unredeemed = [row.guid for row in rows if not row.is_redeemed]
+            outcomes.update((row.guid, ALREADY_REDEEMED) for row in rows if row.is_redeemed)
+
+            if not unredeemed:
+                continue
+
+            updated = Ticket.query\
+                .filter(db.and_(
+                    Ticket.guid.in_(unredeemed),
+                    Ticket.is_redeemed == False
+                ))\
+                .update(
+                    {Ticket.is_redeemed: True, Ticket.redeemed_on_utc: datetime.utcnow()},
+                    synchronize_session=False)
+
+            if updated != len(unredeemed):
+                return None
+
+            outcomes.update(dict.fromkeys(unredeemed, REDEEMED))
+
+            redeemed_per_event = Counter(row.event_id for row in rows if not row.is_redeemed)
+            for event_id, number_of_redeemed_tickets in redeemed_per_event.items():
+                Event.increment_counters(event_id, number_of_redeemed_tickets=number_of_redeemed_tickets)
+
+        return outcomes
+
+    @staticmethod
+    def set_redemption_times(redeemed_on_utc):
+        """
+        Sets when tickets were redeemed, in one executemany, within the
+        current transaction
+        :param redeemed_on_utc: dict of ticket guid to datetime
+        """
+        if not redeemed_on_utc:
+            return
+
+        table = Ticket.__table__
+        statement = table.update()\
+            .where(table.c.guid == db.bindparam('ticket_guid'))\
+            .values(redeemed_on_utc=db.bindparam('redeemed_on'))
+
+        db.session.execute(statement, [
+            {'ticket_guid': ticket_guid, 'redeemed_on': redeemed_on}
+            for ticket_guid, redeemed_on in redeemed_on_utc.items()
+        ])
+
+    @staticmethod
+    def status_many(ticket_guids):
+        """
+        Looks up the state of a batch of tickets, one IN query per chunk
+        :param ticket_guids: iterable of bytes
+        :return: dict of ticket guid to one of UNREDEEMED, REDEEMED or INVALID
+        """
+        ticket_guids = list(dict.fromkeys(ticket_guids))
+        states = dict.fromkeys(ticket_guids, INVALID)
+
+        for chunk in chunked(ticket_guids, IN_CLAUSE_SIZE):
+            rows = db.session.query(Ticket.guid, Ticket.is_redeemed)\
+                .filter(Ticket.guid.in_(chunk))\
+                .all()
+
+            states.update((row.guid, REDEEMED if row.is_redeemed else UNREDEEMED) for row in rows)
+
+        # Virtual tickets without a row are yet to be redeemed
+        unknown = [guid for guid, state in states.items() if state == INVALID]
+        states.update(dict.fromkeys(Ticket._valid_virtual_guids(unknown), UNREDEEMED))
+
+        return states
+
+    @staticmethod
+    def _valid_virtual_guids(ticket_guids):
+        """
+        Checks guids against the seeds of the events they name
+        :param ticket_guids: iterable of bytes
+        :return: dict of the guids of real virtual tickets to their event id
+        """
+        parsed = {}
+        for ticket_guid in ticket_guids:
+            parts = virtual_tickets.parse_guid(ticket_guid)
+            if parts:
+                parsed[ticket_guid] = parts
+
+        events = {}
+        event_ids = list({event_id for event_id, _ in parsed.values()})
+        for chunk in chunked(event_ids, IN_CLAUSE_SIZE):
+            rows = db.session.query(Event.id, Event.ticket_seed, Event.number_of_tickets)\
+                .filter(db.and_(
+                    Event.id.in_(chunk),
+                    Event.ticket_seed != None
+                ))\
+                .all()
+            events.update((row.id, row) for row in rows)
+
+        valid = {}
+        for ticket_guid, (event_id, index) in parsed.items():
+            event = events.get(event_id)
+            if event and virtual_tickets.is_valid(
+                    ticket_guid, index, event_id, event.ticket_seed, event.number_of_tickets):
+                valid[ticket_guid] = event_id
+
+        return valid
+
+    @staticmethod
+    def _redeem_virtual(ticket_guids):
+        """
+        Redeems virtual tickets by inserting their rows, already redeemed,
+        with duplicates ignored, so a ticket is redeemed by whichever
+        insert gets its row in first. Returns None if a concurrent
+        redemption inserted a row between reading and inserting.
+        """
+        outcomes = dict.fromkeys(ticket_guids, INVALID)
+        valid = Ticket._valid_virtual_guids(ticket_guids)
+
+        unredeemed = dict(valid)
+        for chunk in chunked(list(valid), IN_CLAUSE_SIZE):
+            rows = db.session.query(Ticket.guid)\
+                .filter(Ticket.guid.in_(chunk))\
+                .all()
+
+            for row in rows:
+                outcomes[row.guid] = ALREADY_REDEEMED
+                del unredeemed[row.guid]
+
+        if not unredeemed:
+            return outcomes
+
+        event_authors = dict(
+            db.session.query(Event.id, Event.author_id)
+                .filter(Event.id.in_(set(unredeemed.values())))
+                .all())
+        date_created_utc = datetime.utcnow()
+
+        rows = [
+            {
+                'event_id': event_id,
+                'guid': ticket_guid,
+                'is_redeemed': True,
+                'date_created_utc': date_created_utc,
+                'author_id': event_authors[event_id],
+                'redeemed_on_utc': date_created_utc
+            }
+            for ticket_guid, event_id in unredeemed.items()
+        ]
+
+        for chunk in chunked(rows, INSERT_BATCH_SIZE):
+            if Ticket._insert_ignoring_duplicates(chunk) != len(chunk):
+                if len(ticket_guids) == 1:
+                    # The only ticket was redeemed by the concurrent request
+                    outcomes[ticket_guids[0]] = ALREADY_REDEEMED
+                    return outcomes
+                return None
+
+        outcomes.update(dict.fromkeys(unredeemed, REDEEMED))
+
+        for event_id, number_of_redeemed_tickets in Counter(unredeemed.values()).items():
+            Event.increment_counters(event_id, number_of_redeemed_tickets=number_of_redeemed_tickets)
+
+        return outcomes
+
+    @staticmethod
+    def _insert_ignoring_duplicates(rows):
+        """
+        Inserts ticket rows in one statement, skipping any whose guid exists
+        :return: integer, the number of rows inserted
+        """
+        if db.session.connection().dialect.name == 'postgresql':
+            statement = postgresql.insert(Ticket.__table__)\
+                .values(rows)\
+                .on_conflict_do_nothing(index_elements=['guid'])
+        else:
+            statement = Ticket.__table__.insert()\
+                .values(rows)\
+                .prefix_with('OR IGNORE')
+
+        return db.session.execute(statement).rowcount
+
+
+def move_event_version(session):
+    # Flushed first, so new events count as changes
+    if any(isinstance(instance, Event) for instance in session.new):
+        session.info[EVENTS_CHANGED] = True
+    session.flush()
+
+    minted = session.info.pop(TICKETS_MINTED, False)
+    if session.info.pop(EVENTS_CHANGED, False) or minted:
+        EventVersion.move(session, minted)
+
+
+def forget_events_changed(session):
+    session.info.pop(EVENTS_CHANGED, None)
+    session.info.pop(TICKETS_MINTED, None)
+
+
+sa_event.listen(db.session, 'before_commit', move_event_version)
+sa_event.listen(db.session, 'after_rollback', forget_events_changed)
@@ -0,0 +1,137 @@
+import uuid
+from datetime import datetime, timedelta
+from simple_events.models.db import db
+from simple_events.models.types import GUID
+
+# States of a ticket job
+PENDING = 'pending'
+RUNNING = 'running'
+COMPLETE = 'complete'
+FAILED = 'failed'
+
+
+class TicketJob(db.Model):
+    """
+    Ticket Job Model for minting an event's tickets in the background.
+
+    A job is worked on by whichever process holds its lease, which is
+    renewed as each chunk of tickets is committed. A job whose lease has
+    lapsed, because its process stopped, can be claimed and resumed by
+    another from where it got to. A failed job holds its lease, without
+    an owner, for as long as it waits to be retried.
+    """
+    __tablename__ = 'ticket_job'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    guid = db.Column(GUID, nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
+    author_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    number_of_tickets = db.Column(db.Integer, nullable=False)
+    number_of_minted_tickets = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    state = db.Column(db.String(16), nullable=False)
+    error = db.Column(db.String(255), nullable=True)
+    owner = db.Column(db.String(32), nullable=True)
+    lease_expires_utc = db.Column(db.DateTime, nullable=True)
+    date_created_utc = db.Column(db.DateTime, nullable=False)
+    date_completed_utc = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.UniqueConstraint(guid, name='uix__ticket_job__guid'),
+        db.Index('ix__ticket_job__state', state),
+    )
+
+    def __init__(self, event_id, author_id, number_of_tickets):
+        self.event_id = event_id
+        self.author_id = author_id
+        self.number_of_tickets = number_of_tickets
+        self.number_of_minted_tickets = 0
+        self.state = PENDING
+        self.guid = uuid.uuid4().bytes
+        self.date_created_utc = datetime.utcnow()
+
+    @staticmethod
+    def claimable_ids():
+        """
+        :return: list of the ids of unfinished or failed jobs which no
+            process holds, and which aren't waiting to be retried
+        """
+        rows = db.session.query(TicketJob.id)\
+            .filter(db.and_(
+                TicketJob.state.in_((PENDING, RUNNING, FAILED)),
+                db.or_(
+                    TicketJob.lease_expires_utc == None,
+                    TicketJob.lease_expires_utc < datetime.utcnow()
+                )
+            ))\
+            .order_by(TicketJob.id)\
+            .all()
+
+        return [row.id for row in rows]
+
+    @staticmethod
+    def claim(job_id, owner, lease_seconds):
+        """
+        Takes the lease of an unfinished or failed job, unless another
+        process holds it or it's waiting to be retried, within the current
+        transaction.
+        :return: boolean, whether the job was claimed
+        """
+        now = datetime.utcnow()
+
+        return bool(TicketJob.query
+            .filter(db.and_(
+                TicketJob.id == job_id,
+                TicketJob.state.in_((PENDING, RUNNING, FAILED)),
+                db.or_(
+                    TicketJob.lease_expires_utc == None,
+                    TicketJob.lease_expires_utc < now
+                )
+            ))
+            .update({
+                TicketJob.state: RUNNING,
+                TicketJob.owner: owner,
+                TicketJob.lease_expires_utc: now + timedelta(seconds=lease_seconds)
+            }, synchronize_session=False))
+
+    @staticmethod
+    def record_progress(job_id, owner, number_of_tickets, lease_seconds):
+        """
+        Adds minted tickets to a job and renews its lease, within the
+        transaction which minted them, so progress is never counted twice.
+        :return: boolean, False when the lease was lost to another process
+        """
+        return bool(TicketJob.query
+            .filter(db.and_(TicketJob.id == job_id, TicketJob.owner == owner))
+            .update({
+                TicketJob.number_of_minted_tickets: TicketJob.number_of_minted_tickets + number_of_tickets,
+                TicketJob.lease_expires_utc: datetime.utcnow() + timedelta(seconds=lease_seconds)
+            }, synchronize_session=False))
+
+    @staticmethod
+    def finish(job_id, owner, state, error=None):
+        """Marks a job COMPLETE or FAILED and releases its lease."""
+        return bool(TicketJob.query
+            .filter(db.and_(TicketJob.id == job_id, TicketJob.owner == owner))
+            .update({
+                TicketJob.state: state,
+                TicketJob.error: error,
+                TicketJob.owner: None,
+                TicketJob.lease_expires_utc: None,
+                TicketJob.date_completed_utc: datetime.utcnow()
+            }, synchronize_session=False))
+
+    @staticmethod
+    def fail(job_id, owner, error, retry_seconds):
+        """
+        Marks a job FAILED, to be retried from where it got to once
+        retry_seconds have passed, and releases it.
+        """
+        return bool(TicketJob.query
+            .filter(db.and_(TicketJob.id == job_id, TicketJob.owner == owner))
+            .update({
+                TicketJob.state: FAILED,
+                TicketJob.error: error,
+                TicketJob.owner: None,
+                TicketJob.lease_expires_utc: datetime.utcnow() + timedelta(seconds=retry_seconds),
+                TicketJob.date_completed_utc: datetime.utcnow()
+            }, synchronize_session=False))
@@ -0,0 +1,27 @@
+import uuid
+
+from sqlalchemy.dialects import postgresql
+from simple_events.models.db import db
+
+
+class GUID(db.TypeDecorator):
+    """
+    A GUID held as 16 bytes in Python, stored as a native UUID on
+    PostgreSQL and as a BLOB on other databases.
+    """
+    impl = db.BLOB
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(postgresql.UUID())
+        return dialect.type_descriptor(db.BLOB())
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and dialect.name == 'postgresql':
+            return str(uuid.UUID(bytes=value))
+        return value
+
+    def process_result_value(self, value, dialect):
+        if value is not None and dialect.name == 'postgresql':
+            return uuid.UUID(value).bytes
+        return value
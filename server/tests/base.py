@@ -1,8 +1,18 @@
+import os
 import json
+import tempfile
 from flask_testing import TestCase
 
 from simple_events.app import app
 from simple_events.models import db
+from simple_events.core.token_cache import token_cache
+from simple_events.core.hashing import password_hasher
+from simple_events.core.jobs import ticket_jobs
+from simple_events.core.signed_tickets import ticket_signer
+from simple_events.core.live_events import live_events
+from simple_events.core.ticket_filter import ticket_filter
+from simple_events.core.writer import writer
+from simple_events.core.journal import redemption_journal
 
 
 class BaseTestCase(TestCase):
@@ -15,8 +25,18 @@ class BaseTestCase(TestCase):
     def setUp(self):
         db.create_all()
         db.session.commit()
+        token_cache.init_app(self.app)
+        password_hasher.init_app(self.app)
+        ticket_jobs.init_app(self.app)
+        ticket_signer.init_app(self.app)
+        live_events.init_app(self.app)
+        ticket_filter.init_app(self.app)
+        writer.init_app(self.app)
+        redemption_journal.init_app(self.app)
 
     def tearDown(self):
+        writer.shutdown()
+        redemption_journal.shutdown()
         db.session.remove()
         db.drop_all()
 
@@ -39,3 +59,25 @@ class BaseTestCase(TestCase):
             )),
             content_type='application/json',
         )
+
+
+class FileDatabaseTestCase(BaseTestCase):
+    """ Base Tests against a temporary database file, for tests needing several connections """
+
+    def create_app(self):
+        app = super().create_app()
+        self.database_path = None
+
+        # A database server, set through TEST_DATABASE_URL, already allows several connections
+        if app.config['SQLALCHEMY_DATABASE_URI'] == 'sqlite://':
+            handle, self.database_path = tempfile.mkstemp(suffix='.db')
+            os.close(handle)
+
+            app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + self.database_path
+        return app
+
+    def tearDown(self):
+        super().tearDown()
+        db.get_engine(self.app).dispose()
+        if self.database_path:
+            os.remove(self.database_path)
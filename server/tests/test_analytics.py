@@ -0,0 +1,193 @@
+import json
+import unittest
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from tests.test_event_ticket import TestEventBlueprint
+from simple_events.models import db
+from simple_events.models.event import Ticket
+from simple_events.core.analytics import bin_redemptions, number_of_buckets
+
+
+class TestBinRedemptions(unittest.TestCase):
+    def test_binning(self):
+        """ Test redemptions are counted per bucket, empty ones included """
+        start = datetime(2030, 1, 1, 18, 0)
+        epoch = int((start - datetime(1970, 1, 1)).total_seconds())
+        times = np.array([epoch + 130, epoch + 5, epoch + 59, epoch + 60, epoch + 3 * 60 + 1], dtype=np.int64)
+
+        start_utc, redeemed, cumulative = bin_redemptions(times, 60)
+
+        self.assertEqual(start_utc, start)
+        self.assertEqual(redeemed.tolist(), [2, 1, 1, 1])
+        self.assertEqual(cumulative.tolist(), [2, 3, 4, 5])
+
+    def test_number_of_buckets(self):
+        """ Test buckets are counted from the first redemption's to the last's """
+        self.assertEqual(number_of_buckets(np.array([59, 60, 121], dtype=np.int64), 60), 3)
+        self.assertEqual(number_of_buckets(np.array([5], dtype=np.int64), 60), 1)
+        self.assertEqual(number_of_buckets(np.zeros(0, dtype=np.int64), 60), 0)
+
+    def test_no_redemptions(self):
+        """ Test binning no redemptions """
+        start_utc, redeemed, cumulative = bin_redemptions(np.zeros(0, dtype=np.int64), 60)
+
+        self.assertIsNone(start_utc)
+        self.assertEqual(redeemed.tolist(), [])
+        self.assertEqual(cumulative.tolist(), [])
+
+
+class TestAnalytics(TestEventBlueprint):
+    def setUp(self):
+        super().setUp()
+        reg_response = self.register_user('dummy_username', '12345678')
+        self.auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+    def create_tickets(self, initial_number_of_tickets, virtual=False):
+        event_response = self.client.post(
+            'event/create',
+            data=json.dumps(dict(
+                name='test',
+                date=datetime.now().date().isoformat(),
+                initial_number_of_tickets=initial_number_of_tickets,
+                virtual=virtual
+            )),
+            content_type='application/json',
+            headers=dict(Authorization=self.auth_token)
+        )
+        eventIdentifier = json.loads(event_response.data.decode())['eventIdentifier']
+
+        download_response = self.client.get(
+                f'event/download/{eventIdentifier}',
+                headers=dict(Authorization=self.auth_token)
+            )
+        return eventIdentifier, json.loads(download_response.data.decode())['data']['ticketIdentifiers']
+
+    def get_analytics(self, eventIdentifier, **params):
+        return self.client.get(
+                f'event/analytics/{eventIdentifier}',
+                query_string=params,
+                headers=dict(Authorization=self.auth_token)
+            )
+
+    def test_redemptions_timed(self):
+        """ Test each way of redeeming records when """
+        before = datetime.utcnow()
+
+        for virtual in (False, True):
+            _, ticketIdentifiers = self.create_tickets(3, virtual=virtual)
+
+            self.client.get(f'redeem/{ticketIdentifiers[0]}')
+            self.client.post(
+                'redeem/batch',
+                content_type='application/json',
+                data=json.dumps(dict(ticketIdentifiers=ticketIdentifiers[1:]))
+            )
+
+            for ticketIdentifier in ticketIdentifiers:
+                ticket = Ticket.query.filter_by(guid=uuid.UUID(ticketIdentifier).bytes).first()
+
+                self.assertTrue(before <= ticket.redeemed_on_utc <= datetime.utcnow())
+
+    def test_analytics(self):
+        """ Test redemptions are counted per minute and hour, with the arrival curve """
+        eventIdentifier, ticketIdentifiers = self.create_tickets(5)
+
+        redeem_response = self.client.post(
+            'redeem/batch',
+            content_type='application/json',
+            data=json.dumps(dict(ticketIdentifiers=ticketIdentifiers[:4]))
+        )
+        self.assertEqual(redeem_response.status_code, 200)
+
+        start = datetime(2030, 1, 1, 18, 0)
+        Ticket.set_redemption_times({
+            uuid.UUID(ticketIdentifiers[0]).bytes: start + timedelta(seconds=10),
+            uuid.UUID(ticketIdentifiers[1]).bytes: start + timedelta(seconds=50),
+            uuid.UUID(ticketIdentifiers[2]).bytes: start + timedelta(minutes=2, seconds=30),
+            uuid.UUID(ticketIdentifiers[3]).bytes: start + timedelta(hours=1, seconds=1),
+        })
+        db.session.commit()
+
+        analytics_response = self.get_analytics(eventIdentifier)
+        data = json.loads(analytics_response.data.decode())['data']
+
+        self.assertEqual(analytics_response.status_code, 200)
+        self.assertEqual(data['interval'], 'minute')
+        self.assertEqual(data['start_utc'], '2030-01-01T18:00:00')
+        self.assertEqual(len(data['redeemed']), 61)
+        self.assertEqual(data['redeemed'][:4], [2, 0, 1, 0])
+        self.assertEqual(data['redeemed'][-1], 1)
+        self.assertEqual(data['cumulative'][:3], [2, 2, 3])
+        self.assertEqual(data['cumulative'][-1], 4)
+
+        data = json.loads(self.get_analytics(eventIdentifier, interval='hour').data.decode())['data']
+
+        self.assertEqual(data['redeemed'], [3, 1])
+        self.assertEqual(data['cumulative'], [3, 4])
+
+    def test_analytics_bounded(self):
+        """ Test too many buckets are refused, and a range of times can be counted instead """
+        eventIdentifier, ticketIdentifiers = self.create_tickets(3)
+
+        self.client.post(
+            'redeem/batch',
+            content_type='application/json',
+            data=json.dumps(dict(ticketIdentifiers=ticketIdentifiers))
+        )
+
+        start = datetime(2030, 1, 1, 18, 0)
+        Ticket.set_redemption_times({
+            uuid.UUID(ticketIdentifiers[0]).bytes: start,
+            uuid.UUID(ticketIdentifiers[1]).bytes: start + timedelta(minutes=1),
+            # Stray, decades off
+            uuid.UUID(ticketIdentifiers[2]).bytes: datetime(1970, 1, 1),
+        })
+        db.session.commit()
+
+        analytics_response = self.get_analytics(eventIdentifier)
+
+        self.assertEqual(analytics_response.status_code, 400)
+        self.assertIn('buckets', json.loads(analytics_response.data.decode())['message'])
+
+        analytics_response = self.get_analytics(
+            eventIdentifier, timeFrom='2030-01-01T20:00:00+02:00', timeTo='2030-01-02T00:00:00')
+        data = json.loads(analytics_response.data.decode())['data']
+
+        self.assertEqual(analytics_response.status_code, 200)
+        self.assertEqual(data['start_utc'], '2030-01-01T18:00:00')
+        self.assertEqual(data['redeemed'], [1, 1])
+
+        analytics_response = self.get_analytics(eventIdentifier, timeTo='2030-01-01T18:01:00')
+
+        self.assertEqual(analytics_response.status_code, 400)
+        self.assertEqual(self.get_analytics(eventIdentifier, timeFrom='yesterday').status_code, 400)
+
+    def test_analytics_without_redemptions(self):
+        """ Test the analytics of an event nobody has arrived at """
+        eventIdentifier, _ = self.create_tickets(2)
+
+        analytics_response = self.get_analytics(eventIdentifier)
+        data = json.loads(analytics_response.data.decode())['data']
+
+        self.assertEqual(analytics_response.status_code, 200)
+        self.assertIsNone(data['start_utc'])
+        self.assertEqual(data['redeemed'], [])
+        self.assertEqual(data['cumulative'], [])
+
+    def test_analytics_invalid(self):
+        """ Test the analytics of an unknown event, and by an unknown interval """
+        eventIdentifier, _ = self.create_tickets(2)
+
+        analytics_response = self.get_analytics(uuid.uuid4())
+
+        self.assertEqual(analytics_response.status_code, 402)
+        self.assertEqual(json.loads(analytics_response.data.decode())['message'], 'Invalid eventIdentifier.')
+
+        self.assertEqual(self.get_analytics(eventIdentifier, interval='second').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+import json
+import re
+import unittest
+from datetime import datetime
+
+from sqlalchemy import event as sa_event
+
+from simple_events.models import db
+from simple_events.models.event import Event
+from simple_events.core.counters import find_counter_discrepancies, recompute_counters
+from tests.test_event_ticket import TestEventBlueprint
+
+
+class TestCounters(TestEventBlueprint):
+    def get_event_status(self, eventIdentifier, auth_token):
+        status_response = self.client.get(
+            f'event/status/{eventIdentifier}',
+            content_type='application/json',
+            headers=dict(Authorization=auth_token)
+        )
+        return json.loads(status_response.data.decode())['data']
+
+    def test_counters_follow_writes(self):
+        """ Test the event counters are maintained by create, add and redeem """
+        reg_response = self.register_user('dummy_username', '12345678')
+
+        auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+        event_response = self.create_event(
+            name='test',
+            date=datetime.now().date(),
+            initial_number_of_tickets=5,
+            auth_token=auth_token)
+
+        eventIdentifier = json.loads(event_response.data.decode())['eventIdentifier']
+
+        download_response = self.client.get(
+            f'event/download/{eventIdentifier}',
+            content_type='application/json',
+            headers=dict(Authorization=auth_token)
+        )
+
+        ticketIdentifiers = json.loads(download_response.data.decode())['data']['ticketIdentifiers']
+
+        # Redeem one ticket singly, two in a batch, and one twice
+        self.client.get(f'redeem/{ticketIdentifiers[0]}')
+        self.client.get(f'redeem/{ticketIdentifiers[0]}')
+        self.client.post(
+            'redeem/batch',
+            content_type='application/json',
+            data=json.dumps(dict(ticketIdentifiers=ticketIdentifiers[:3]))
+        )
+
+        status = self.get_event_status(eventIdentifier, auth_token)
+
+        self.assertEqual(status['number_of_tickets'], 5)
+        self.assertEqual(status['number_of_redeemed_tickets'], 3)
+
+        self.client.put(
+            f'event/add/{eventIdentifier}',
+            content_type='application/json',
+            headers=dict(Authorization=auth_token),
+            data=json.dumps(dict(additionalNumberOfTickets=3)),
+        )
+
+        status = self.get_event_status(eventIdentifier, auth_token)
+
+        self.assertEqual(status['number_of_tickets'], 8)
+        self.assertEqual(status['number_of_redeemed_tickets'], 3)
+
+        self.assertEqual(find_counter_discrepancies(), [])
+
+    def test_last_changed_follows_counters(self):
+        """ Test the listing and status report when the counters last changed, without reading tickets """
+        reg_response = self.register_user('dummy_username', '12345678')
+
+        auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+        event_response = self.create_event(
+            name='test',
+            date=datetime.now().date(),
+            initial_number_of_tickets=2,
+            auth_token=auth_token)
+
+        eventIdentifier = json.loads(event_response.data.decode())['eventIdentifier']
+
+        created = self.get_event_status(eventIdentifier, auth_token)['last_changed_utc']
+
+        download_response = self.client.get(
+            f'event/download/{eventIdentifier}',
+            content_type='application/json',
+            headers=dict(Authorization=auth_token)
+        )
+        ticketIdentifiers = json.loads(download_response.data.decode())['data']['ticketIdentifiers']
+
+        self.client.get(f'redeem/{ticketIdentifiers[0]}')
+
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engine = db.get_engine(self.app)
+        sa_event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            redeemed = self.get_event_status(eventIdentifier, auth_token)['last_changed_utc']
+            all_response = self.client.get('event/all', headers=dict(Authorization=auth_token))
+        finally:
+            sa_event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+        self.assertGreater(redeemed, created)
+        self.assertEqual(json.loads(all_response.data.decode())['data'][0]['last_changed_utc'], redeemed)
+        self.assertTrue(statements)
+        self.assertFalse([statement for statement in statements if re.search(r'\bticket\b', statement)])
+
+        # Unchanged by a repeated scan
+        self.client.get(f'redeem/{ticketIdentifiers[0]}')
+
+        self.assertEqual(self.get_event_status(eventIdentifier, auth_token)['last_changed_utc'], redeemed)
+
+    def test_recompute_counters(self):
+        """ Test incorrect counters are found and recomputed """
+        reg_response = self.register_user('dummy_username', '12345678')
+
+        auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+        for name in ('test1', 'test2'):
+            self.create_event(
+                name=name,
+                date=datetime.now().date(),
+                initial_number_of_tickets=2,
+                auth_token=auth_token)
+
+        event = Event.query.filter_by(name='test1').first()
+        event.number_of_tickets = 7
+        event.number_of_redeemed_tickets = 1
+        db.session.commit()
+
+        discrepancies = find_counter_discrepancies()
+
+        self.assertEqual(len(discrepancies), 1)
+        self.assertEqual(discrepancies[0].guid, event.guid)
+        self.assertEqual(discrepancies[0].number_of_tickets, 7)
+        self.assertEqual(discrepancies[0].counted_number_of_tickets, 2)
+        self.assertEqual(discrepancies[0].number_of_redeemed_tickets, 1)
+        self.assertEqual(discrepancies[0].counted_number_of_redeemed_tickets, 0)
+
+        recompute_counters()
+        db.session.commit()
+
+        self.assertEqual(find_counter_discrepancies(), [])
+
+        event = Event.query.filter_by(name='test1').first()
+        other_event = Event.query.filter_by(name='test2').first()
+
+        self.assertGreater(event.last_changed_utc, other_event.last_changed_utc)
+        self.assertEqual(event.number_of_tickets, 2)
+        self.assertEqual(event.number_of_redeemed_tickets, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,12 +1,21 @@
+import gzip
 import json
+import random
 import unittest
 import uuid
-from datetime import datetime
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from unittest import mock
 
-from tests.base import BaseTestCase
+from sqlalchemy import event as sa_event
+
+from tests.base import BaseTestCase, FileDatabaseTestCase
 from simple_events.models import db
 from simple_events.models.event import Event, Ticket
 from simple_events.models.auth import User
+from simple_events.core.export import read_binary_export
+from simple_events.core.minting import mint_tickets
 
 
 class TestEventBlueprint(BaseTestCase):
@@ -196,6 +205,133 @@ class TestEvent(TestEventBlueprint):
 
             self.assertEqual(tickets.n, 2)
 
+    def test_streaming_download_of_unredeemed_tickets(self):
+        """ Test streamed CSV and NDJSON downloads of unredeemed tickets """
+        reg_response = self.register_user('dummy_username', '12345678')
+
+        auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+        event_response = self.create_event(
+            name='test',
+            date=datetime.now().date(),
+            initial_number_of_tickets=3,
+            auth_token=auth_token)
+
+        eventIdentifier = json.loads(event_response.data.decode())['eventIdentifier']
+
+        download_response = self.client.get(
+                f'event/download/{eventIdentifier}',
+                headers=dict(Authorization=auth_token)
+            )
+
+        ticketIdentifiers = json.loads(download_response.data.decode())['data']['ticketIdentifiers']
+
+        self.client.get(f'redeem/{ticketIdentifiers[0]}')
+
+        # CSV chosen by the format argument
+        csv_response = self.client.get(
+                f'event/download/{eventIdentifier}',
+                query_string=dict(format='csv'),
+                headers=dict(Authorization=auth_token)
+            )
+
+        self.assertEqual(csv_response.status_code, 200)
+        self.assertTrue(csv_response.is_streamed)
+        self.assertEqual(csv_response.mimetype, 'text/csv')
+        self.assertEqual(
+            csv_response.headers['Content-Disposition'],
+            f'attachment; filename="{eventIdentifier}.csv"')
+
+        lines = csv_response.data.decode().splitlines()
+
+        self.assertEqual(lines[0], 'ticketIdentifier')
+        self.assertEqual(sorted(lines[1:]), sorted(ticketIdentifiers[1:]))
+
+        # NDJSON chosen by the Accept header
+        ndjson_response = self.client.get(
+                f'event/download/{eventIdentifier}',
+                headers=dict(Authorization=auth_token, Accept='application/x-ndjson')
+            )
+
+        self.assertEqual(ndjson_response.status_code, 200)
+        self.assertTrue(ndjson_response.is_streamed)
+        self.assertEqual(ndjson_response.mimetype, 'application/x-ndjson')
+
+        records = [json.loads(line) for line in ndjson_response.data.decode().splitlines()]
+
+        self.assertEqual(
+            sorted(record['ticketIdentifier'] for record in records),
+            sorted(ticketIdentifiers[1:]))
+
+    def test_binary_download_of_unredeemed_tickets(self):
+        """ Test binary downloads of unredeemed tickets, with and without gzip """
+        reg_response = self.register_user('dummy_username', '12345678')
+
+        auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+        event_response = self.create_event(
+            name='test',
+            date=datetime.now().date(),
+            initial_number_of_tickets=3,
+            auth_token=auth_token)
+
+        eventIdentifier = json.loads(event_response.data.decode())['eventIdentifier']
+
+        download_response = self.client.get(
+                f'event/download/{eventIdentifier}',
+                headers=dict(Authorization=auth_token)
+            )
+
+        ticketIdentifiers = json.loads(download_response.data.decode())['data']['ticketIdentifiers']
+        expected = sorted(uuid.UUID(ticketIdentifier).bytes for ticketIdentifier in ticketIdentifiers)
+
+        binary_response = self.client.get(
+                f'event/download/{eventIdentifier}',
+                headers=dict(Authorization=auth_token, Accept='application/vnd.simple-events.tickets')
+            )
+
+        self.assertEqual(binary_response.status_code, 200)
+        self.assertEqual(binary_response.mimetype, 'application/vnd.simple-events.tickets')
+        self.assertNotIn('Content-Encoding', binary_response.headers)
+        self.assertEqual(len(binary_response.data), 24 + 3 * 16)
+
+        event_guid, ticket_guids = read_binary_export(binary_response.data)
+
+        self.assertEqual(event_guid, uuid.UUID(eventIdentifier).bytes)
+        self.assertEqual(sorted(ticket_guids), expected)
+
+        gzip_response = self.client.get(
+                f'event/download/{eventIdentifier}',
+                query_string=dict(format='binary'),
+                headers=dict(Authorization=auth_token, **{'Accept-Encoding': 'gzip'})
+            )
+
+        self.assertEqual(gzip_response.status_code, 200)
+        self.assertEqual(gzip_response.headers['Content-Encoding'], 'gzip')
+
+        event_guid, ticket_guids = read_binary_export(gzip.decompress(gzip_response.data))
+
+        self.assertEqual(event_guid, uuid.UUID(eventIdentifier).bytes)
+        self.assertEqual(sorted(ticket_guids), expected)
+
+    def test_streaming_download_with_invalid_event(self):
+        """ Test a streamed download of an unknown event fails before streaming """
+        reg_response = self.register_user('dummy_username', '12345678')
+
+        auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+        download_response = self.client.get(
+                f'event/download/{uuid.uuid4()}',
+                query_string=dict(format='csv'),
+                headers=dict(Authorization=auth_token)
+            )
+
+        download_data = json.loads(download_response.data.decode())
+
+        self.assertEqual(download_response.status_code, 402)
+        self.assertEqual(download_response.content_type, 'application/json')
+        self.assertEqual(download_data['message'], 'Invalid eventIdentifier.')
+
     def test_adding_tickets_to_event(self):
         """ Test adding tickets to an event """
         reg_response = self.register_user('dummy_username', '12345678')
@@ -233,6 +369,260 @@ class TestEvent(TestEventBlueprint):
 
         self.assertEqual(status_data['data']['number_of_tickets'], 5)
 
+    def test_creating_event_in_chunks(self):
+        """ Test an event's tickets are committed a chunk at a time """
+        self.app.config['MINTING_CHUNK_SIZE'] = 3
+
+        reg_response = self.register_user('dummy_username', '12345678')
+
+        auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+        commits = []
+
+        def after_commit(session):
+            commits.append(session)
+
+        sa_event.listen(db.session, 'after_commit', after_commit)
+        try:
+            event_response = self.create_event(
+                name='test',
+                date=datetime.now().date(),
+                initial_number_of_tickets=10,
+                auth_token=auth_token)
+        finally:
+            sa_event.remove(db.session, 'after_commit', after_commit)
+
+        self.assertEqual(event_response.status_code, 200)
+        # The hidden event, four chunks of tickets, then publishing the event
+        self.assertEqual(len(commits), 6)
+
+        event = Event.query.filter_by(
+            guid=uuid.UUID(json.loads(event_response.data.decode())['eventIdentifier']).bytes).first()
+
+        self.assertTrue(event.is_visible)
+        self.assertEqual(event.number_of_tickets, 10)
+        self.assertEqual(Ticket.query.filter_by(event_id=event.id).count(), 10)
+
+    def test_event_hidden_while_minting(self):
+        """ Test an event is left out of listings and downloads until its tickets are minted """
+        reg_response = self.register_user('dummy_username', '12345678')
+
+        auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+        user_id = User.decode_auth_token(auth_token)
+
+        event = Event(
+            name='minting',
+            date=datetime.now().date(),
+            initial_number_of_tickets=10,
+            author_id=user_id,
+            is_visible=False)
+        db.session.add(event)
+        db.session.commit()
+
+        eventIdentifier = str(uuid.UUID(bytes=event.guid))
+
+        all_response, all_data = self.get_all_events(auth_token)
+
+        self.assertEqual(all_response.status_code, 200)
+        self.assertEqual(all_data['data'], [])
+
+        download_response = self.client.get(
+                f'event/download/{eventIdentifier}',
+                headers=dict(Authorization=auth_token)
+            )
+        download_data = json.loads(download_response.data.decode())
+
+        self.assertEqual(download_response.status_code, 409)
+        self.assertEqual(download_data['message'], 'The tickets of the event are still being minted.')
+
+        Event.publish(event.id)
+        db.session.commit()
+
+        all_response, all_data = self.get_all_events(auth_token)
+
+        self.assertEqual([event['guid'] for event in all_data['data']], [eventIdentifier])
+
+    def test_creating_event_failing_part_way(self):
+        """ Test a failed event creation leaves neither the event nor its committed tickets """
+        self.app.config['MINTING_CHUNK_SIZE'] = 3
+
+        reg_response = self.register_user('dummy_username', '12345678')
+
+        auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+        calls = []
+
+        def fail_on_third_chunk(**kwargs):
+            calls.append(kwargs)
+            if len(calls) == 3:
+                raise RuntimeError('Minting failed.')
+            return mint_tickets(**kwargs)
+
+        with mock.patch('simple_events.core.minting.mint_tickets', side_effect=fail_on_third_chunk):
+            event_response = self.create_event(
+                name='test',
+                date=datetime.now().date(),
+                initial_number_of_tickets=10,
+                auth_token=auth_token)
+
+        self.assertEqual(event_response.status_code, 500)
+        self.assertEqual(Event.query.count(), 0)
+        self.assertEqual(Ticket.query.count(), 0)
+
+    def test_creating_event_failing_once_visible(self):
+        """ Test a failure after an event is made visible leaves it with its tickets """
+        reg_response = self.register_user('dummy_username', '12345678')
+
+        auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+        publish = Event.publish
+
+        def publish_then_fail(event_id):
+            publish(event_id)
+            db.session.commit()
+            raise RuntimeError('Failed once published.')
+
+        with mock.patch.object(Event, 'publish', side_effect=publish_then_fail):
+            event_response = self.create_event(
+                name='test',
+                date=datetime.now().date(),
+                initial_number_of_tickets=10,
+                auth_token=auth_token)
+
+        self.assertEqual(event_response.status_code, 500)
+        self.assertTrue(Event.query.one().is_visible)
+        self.assertEqual(Ticket.query.count(), 10)
+
+    def test_adding_tickets_failing_part_way(self):
+        """ Test tickets added before minting fails are counted as added, and no more """
+        self.app.config['MINTING_CHUNK_SIZE'] = 3
+
+        reg_response = self.register_user('dummy_username', '12345678')
+
+        auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+        event_response = self.create_event(
+            name='test',
+            date=datetime.now().date(),
+            initial_number_of_tickets=2,
+            auth_token=auth_token)
+        eventIdentifier = json.loads(event_response.data.decode())['eventIdentifier']
+
+        calls = []
+
+        def fail_on_third_chunk(**kwargs):
+            calls.append(kwargs)
+            if len(calls) == 3:
+                raise RuntimeError('Minting failed.')
+            return mint_tickets(**kwargs)
+
+        with mock.patch('simple_events.core.minting.mint_tickets', side_effect=fail_on_third_chunk):
+            add_response = self.client.put(
+                f'event/add/{eventIdentifier}',
+                content_type='application/json',
+                headers=dict(Authorization=auth_token),
+                data=json.dumps(dict(additionalNumberOfTickets=10)),
+            )
+
+        self.assertEqual(add_response.status_code, 500)
+
+        event = Event.query.filter_by(guid=uuid.UUID(eventIdentifier).bytes).first()
+
+        self.assertEqual(event.additional_number_of_tickets, 6)
+        self.assertEqual(event.number_of_tickets, 8)
+        self.assertEqual(Ticket.query.filter_by(event_id=event.id).count(), 8)
+
+    def get_all_events(self, auth_token, **params):
+        all_response = self.client.get(
+            'event/all',
+            query_string=params,
+            content_type='application/json',
+            headers=dict(Authorization=auth_token)
+        )
+        return all_response, json.loads(all_response.data.decode())
+
+    def test_paginating_all_events(self):
+        """ Test paging through all events with a cursor """
+        reg_response = self.register_user('dummy_username', '12345678')
+
+        auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+        today = datetime.now().date()
+
+        # Events sharing dates and names, so every part of the sort key is exercised
+        for i in range(7):
+            self.create_event(
+                name=f'test{i % 2}',
+                date=today + timedelta(days=i % 3),
+                initial_number_of_tickets=1,
+                auth_token=auth_token)
+
+        _, all_data = self.get_all_events(auth_token)
+
+        self.assertEqual(len(all_data['data']), 7)
+        self.assertIsNone(all_data['nextCursor'])
+
+        expected = [event['guid'] for event in all_data['data']]
+
+        pages, cursor = [], None
+        while True:
+            params = dict(limit=3, cursor=cursor) if cursor else dict(limit=3)
+            all_response, all_data = self.get_all_events(auth_token, **params)
+
+            self.assertEqual(all_response.status_code, 200)
+            pages.append([event['guid'] for event in all_data['data']])
+
+            cursor = all_data['nextCursor']
+            if not cursor:
+                break
+
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual([guid for page in pages for guid in page], expected)
+
+    def test_filtering_all_events(self):
+        """ Test filtering all events by name, date and author """
+        reg_response = self.register_user('dummy_username', '12345678')
+        auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+        reg_response = self.register_user('other_username', '12345678')
+        other_auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+        today = datetime.now().date()
+
+        self.create_event('Summer 100% Fest', today, 1, auth_token)
+        self.create_event('Winter Fest', today + timedelta(days=10), 1, auth_token)
+        self.create_event('Summer Gig', today + timedelta(days=20), 1, other_auth_token)
+
+        def names(**params):
+            all_response, all_data = self.get_all_events(auth_token, **params)
+            self.assertEqual(all_response.status_code, 200)
+            return [event['name'] for event in all_data['data']]
+
+        self.assertEqual(names(name='summer'), ['Summer Gig', 'Summer 100% Fest'])
+        self.assertEqual(names(name='100%'), ['Summer 100% Fest'])
+        self.assertEqual(names(name='1_0'), [])
+        self.assertEqual(names(dateFrom=str(today + timedelta(days=5))), ['Summer Gig', 'Winter Fest'])
+        self.assertEqual(names(dateTo=str(today + timedelta(days=10))), ['Winter Fest', 'Summer 100% Fest'])
+        self.assertEqual(names(author='other_username'), ['Summer Gig'])
+        self.assertEqual(names(author='dummy_username', name='fest'), ['Winter Fest', 'Summer 100% Fest'])
+
+    def test_all_events_with_invalid_paging(self):
+        """ Test listing events with an invalid cursor or page size """
+        reg_response = self.register_user('dummy_username', '12345678')
+
+        auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+        all_response, all_data = self.get_all_events(auth_token, cursor='not-a-cursor')
+
+        self.assertEqual(all_response.status_code, 400)
+        self.assertEqual(all_data['errors']['cursor'], 'cursor is invalid.')
+
+        all_response, all_data = self.get_all_events(auth_token, limit=501)
+
+        self.assertEqual(all_response.status_code, 400)
+        self.assertEqual(all_data['errors']['limit'], 'limit must be an integer between 1 and 500.')
+
 
 class TestTicket(TestEventBlueprint):
     def test_redeem_a_ticket(self):
@@ -449,5 +839,270 @@ class TestTicket(TestEventBlueprint):
         self.assertEqual(all_data['data'][1]['number_of_tickets'], 5)
         self.assertEqual(all_data['data'][1]['number_of_redeemed_tickets'], 1)
 
+    def test_redeem_a_batch_of_tickets(self):
+        """ Test redeeming a batch of tickets """
+        reg_response = self.register_user('dummy_username', '12345678')
+
+        auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+        event_response = self.create_event(
+            name='test',
+            date=datetime.now().date(),
+            initial_number_of_tickets=3,
+            auth_token=auth_token)
+
+        event_data = json.loads(event_response.data.decode())
+
+        download_response = self.client.get(
+                f'event/download/{event_data["eventIdentifier"]}',
+                content_type='application/json',
+                headers=dict(Authorization=auth_token)
+            )
+
+        ticketIdentifiers = json.loads(download_response.data.decode())['data']['ticketIdentifiers']
+
+        # Redeem one ticket ahead of the batch
+        redeem_response = self.client.get(f'redeem/{ticketIdentifiers[0]}')
+
+        self.assertEqual(redeem_response.status_code, 200)
+
+        unknownIdentifier = str(uuid.uuid4())
+
+        batch_response = self.client.post(
+                'redeem/batch',
+                content_type='application/json',
+                data=json.dumps(dict(
+                    ticketIdentifiers=ticketIdentifiers + [unknownIdentifier, 'not-a-ticket']
+                ))
+            )
+
+        batch_data = json.loads(batch_response.data.decode())
+
+        self.assertEqual(batch_response.status_code, 200)
+        self.assertEqual(batch_response.content_type, 'application/json')
+        self.assertEqual(batch_data['status'], 'success')
+        self.assertEqual(batch_data['data'], {
+            ticketIdentifiers[0]: 'already_redeemed',
+            ticketIdentifiers[1]: 'redeemed',
+            ticketIdentifiers[2]: 'redeemed',
+            unknownIdentifier: 'invalid',
+            'not-a-ticket': 'invalid'
+        })
+
+        self.assertEqual(Ticket.query.filter_by(is_redeemed=False).count(), 0)
+
+    def test_raced_batch_keeps_the_transaction(self):
+        """ Test a batch redemption raced by another is retried without undoing the caller's writes """
+        reg_response = self.register_user('dummy_username', '12345678')
+
+        auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+        event_response = self.create_event(
+            name='test',
+            date=datetime.now().date(),
+            initial_number_of_tickets=3,
+            auth_token=auth_token)
+
+        event = Event.query.filter_by(guid=uuid.UUID(json.loads(event_response.data.decode())['eventIdentifier']).bytes).first()
+        guids = [row.guid for row in db.session.query(Ticket.guid).filter_by(event_id=event.id)]
+
+        redeem_many = Ticket._redeem_many
+        attempts = []
+
+        def raced_once(ticket_guids):
+            outcomes = redeem_many(ticket_guids)
+            attempts.append(outcomes)
+            return None if len(attempts) == 1 else outcomes
+
+        # Written by the caller ahead of the batch
+        event.name = 'renamed'
+        db.session.flush()
+
+        with mock.patch.object(Ticket, '_redeem_many', side_effect=raced_once):
+            outcomes = Ticket.redeem_many(guids)
+        db.session.commit()
+
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(set(outcomes.values()), {'redeemed'})
+
+        event = Event.query.get(event.id)
+        self.assertEqual(event.name, 'renamed')
+        self.assertEqual(event.number_of_redeemed_tickets, 3)
+
+    def test_redeem_a_too_large_batch_of_tickets(self):
+        """ Test redeeming a batch of tickets larger than allowed """
+        batch_response = self.client.post(
+                'redeem/batch',
+                content_type='application/json',
+                data=json.dumps(dict(
+                    ticketIdentifiers=[str(uuid.uuid4()) for _ in range(1001)]
+                ))
+            )
+
+        batch_data = json.loads(batch_response.data.decode())
+
+        self.assertEqual(batch_response.status_code, 400)
+        self.assertEqual(batch_data['message'], 'Input payload validation failed')
+        self.assertEqual(
+            batch_data['errors']['ticketIdentifiers'],
+            'ticketIdentifiers must be a list of between 1 and 1000 strings.')
+
+    def test_status_of_a_batch_of_tickets(self):
+        """ Test checking the status of a batch of tickets """
+        reg_response = self.register_user('dummy_username', '12345678')
+
+        auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+        event_response = self.create_event(
+            name='test',
+            date=datetime.now().date(),
+            initial_number_of_tickets=2,
+            auth_token=auth_token)
+
+        event_data = json.loads(event_response.data.decode())
+
+        download_response = self.client.get(
+                f'event/download/{event_data["eventIdentifier"]}',
+                content_type='application/json',
+                headers=dict(Authorization=auth_token)
+            )
+
+        ticketIdentifiers = json.loads(download_response.data.decode())['data']['ticketIdentifiers']
+
+        redeem_response = self.client.get(f'redeem/{ticketIdentifiers[0]}')
+
+        self.assertEqual(redeem_response.status_code, 200)
+
+        unknownIdentifier = str(uuid.uuid4())
+
+        status_response = self.client.post(
+                'status/batch',
+                content_type='application/json',
+                headers=dict(Authorization=auth_token),
+                data=json.dumps(dict(
+                    ticketIdentifiers=ticketIdentifiers + [unknownIdentifier, 'not-a-ticket']
+                ))
+            )
+
+        status_data = json.loads(status_response.data.decode())
+
+        self.assertEqual(status_response.status_code, 200)
+        self.assertEqual(status_response.content_type, 'application/json')
+        self.assertEqual(status_data['status'], 'success')
+        self.assertEqual(status_data['data'], {
+            ticketIdentifiers[0]: 'redeemed',
+            ticketIdentifiers[1]: 'unredeemed',
+            unknownIdentifier: 'invalid',
+            'not-a-ticket': 'invalid'
+        })
+
+    def test_status_of_a_batch_of_tickets_with_invalid_token(self):
+        """ Test checking the status of a batch of tickets with an invalid token """
+        status_response = self.client.post(
+                'status/batch',
+                content_type='application/json',
+                headers=dict(Authorization='invalid_token'),
+                data=json.dumps(dict(ticketIdentifiers=[str(uuid.uuid4())]))
+            )
+
+        status_data = json.loads(status_response.data.decode())
+
+        self.assertEqual(status_response.status_code, 401)
+        self.assertEqual(status_data['status'], 'fail')
+
+
+class TestTicketConcurrency(FileDatabaseTestCase, TestEventBlueprint):
+    def test_concurrent_redemption(self):
+        """ Test each ticket is redeemed exactly once by concurrent scanners """
+        reg_response = self.register_user('dummy_username', '12345678')
+
+        auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+        event_response = self.create_event(
+            name='test',
+            date=datetime.now().date(),
+            initial_number_of_tickets=20,
+            auth_token=auth_token)
+
+        event_data = json.loads(event_response.data.decode())
+
+        download_response = self.client.get(
+                f'event/download/{event_data["eventIdentifier"]}',
+                content_type='application/json',
+                headers=dict(Authorization=auth_token)
+            )
+
+        ticketIdentifiers = json.loads(download_response.data.decode())['data']['ticketIdentifiers']
+
+        def scan(ticketIdentifiers):
+            client = self.app.test_client()
+            return [
+                (ticketIdentifier, client.get(f'redeem/{ticketIdentifier}').status_code)
+                for ticketIdentifier in ticketIdentifiers
+            ]
+
+        n_scanners = 8
+        scans = [random.sample(ticketIdentifiers, len(ticketIdentifiers)) for _ in range(n_scanners)]
+
+        with ThreadPoolExecutor(max_workers=n_scanners) as executor:
+            results = [outcome for outcomes in executor.map(scan, scans) for outcome in outcomes]
+
+        status_codes = Counter(status_code for _, status_code in results)
+        redeemed = Counter(ticketIdentifier for ticketIdentifier, status_code in results if status_code == 200)
+
+        self.assertEqual(set(status_codes), {200, 410})
+        self.assertEqual(status_codes[200], len(ticketIdentifiers))
+        self.assertEqual(status_codes[410], (n_scanners - 1) * len(ticketIdentifiers))
+        self.assertEqual(set(redeemed.values()), {1})
+
+        self.assertEqual(Ticket.query.filter_by(is_redeemed=False).count(), 0)
+
+    def test_concurrent_batch_redemption(self):
+        """ Test each ticket is redeemed exactly once by concurrent batches """
+        reg_response = self.register_user('dummy_username', '12345678')
+
+        auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+        event_response = self.create_event(
+            name='test',
+            date=datetime.now().date(),
+            initial_number_of_tickets=200,
+            auth_token=auth_token)
+
+        event_data = json.loads(event_response.data.decode())
+
+        download_response = self.client.get(
+                f'event/download/{event_data["eventIdentifier"]}',
+                content_type='application/json',
+                headers=dict(Authorization=auth_token)
+            )
+
+        ticketIdentifiers = json.loads(download_response.data.decode())['data']['ticketIdentifiers']
+
+        def scan(ticketIdentifiers):
+            client = self.app.test_client()
+            outcomes = []
+            for i in range(0, len(ticketIdentifiers), 25):
+                response = client.post(
+                    'redeem/batch',
+                    content_type='application/json',
+                    data=json.dumps(dict(ticketIdentifiers=ticketIdentifiers[i:i + 25]))
+                )
+                outcomes.extend(json.loads(response.data.decode())['data'].items())
+            return outcomes
+
+        n_scanners = 4
+        scans = [random.sample(ticketIdentifiers, len(ticketIdentifiers)) for _ in range(n_scanners)]
+
+        with ThreadPoolExecutor(max_workers=n_scanners) as executor:
+            results = [outcome for outcomes in executor.map(scan, scans) for outcome in outcomes]
+
+        redeemed = Counter(ticketIdentifier for ticketIdentifier, outcome in results if outcome == 'redeemed')
+
+        self.assertEqual(len(results), n_scanners * len(ticketIdentifiers))
+        self.assertEqual(set(redeemed), set(ticketIdentifiers))
+        self.assertEqual(set(redeemed.values()), {1})
+
+
 if __name__ == '__main__':
     unittest.main()
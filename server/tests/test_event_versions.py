@@ -0,0 +1,162 @@
+import json
+import unittest
+import uuid
+from datetime import datetime
+from unittest import mock
+
+from sqlalchemy import event as sa_event
+
+from tests.test_event_ticket import TestEventBlueprint
+from simple_events.models import db
+from simple_events.models.event import Event
+
+
+class TestEventVersions(TestEventBlueprint):
+    def setUp(self):
+        super().setUp()
+        reg_response = self.register_user('dummy_username', '12345678')
+        self.auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+        event_response = self.create_event(
+            name='test',
+            date=datetime.now().date(),
+            initial_number_of_tickets=3,
+            auth_token=self.auth_token)
+        self.eventIdentifier = json.loads(event_response.data.decode())['eventIdentifier']
+
+        download_response = self.client.get(
+                f'event/download/{self.eventIdentifier}',
+                headers=dict(Authorization=self.auth_token)
+            )
+        self.ticketIdentifiers = json.loads(download_response.data.decode())['data']['ticketIdentifiers']
+
+    def get(self, url, etag=None, auth_token=None):
+        headers = dict(Authorization=auth_token or self.auth_token)
+        if etag is not None:
+            headers['If-None-Match'] = etag
+        return self.client.get(url, headers=headers)
+
+    def test_not_modified(self):
+        """ Test the listing and status answer 304 until an event changes, reading only the version """
+        for url in ('event/all', f'event/status/{self.eventIdentifier}'):
+            response = self.get(url)
+            etag = response.headers['ETag']
+
+            self.assertEqual(response.status_code, 200)
+
+            statements = []
+
+            def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+
+            engine = db.get_engine(self.app)
+            sa_event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+            try:
+                not_modified = self.get(url, etag)
+            finally:
+                sa_event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+            self.assertEqual(not_modified.status_code, 304)
+            self.assertEqual(not_modified.headers['ETag'], etag)
+            self.assertEqual(not_modified.data, b'')
+            self.assertEqual(len([statement for statement in statements if 'FROM event' in statement]), 1)
+
+            self.assertEqual(self.get(url, 'W/' + etag).status_code, 304)
+            self.assertEqual(self.get(url, '"other", ' + etag).status_code, 304)
+            self.assertEqual(self.get(url, '"other"').status_code, 200)
+
+    def test_changes_move_version(self):
+        """ Test redeeming and creating events change the version, and repeated scans don't """
+        etag = self.get('event/all').headers['ETag']
+
+        self.client.get(f'redeem/{self.ticketIdentifiers[0]}')
+
+        response = self.get('event/all', etag)
+        redeemed_etag = response.headers['ETag']
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(redeemed_etag, etag)
+        self.assertEqual(json.loads(response.data.decode())['data'][0]['number_of_redeemed_tickets'], 1)
+
+        # Nothing written to the event
+        self.client.get(f'redeem/{self.ticketIdentifiers[0]}')
+
+        self.assertEqual(self.get('event/all', redeemed_etag).status_code, 304)
+
+        self.create_event(
+            name='other',
+            date=datetime.now().date(),
+            initial_number_of_tickets=1,
+            auth_token=self.auth_token)
+
+        response = self.get('event/all', redeemed_etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json.loads(response.data.decode())['data']), 2)
+
+    def test_changes_of_other_processes(self):
+        """ Test the version moves with changes written by any process, straight to the database """
+        etag = self.get('event/all').headers['ETag']
+
+        event_id = db.session.query(Event.id).filter_by(guid=uuid.UUID(self.eventIdentifier).bytes).scalar()
+        Event.increment_counters(event_id, number_of_redeemed_tickets=1)
+        db.session.commit()
+
+        response = self.get('event/all', etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data.decode())['data'][0]['number_of_redeemed_tickets'], 1)
+
+        etag = response.headers['ETag']
+        hidden = Event(
+            name='hidden', date=datetime.now().date(), initial_number_of_tickets=1, author_id=None, is_visible=False)
+        db.session.add(hidden)
+        db.session.commit()
+
+        etag_with_hidden = self.get('event/all', etag).headers['ETag']
+
+        self.assertNotEqual(etag_with_hidden, etag)
+
+        Event.discard(hidden.id)
+        db.session.commit()
+
+        self.assertEqual(self.get('event/all', etag_with_hidden).status_code, 200)
+
+    def test_changes_timed_before_the_latest(self):
+        """ Test the version moves with a change timed before the latest, as by a node whose clock is behind """
+        etag = self.get('event/all').headers['ETag']
+
+        event_id = db.session.query(Event.id).filter_by(guid=uuid.UUID(self.eventIdentifier).bytes).scalar()
+        with mock.patch('simple_events.models.event.datetime') as clock:
+            clock.utcnow.return_value = datetime(2000, 1, 1)
+            Event.increment_counters(event_id, number_of_redeemed_tickets=1)
+        db.session.commit()
+
+        response = self.get('event/all', etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_rolled_back_changes(self):
+        """ Test a rolled back change leaves the version be """
+        etag = self.get('event/all').headers['ETag']
+
+        event_id = db.session.query(Event.id).filter_by(guid=uuid.UUID(self.eventIdentifier).bytes).scalar()
+        Event.increment_counters(event_id, number_of_redeemed_tickets=1)
+        db.session.rollback()
+        db.session.commit()
+
+        self.assertEqual(self.get('event/all', etag).status_code, 304)
+
+    def test_not_modified_requires_authorisation(self):
+        """ Test a request holding the current version is still refused without a valid token """
+        etag = self.get('event/all').headers['ETag']
+
+        response = self.get('event/all', etag, auth_token='invalid')
+
+        self.assertEqual(response.status_code, 401)
+        self.assertNotIn('ETag', response.headers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import json
+import unittest
+
+from simple_events.models import bcrypt
+from simple_events.core.hashing import password_hasher, HashingServiceBusy
+from tests.base import BaseTestCase
+
+
+class TestPasswordHasher(BaseTestCase):
+    def test_hashing_inline(self):
+        pw_hash = password_hasher.generate_password_hash('12345678', 4)
+
+        self.assertTrue(password_hasher.check_password_hash(pw_hash, '12345678'))
+        self.assertFalse(password_hasher.check_password_hash(pw_hash, '87654321'))
+
+    def test_hashing_in_worker_processes(self):
+        self.app.config['PASSWORD_HASHING_WORKERS'] = 1
+        password_hasher.init_app(self.app)
+        self.addCleanup(password_hasher.shutdown)
+
+        pw_hash = password_hasher.generate_password_hash('12345678', 4)
+
+        self.assertTrue(password_hasher.check_password_hash(pw_hash, '12345678'))
+        self.assertFalse(password_hasher.check_password_hash(pw_hash, '87654321'))
+        # Interchangeable with hashes made by Flask-Bcrypt
+        self.assertTrue(bcrypt.check_password_hash(pw_hash, '12345678'))
+
+    def test_saturated_hashing_is_refused(self):
+        self.register_user('dummy_username', '12345678')
+
+        self.app.config['PASSWORD_HASHING_WORKERS'] = 1
+        self.app.config['PASSWORD_HASHING_MAX_PENDING'] = 1
+        password_hasher.init_app(self.app)
+
+        # Stand in for a hash already pending
+        password_hasher._pending.acquire()
+        self.addCleanup(password_hasher._pending.release)
+
+        with self.assertRaises(HashingServiceBusy):
+            password_hasher.generate_password_hash('12345678', 4)
+
+        response = self.login_user('dummy_username', '12345678')
+        data = json.loads(response.data.decode())
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+        self.assertEqual(data['status'], 'fail')
+        self.assertEqual(data['message'], 'The server is busy. Please try again.')
+
+        response = self.register_user('other_username', '12345678')
+
+        self.assertEqual(response.status_code, 503)
+
+
+if __name__ == '__main__':
+    unittest.main()
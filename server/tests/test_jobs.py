@@ -0,0 +1,255 @@
+import json
+import time
+import unittest
+import uuid
+from datetime import datetime, timedelta
+from unittest import mock
+
+from tests.base import FileDatabaseTestCase
+from tests.test_event_ticket import TestEventBlueprint
+from simple_events.models import db
+from simple_events.models.event import Event, Ticket
+from simple_events.models.job import TicketJob, PENDING, RUNNING, COMPLETE, FAILED
+from simple_events.core.jobs import ticket_jobs
+from simple_events.core.minting import mint_tickets
+
+
+class TestJobsBlueprint(TestEventBlueprint):
+    def setUp(self):
+        super().setUp()
+        self.app.config['MINTING_CHUNK_SIZE'] = 3
+        ticket_jobs.init_app(self.app)
+
+        reg_response = self.register_user('dummy_username', '12345678')
+        self.auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+    def create_event_async(self, initial_number_of_tickets):
+        return self.client.post(
+                'event/create',
+                data=json.dumps({
+                    'name': 'test',
+                    'date': str(datetime.now().date()),
+                    'initial_number_of_tickets': initial_number_of_tickets,
+                    'async': True
+                }),
+                content_type='application/json',
+                headers=dict(Authorization=self.auth_token)
+            )
+
+    def get_job(self, jobIdentifier):
+        return self.client.get(
+                f'event/jobs/{jobIdentifier}',
+                headers=dict(Authorization=self.auth_token)
+            )
+
+
+class TestJobs(TestJobsBlueprint):
+    def test_creating_event_async(self):
+        """ Test creating an event with its tickets minted by a job """
+        event_response = self.create_event_async(initial_number_of_tickets=10)
+        event_data = json.loads(event_response.data.decode())
+
+        self.assertEqual(event_response.status_code, 202)
+        self.assertEqual(event_data['status'], 'success')
+        self.assertEqual(event_data['message'], 'Created event "test", its tickets are being minted.')
+        self.assertTrue(event_data['eventIdentifier'])
+        self.assertTrue(event_data['jobIdentifier'])
+
+        # Without workers, in testing, the job has run inline
+        job_response = self.get_job(event_data['jobIdentifier'])
+        job_data = json.loads(job_response.data.decode())
+
+        self.assertEqual(job_response.status_code, 200)
+        self.assertEqual(job_data['status'], 'success')
+        self.assertEqual(job_data['data'], {
+            'eventIdentifier': event_data['eventIdentifier'],
+            'state': COMPLETE,
+            'number_of_tickets': 10,
+            'number_of_minted_tickets': 10,
+            'error': None
+        })
+
+        event = Event.query.filter_by(guid=uuid.UUID(event_data['eventIdentifier']).bytes).first()
+
+        self.assertTrue(event.is_visible)
+        self.assertEqual(event.number_of_tickets, 10)
+        self.assertEqual(Ticket.query.filter_by(event_id=event.id).count(), 10)
+
+    def test_adding_tickets_async(self):
+        """ Test adding tickets to an event with a job """
+        event_response = self.create_event(
+            name='test',
+            date=datetime.now().date(),
+            initial_number_of_tickets=2,
+            auth_token=self.auth_token)
+
+        eventIdentifier = json.loads(event_response.data.decode())['eventIdentifier']
+
+        add_response = self.client.put(
+                f'event/add/{eventIdentifier}',
+                data=json.dumps({'additionalNumberOfTickets': 7, 'async': True}),
+                content_type='application/json',
+                headers=dict(Authorization=self.auth_token)
+            )
+        add_data = json.loads(add_response.data.decode())
+
+        self.assertEqual(add_response.status_code, 202)
+        self.assertEqual(add_data['message'], 'Adding 7 event tickets, they are being minted.')
+
+        job_data = json.loads(self.get_job(add_data['jobIdentifier']).data.decode())
+
+        self.assertEqual(job_data['data']['state'], COMPLETE)
+        self.assertEqual(job_data['data']['number_of_minted_tickets'], 7)
+
+        event = Event.query.filter_by(guid=uuid.UUID(eventIdentifier).bytes).first()
+
+        self.assertEqual(event.additional_number_of_tickets, 7)
+        self.assertEqual(event.number_of_tickets, 9)
+        self.assertEqual(Ticket.query.filter_by(event_id=event.id).count(), 9)
+
+    def test_job_with_invalid_identifier(self):
+        """ Test the progress of an unknown job """
+        job_response = self.get_job(uuid.uuid4())
+        job_data = json.loads(job_response.data.decode())
+
+        self.assertEqual(job_response.status_code, 402)
+        self.assertEqual(job_data['status'], 'fail')
+        self.assertEqual(job_data['message'], 'Invalid jobIdentifier.')
+
+    def create_interrupted_job(self, number_of_tickets, number_of_minted_tickets, lease_expires_utc):
+        event = Event(
+            name='test',
+            date=datetime.now().date(),
+            initial_number_of_tickets=number_of_tickets,
+            author_id=None)
+        db.session.add(event)
+        db.session.flush()
+
+        job = TicketJob(event_id=event.id, author_id=None, number_of_tickets=number_of_tickets)
+        job.state = RUNNING
+        job.owner = 'stopped_process'
+        job.lease_expires_utc = lease_expires_utc
+        job.number_of_minted_tickets = number_of_minted_tickets
+        db.session.add(job)
+
+        # The tickets the stopped process committed
+        for _ in range(number_of_minted_tickets):
+            db.session.add(Ticket(event_id=event.id, author_id=None))
+        Event.increment_counters(event.id, number_of_tickets=number_of_minted_tickets)
+
+        db.session.commit()
+        return event.id, job.id
+
+    def test_resuming_an_abandoned_job(self):
+        """ Test a job whose process stopped is finished from where it got to """
+        event_id, job_id = self.create_interrupted_job(
+            number_of_tickets=10,
+            number_of_minted_tickets=4,
+            lease_expires_utc=datetime.utcnow() - timedelta(seconds=1))
+
+        self.assertEqual(ticket_jobs.resume(), [job_id])
+
+        job = TicketJob.query.get(job_id)
+
+        self.assertEqual(job.state, COMPLETE)
+        self.assertEqual(job.number_of_minted_tickets, 10)
+        self.assertIsNone(job.owner)
+        self.assertEqual(Ticket.query.filter_by(event_id=event_id).count(), 10)
+        self.assertEqual(Event.query.get(event_id).number_of_tickets, 10)
+
+    def test_job_held_by_another_process_is_not_resumed(self):
+        """ Test a job is left alone while another process holds its lease """
+        event_id, job_id = self.create_interrupted_job(
+            number_of_tickets=10,
+            number_of_minted_tickets=4,
+            lease_expires_utc=datetime.utcnow() + timedelta(seconds=60))
+
+        self.assertEqual(ticket_jobs.resume(), [])
+
+        ticket_jobs.run(job_id)
+
+        job = TicketJob.query.get(job_id)
+
+        self.assertEqual(job.state, RUNNING)
+        self.assertEqual(job.owner, 'stopped_process')
+        self.assertEqual(Ticket.query.filter_by(event_id=event_id).count(), 4)
+
+    def test_failed_job_is_retried(self):
+        """ Test a failed job is retried from where it got to once its retry is due """
+        calls = []
+
+        def fail_on_second_chunk(**kwargs):
+            calls.append(kwargs)
+            if len(calls) == 2:
+                raise RuntimeError('Minting failed.')
+            return mint_tickets(**kwargs)
+
+        with mock.patch('simple_events.core.jobs.mint_tickets', side_effect=fail_on_second_chunk):
+            event_data = json.loads(self.create_event_async(initial_number_of_tickets=10).data.decode())
+
+        job_data = json.loads(self.get_job(event_data['jobIdentifier']).data.decode())['data']
+
+        self.assertEqual(job_data['state'], FAILED)
+        self.assertEqual(job_data['number_of_minted_tickets'], 3)
+
+        event = Event.query.filter_by(guid=uuid.UUID(event_data['eventIdentifier']).bytes).first()
+        event_id = event.id
+
+        self.assertFalse(event.is_visible)
+
+        # Not retried until it's due
+        self.assertEqual(ticket_jobs.resume(), [])
+
+        job = TicketJob.query.filter_by(guid=uuid.UUID(event_data['jobIdentifier']).bytes).first()
+        job.lease_expires_utc = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+
+        self.assertEqual(ticket_jobs.resume(), [job.id])
+
+        job_data = json.loads(self.get_job(event_data['jobIdentifier']).data.decode())['data']
+
+        self.assertEqual(job_data['state'], COMPLETE)
+        self.assertEqual(job_data['number_of_minted_tickets'], 10)
+        self.assertIsNone(job_data['error'])
+        self.assertTrue(Event.query.get(event_id).is_visible)
+        self.assertEqual(Ticket.query.filter_by(event_id=event_id).count(), 10)
+
+
+class TestJobWorkers(FileDatabaseTestCase, TestJobsBlueprint):
+    def setUp(self):
+        super().setUp()
+        self.app.config['TICKET_JOB_WORKERS'] = 2
+        ticket_jobs.init_app(self.app)
+
+    def tearDown(self):
+        ticket_jobs.shutdown()
+        super().tearDown()
+
+    def test_minting_in_worker_threads(self):
+        """ Test jobs are run by the worker threads while requests return """
+        jobIdentifiers = [
+            json.loads(self.create_event_async(initial_number_of_tickets=50).data.decode())['jobIdentifier']
+            for _ in range(3)
+        ]
+
+        deadline = time.time() + 30
+        states = {}
+        while time.time() < deadline:
+            states = {
+                jobIdentifier: json.loads(self.get_job(jobIdentifier).data.decode())['data']
+                for jobIdentifier in jobIdentifiers
+            }
+            if all(job['state'] == COMPLETE for job in states.values()):
+                break
+            time.sleep(0.05)
+
+        for job in states.values():
+            self.assertEqual(job['state'], COMPLETE)
+            self.assertEqual(job['number_of_minted_tickets'], 50)
+
+        self.assertEqual(Ticket.query.count(), 150)
+        self.assertEqual(TicketJob.query.filter(TicketJob.state == PENDING).count(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
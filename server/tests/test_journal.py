@@ -0,0 +1,208 @@
+import json
+import os
+import tempfile
+import unittest
+import uuid
+from datetime import datetime
+from unittest import mock
+
+from tests.base import FileDatabaseTestCase
+from tests.test_event_ticket import TestEventBlueprint
+from simple_events.models.event import Event, Ticket
+from simple_events.core.journal import RedemptionJournal, redemption_journal, CHECKPOINT_SUFFIX
+
+
+class TestRedemptionJournal(FileDatabaseTestCase, TestEventBlueprint):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.mkdtemp()
+        self.journal_path = os.path.join(directory, 'redemptions.journal')
+        self.addCleanup(os.rmdir, directory)
+        self.addCleanup(self.remove_journal)
+
+        self.app.config['REDEMPTION_JOURNAL_FILE'] = self.journal_path
+        # Applied by the tests themselves
+        self.app.config['REDEMPTION_JOURNAL_APPLY_MS'] = 60 * 1000
+        redemption_journal.init_app(self.app)
+
+        reg_response = self.register_user('dummy_username', '12345678')
+        self.auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+        event_response = self.create_event(
+            name='test',
+            date=datetime.now().date(),
+            initial_number_of_tickets=5,
+            auth_token=self.auth_token)
+        self.eventIdentifier = json.loads(event_response.data.decode())['eventIdentifier']
+
+        download_response = self.client.get(
+                f'event/download/{self.eventIdentifier}',
+                headers=dict(Authorization=self.auth_token)
+            )
+        self.ticketIdentifiers = json.loads(download_response.data.decode())['data']['ticketIdentifiers']
+
+    def remove_journal(self):
+        redemption_journal.shutdown()
+        for path in (self.journal_path, self.journal_path + CHECKPOINT_SUFFIX, *self.rotated_paths()):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def rotated_paths(self):
+        directory, name = os.path.split(self.journal_path)
+        return sorted(
+            os.path.join(directory, rotated_name) for rotated_name in os.listdir(directory)
+            if rotated_name.startswith(name + '.2'))
+
+    def number_of_redeemed_tickets(self):
+        event = Event.query.filter_by(guid=uuid.UUID(self.eventIdentifier).bytes).first()
+        return event.number_of_redeemed_tickets
+
+    def test_redemptions_journaled_then_applied(self):
+        """ Test scans are answered from the journal, and applied to the database later """
+        with mock.patch('simple_events.models.event.Ticket.redeem') as redeem, \
+                mock.patch('simple_events.models.event.Ticket.redeem_many') as redeem_many:
+            self.assertEqual(self.client.get(f'redeem/{self.ticketIdentifiers[0]}').status_code, 200)
+            self.assertEqual(self.client.get(f'redeem/{self.ticketIdentifiers[0]}').status_code, 410)
+            self.assertEqual(self.client.get(f'redeem/{uuid.uuid4()}').status_code, 402)
+
+            redeem_response = self.client.post(
+                    'redeem/batch',
+                    content_type='application/json',
+                    data=json.dumps(dict(ticketIdentifiers=self.ticketIdentifiers[:3]))
+                )
+            self.assertEqual(json.loads(redeem_response.data.decode())['data'], {
+                self.ticketIdentifiers[0]: 'already_redeemed',
+                self.ticketIdentifiers[1]: 'redeemed',
+                self.ticketIdentifiers[2]: 'redeemed'
+            })
+
+            redeem.assert_not_called()
+            redeem_many.assert_not_called()
+
+        status_response = self.client.get(
+                f'status/{self.ticketIdentifiers[1]}',
+                headers=dict(Authorization=self.auth_token)
+            )
+        self.assertEqual(status_response.status_code, 410)
+        self.assertEqual(self.number_of_redeemed_tickets(), 0)
+
+        with open(self.journal_path) as journal:
+            lines = journal.read().splitlines()
+        self.assertEqual([line.split()[1] for line in lines], self.ticketIdentifiers[:3])
+
+        self.assertEqual(redemption_journal.apply(), 3)
+        self.assertEqual(self.number_of_redeemed_tickets(), 3)
+        self.assertEqual(redemption_journal.backlog, 0)
+
+        # Timed by when scanned, not applied
+        ticket = Ticket.query.filter_by(guid=uuid.UUID(self.ticketIdentifiers[0]).bytes).first()
+        self.assertEqual(ticket.redeemed_on_utc.isoformat(timespec='microseconds') + 'Z', lines[0].split()[0])
+
+    def test_replay_after_crash(self):
+        """ Test entries the database is missing are applied on starting, and torn ones dropped """
+        self.client.get(f'redeem/{self.ticketIdentifiers[0]}')
+        redemption_journal.apply()
+        self.client.get(f'redeem/{self.ticketIdentifiers[1]}')
+
+        # The process stops before applying the second, part way through writing a third
+        with mock.patch.object(RedemptionJournal, 'apply'):
+            redemption_journal.shutdown()
+
+        with open(self.journal_path, 'ab') as journal:
+            journal.write(b'2030-01-01T00:00:00.000000Z ' + self.ticketIdentifiers[2][:10].encode())
+
+        self.assertEqual(self.number_of_redeemed_tickets(), 1)
+
+        redemption_journal.start()
+
+        self.assertEqual(self.number_of_redeemed_tickets(), 2)
+        self.assertEqual(redemption_journal.backlog, 0)
+
+        # Both applied, so left to the database
+        guids = [uuid.UUID(ticketIdentifier).bytes for ticketIdentifier in self.ticketIdentifiers]
+        self.assertEqual(redemption_journal.known_redeemed(guids), [])
+
+        with open(self.journal_path) as journal_file:
+            self.assertEqual(len(journal_file.read().splitlines()), 2)
+
+    def test_applied_guids_dropped_from_memory(self):
+        """ Test only guids yet to be applied are held, those applied are refused by the database """
+        self.client.get(f'redeem/{self.ticketIdentifiers[0]}')
+        guid = uuid.UUID(self.ticketIdentifiers[0]).bytes
+
+        self.assertEqual(redemption_journal.known_redeemed([guid]), [guid])
+
+        redemption_journal.apply()
+
+        self.assertEqual(redemption_journal.known_redeemed([guid]), [])
+        self.assertEqual(self.client.get(f'redeem/{self.ticketIdentifiers[0]}').status_code, 410)
+
+        redemption_journal.shutdown()
+        redemption_journal.start()
+
+        self.assertEqual(redemption_journal.known_redeemed([guid]), [])
+
+    def test_applied_while_reading_states(self):
+        """ Test states read before the tickets were applied and dropped from memory are read again """
+        self.client.get(f'redeem/{self.ticketIdentifiers[0]}')
+        guid = uuid.UUID(self.ticketIdentifiers[0]).bytes
+
+        status_many = Ticket.status_many
+        stale_states = status_many([guid])
+
+        def apply_then_read(guids):
+            # The applier runs between the first read and the journal's lock
+            if not redemption_journal.backlog:
+                return status_many(guids)
+            redemption_journal.apply()
+            return stale_states
+
+        with mock.patch('simple_events.models.event.Ticket.status_many', side_effect=apply_then_read):
+            self.assertEqual(redemption_journal.redeem([guid]), {guid: 'already_redeemed'})
+
+    def test_failed_sync_not_held(self):
+        """ Test tickets whose entries failed to reach the disk aren't held as redeemed """
+        guid = uuid.UUID(self.ticketIdentifiers[0]).bytes
+
+        with mock.patch('simple_events.core.journal.os.fsync', side_effect=OSError):
+            with self.assertRaises(OSError):
+                redemption_journal.redeem([guid])
+
+        self.assertEqual(redemption_journal.known_redeemed([guid]), [])
+
+    def test_rotation(self):
+        """ Test the applied journal is rotated out, leaving what's yet to be applied """
+        self.app.config['REDEMPTION_JOURNAL_ROTATE_BYTES'] = 1
+        redemption_journal.init_app(self.app)
+
+        self.client.get(f'redeem/{self.ticketIdentifiers[0]}')
+        self.client.get(f'redeem/{self.ticketIdentifiers[1]}')
+
+        with open(self.journal_path) as journal:
+            entries = journal.read()
+
+        redemption_journal.apply()
+
+        rotated = self.rotated_paths()
+        self.assertEqual(len(rotated), 1)
+
+        with open(rotated[0]) as rotated_journal:
+            self.assertEqual(rotated_journal.read(), entries)
+        self.assertEqual(os.path.getsize(self.journal_path), 0)
+
+        self.client.get(f'redeem/{self.ticketIdentifiers[2]}')
+        self.assertEqual(self.client.get(f'redeem/{self.ticketIdentifiers[0]}').status_code, 410)
+
+        redemption_journal.shutdown()
+        redemption_journal.start()
+
+        self.assertEqual(self.number_of_redeemed_tickets(), 3)
+        self.assertEqual(redemption_journal.backlog, 0)
+
+        with open(self.journal_path + CHECKPOINT_SUFFIX) as checkpoint:
+            self.assertEqual(int(checkpoint.read()), 0)
+        self.assertEqual(os.path.getsize(self.journal_path), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
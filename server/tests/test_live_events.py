@@ -0,0 +1,218 @@
+import json
+import unittest
+import uuid
+from datetime import datetime
+from unittest import mock
+
+from tests.test_event_ticket import TestEventBlueprint
+from simple_events.models import db
+from simple_events.models.event import Event, Ticket
+from simple_events.core.live_events import LiveEvent, live_events
+
+
+class TestLiveEvent(unittest.TestCase):
+    def test_finding_tickets(self):
+        """ Test tickets are found by position in the sorted guids """
+        guids = [uuid.uuid4().bytes for _ in range(1000)]
+        live_event = LiveEvent(1, guids, guids[:10])
+
+        self.assertEqual(live_event.nbytes, 1000 * 16 + 125)
+        self.assertEqual(live_event.number_of_redeemed_tickets, 10)
+
+        for i, guid in enumerate(guids):
+            index = live_event.index(guid)
+
+            self.assertEqual(live_event.guids[index * 16:index * 16 + 16], guid)
+            self.assertEqual(live_event.is_redeemed(index), i < 10)
+
+        self.assertIsNone(live_event.index(uuid.uuid4().bytes))
+
+        live_event.set_redeemed(live_event.index(guids[10]))
+        live_event.set_redeemed(live_event.index(guids[10]))
+
+        self.assertTrue(live_event.is_redeemed(live_event.index(guids[10])))
+        self.assertEqual(live_event.number_of_redeemed_tickets, 11)
+
+
+class TestLiveEvents(TestEventBlueprint):
+    def setUp(self):
+        super().setUp()
+        reg_response = self.register_user('dummy_username', '12345678')
+        self.auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+        event_response = self.create_event(
+            name='test',
+            date=datetime.now().date(),
+            initial_number_of_tickets=5,
+            auth_token=self.auth_token)
+        self.eventIdentifier = json.loads(event_response.data.decode())['eventIdentifier']
+
+        download_response = self.client.get(
+                f'event/download/{self.eventIdentifier}',
+                headers=dict(Authorization=self.auth_token)
+            )
+        self.ticketIdentifiers = json.loads(download_response.data.decode())['data']['ticketIdentifiers']
+
+    def mark_live(self, live=True):
+        return self.client.put(
+                f'event/live/{self.eventIdentifier}',
+                data=json.dumps({'live': live}),
+                content_type='application/json',
+                headers=dict(Authorization=self.auth_token)
+            )
+
+    def get_status(self, ticketIdentifier):
+        return self.client.get(
+                f'status/{ticketIdentifier}',
+                headers=dict(Authorization=self.auth_token)
+            )
+
+    def test_marking_event_live(self):
+        """ Test a live event's tickets are held in memory until it isn't live """
+        live_response = self.mark_live()
+
+        self.assertEqual(live_response.status_code, 200)
+        self.assertEqual(json.loads(live_response.data.decode())['message'], 'Successfully marked event "test" live.')
+        self.assertEqual(live_events.number_of_tickets, 5)
+
+        self.assertEqual(self.mark_live(live=False).status_code, 200)
+        self.assertEqual(live_events.number_of_tickets, 0)
+
+        self.client.get(f'redeem/{self.ticketIdentifiers[0]}')
+        self.assertEqual(live_events.number_of_tickets, 0)
+
+    def test_scans_answered_from_memory(self):
+        """ Test repeated scans and status checks of a live event skip the database """
+        self.mark_live()
+
+        self.assertEqual(self.client.get(f'redeem/{self.ticketIdentifiers[0]}').status_code, 200)
+
+        with mock.patch('simple_events.models.event.Ticket.redeem') as redeem, \
+                mock.patch('simple_events.models.event.Ticket.redeem_many') as redeem_many, \
+                mock.patch('simple_events.models.event.Ticket.status_many') as status_many:
+            self.assertEqual(self.client.get(f'redeem/{self.ticketIdentifiers[0]}').status_code, 410)
+            self.assertEqual(self.get_status(self.ticketIdentifiers[0]).status_code, 410)
+            self.assertEqual(self.get_status(self.ticketIdentifiers[1]).status_code, 200)
+
+            status_response = self.client.post(
+                    'status/batch',
+                    content_type='application/json',
+                    headers=dict(Authorization=self.auth_token),
+                    data=json.dumps(dict(ticketIdentifiers=self.ticketIdentifiers[:2]))
+                )
+            self.assertEqual(json.loads(status_response.data.decode())['data'], {
+                self.ticketIdentifiers[0]: 'redeemed',
+                self.ticketIdentifiers[1]: 'unredeemed'
+            })
+
+            redeem.assert_not_called()
+            redeem_many.assert_not_called()
+            status_many.assert_not_called()
+
+        redeem_response = self.client.post(
+                'redeem/batch',
+                content_type='application/json',
+                data=json.dumps(dict(ticketIdentifiers=self.ticketIdentifiers[:3]))
+            )
+        self.assertEqual(json.loads(redeem_response.data.decode())['data'], {
+            self.ticketIdentifiers[0]: 'already_redeemed',
+            self.ticketIdentifiers[1]: 'redeemed',
+            self.ticketIdentifiers[2]: 'redeemed'
+        })
+        self.assertEqual(self.get_status(self.ticketIdentifiers[2]).status_code, 410)
+
+        event = Event.query.filter_by(guid=uuid.UUID(self.eventIdentifier).bytes).first()
+        self.assertEqual(event.number_of_redeemed_tickets, 3)
+
+    def test_redemptions_of_other_processes(self):
+        """ Test status catches up with tickets redeemed by another process """
+        self.mark_live()
+        guid = uuid.UUID(self.ticketIdentifiers[0]).bytes
+
+        # Redeemed behind the cache's back
+        Ticket.redeem(guid)
+        db.session.commit()
+
+        live_events.refresh_seconds = 60
+        self.assertEqual(self.get_status(self.ticketIdentifiers[0]).status_code, 200)
+
+        live_events.refresh_seconds = 0
+        self.assertEqual(self.get_status(self.ticketIdentifiers[0]).status_code, 410)
+
+        # Redemption is settled by the database whatever the cache holds
+        self.assertEqual(self.client.get(f'redeem/{self.ticketIdentifiers[0]}').status_code, 410)
+
+    def test_adding_tickets_to_live_event(self):
+        """ Test adding tickets reloads a live event """
+        self.mark_live()
+
+        self.client.put(
+            f'event/add/{self.eventIdentifier}',
+            data=json.dumps({'additionalNumberOfTickets': 3}),
+            content_type='application/json',
+            headers=dict(Authorization=self.auth_token)
+        )
+
+        self.assertEqual(self.get_status(self.ticketIdentifiers[0]).status_code, 200)
+        self.assertEqual(live_events.number_of_tickets, 8)
+
+    def test_too_many_live_tickets(self):
+        """ Test events are refused beyond the bound on live tickets """
+        live_events.max_tickets = 4
+
+        live_response = self.mark_live()
+
+        self.assertEqual(live_response.status_code, 409)
+        self.assertEqual(json.loads(live_response.data.decode())['message'], 'Too many tickets are live.')
+        self.assertEqual(live_events.number_of_tickets, 0)
+
+    def test_too_many_live_tickets_added(self):
+        """ Test tickets aren't added to a live event beyond the bound on live tickets """
+        self.mark_live()
+        live_events.max_tickets = 7
+
+        add_response = self.client.put(
+            f'event/add/{self.eventIdentifier}',
+            data=json.dumps({'additionalNumberOfTickets': 3}),
+            content_type='application/json',
+            headers=dict(Authorization=self.auth_token)
+        )
+
+        self.assertEqual(add_response.status_code, 409)
+        self.assertEqual(json.loads(add_response.data.decode())['message'], 'Too many tickets are live.')
+        self.assertEqual(live_events.number_of_tickets, 5)
+
+        event = Event.query.filter_by(guid=uuid.UUID(self.eventIdentifier).bytes).first()
+        self.assertEqual(event.number_of_tickets, 5)
+
+    def test_too_many_live_tickets_reloaded(self):
+        """ Test events grown beyond the bound elsewhere are left to the database """
+        self.mark_live()
+        live_events.max_tickets = 7
+
+        with mock.patch.object(live_events, 'has_room_for', return_value=True):
+            self.client.put(
+                f'event/add/{self.eventIdentifier}',
+                data=json.dumps({'additionalNumberOfTickets': 3}),
+                content_type='application/json',
+                headers=dict(Authorization=self.auth_token)
+            )
+
+        self.assertEqual(self.get_status(self.ticketIdentifiers[0]).status_code, 200)
+        self.assertEqual(live_events.number_of_tickets, 0)
+
+    def test_marking_invalid_event_live(self):
+        """ Test marking an unknown event live """
+        live_response = self.client.put(
+                f'event/live/{uuid.uuid4()}',
+                data=json.dumps({'live': True}),
+                content_type='application/json',
+                headers=dict(Authorization=self.auth_token)
+            )
+
+        self.assertEqual(live_response.status_code, 402)
+        self.assertEqual(json.loads(live_response.data.decode())['message'], 'Invalid eventIdentifier.')
+
+
+if __name__ == '__main__':
+    unittest.main()
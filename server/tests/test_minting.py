@@ -0,0 +1,55 @@
+import unittest
+import uuid
+from datetime import datetime
+
+from simple_events.models import db
+from simple_events.models.event import Event, Ticket
+from simple_events.models.auth import User
+from simple_events.core.minting import generate_guids, mint_tickets
+from tests.base import BaseTestCase
+
+
+class TestMinting(BaseTestCase):
+    def test_generate_guids(self):
+        guids = generate_guids(1000)
+
+        self.assertEqual(len(guids), 1000)
+        self.assertEqual(len(set(guids)), 1000)
+        self.assertTrue(all(len(guid) == 16 for guid in guids))
+        self.assertTrue(all(uuid.UUID(bytes=guid).version == 4 for guid in guids))
+        self.assertTrue(all(uuid.UUID(bytes=guid).variant == uuid.RFC_4122 for guid in guids))
+
+    def test_mint_tickets(self):
+        user = User(username='test_username', password='test')
+        db.session.add(user)
+        db.session.commit()
+
+        event = Event(
+            name='test',
+            date=datetime.now().date(),
+            author_id=user.id,
+            initial_number_of_tickets=25
+        )
+        db.session.add(event)
+        db.session.flush()
+
+        # Small block size so the tickets span several inserts
+        minted = mint_tickets(
+            event_id=event.id,
+            author_id=user.id,
+            number_of_tickets=25,
+            block_size=10)
+        db.session.commit()
+
+        self.assertEqual(minted, 25)
+
+        tickets = Ticket.query.filter_by(event_id=event.id).all()
+
+        self.assertEqual(len(tickets), 25)
+        self.assertEqual(len({ticket.guid for ticket in tickets}), 25)
+        self.assertTrue(all(ticket.author_id == user.id for ticket in tickets))
+        self.assertTrue(all(ticket.is_redeemed is False for ticket in tickets))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,218 @@
+import json
+import random
+import unittest
+import uuid
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from sqlalchemy import event as sa_event
+
+from tests.base import BaseTestCase
+from simple_events.models import db
+from simple_events.models.event import Event, Ticket
+from simple_events.models.auth import User
+from simple_events.core.minting import mint_tickets
+from simple_events.core.virtual_tickets import new_seed, derive_guids
+from simple_events.core.ticket_filter import ticket_filter
+from simple_events.config import TestingConfig
+
+
+NUMBER_OF_EVENTS = 200
+TICKETS_PER_EVENT = 100
+
+
+@unittest.skipUnless(
+    TestingConfig.SQLALCHEMY_DATABASE_URI.startswith('sqlite'),
+    'EXPLAIN QUERY PLAN is specific to SQLite')
+class TestQueryPlans(BaseTestCase):
+    """
+    Runs EXPLAIN QUERY PLAN on every statement issued by the event and ticket
+    endpoints against a seeded database, failing when one scans the whole
+    ticket table, looks up an event without an index, or sorts through a
+    temporary b-tree.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.users = []
+        for username in ('organiser', 'other_organiser'):
+            user = User(username=username, password='12345678')
+            db.session.add(user)
+            self.users.append(user)
+        db.session.flush()
+
+        self.events = [
+            Event(
+                name=f'event {i}',
+                date=date(2030, 1, 1) + timedelta(days=i % 50),
+                initial_number_of_tickets=TICKETS_PER_EVENT,
+                author_id=self.users[i % 2].id)
+            for i in range(NUMBER_OF_EVENTS)
+        ]
+        db.session.add_all(self.events)
+        db.session.flush()
+
+        for event in self.events:
+            mint_tickets(event_id=event.id, author_id=event.author_id, number_of_tickets=TICKETS_PER_EVENT)
+
+        guids = [row.guid for row in db.session.query(Ticket.guid)]
+        random.shuffle(guids)
+        for guid in guids[:len(guids) // 4]:
+            Ticket.redeem(guid)
+
+        self.virtual_event = Event(
+            name='virtual event',
+            date=date(2030, 1, 1),
+            initial_number_of_tickets=TICKETS_PER_EVENT,
+            author_id=self.users[0].id,
+            ticket_seed=new_seed())
+        db.session.add(self.virtual_event)
+        db.session.flush()
+
+        virtual_guids = list(derive_guids(
+            self.virtual_event.id, self.virtual_event.ticket_seed, TICKETS_PER_EVENT))
+        Ticket.redeem_many(virtual_guids[:TICKETS_PER_EVENT // 4])
+
+        db.session.commit()
+
+        # Gather the statistics the planner would have in production
+        db.session.execute('ANALYZE')
+
+        # Built when the server starts, reading every ticket, rather than per request
+        ticket_filter.sync()
+
+        self.event_identifier = str(uuid.UUID(bytes=self.events[0].guid))
+        self.ticket_identifiers = [str(uuid.UUID(bytes=guid)) for guid in guids[:1000]]
+        self.virtual_event_identifier = str(uuid.UUID(bytes=self.virtual_event.guid))
+        self.virtual_ticket_identifiers = [str(uuid.UUID(bytes=guid)) for guid in virtual_guids]
+        self.auth_token = self.users[0].encode_auth_token(self.users[0].id).decode()
+
+    @contextmanager
+    def captured_statements(self):
+        """Yields a list collecting every statement executed within the block."""
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters[0] if executemany else parameters))
+
+        engine = db.get_engine(self.app)
+        sa_event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            sa_event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    def assertEfficientPlans(self, statements):
+        # The statements are run as captured, with DBAPI parameters
+        connection = db.session.connection().connection
+
+        for statement, parameters in statements:
+            if not statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'INSERT', 'DELETE')):
+                continue
+
+            plan = [row[3] for row in connection.execute(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+
+            for detail in plan:
+                message = f'{detail}\nin the plan of\n{statement}'
+                self.assertFalse(detail.startswith('SCAN ticket'), message)
+                self.assertNotIn('USE TEMP B-TREE', detail, message)
+
+                # The listing may walk the event index in order, and the live
+                # events be read from their partial index, nothing else may
+                # scan events
+                if detail.split()[:2] == ['SCAN', 'event']:
+                    self.assertRegex(
+                        detail, 'USING (COVERING )?INDEX ix__event__(date_name_guid|live)', message)
+
+    def request(self, method, url, data=None):
+        response = self.client.open(
+            url,
+            method=method,
+            data=json.dumps(data) if data is not None else None,
+            content_type='application/json',
+            headers=dict(Authorization=self.auth_token))
+
+        # Run streamed responses to the end, so all their queries are issued
+        response.get_data()
+        return response
+
+    def get(self, url):
+        return self.request('GET', url)
+
+    def post(self, url, data):
+        return self.request('POST', url, data)
+
+    def put(self, url, data):
+        return self.request('PUT', url, data)
+
+    def test_event_query_plans(self):
+        """ Test the queries of the event endpoints use indexes """
+        with self.captured_statements() as statements:
+            responses = [
+                self.post('event/create', dict(name='new', date='2030-06-01', initial_number_of_tickets=10)),
+                self.put(f'event/add/{self.event_identifier}', dict(additionalNumberOfTickets=10)),
+                self.get(f'event/status/{self.event_identifier}'),
+                self.get(f'event/analytics/{self.event_identifier}'),
+                self.get(f'event/analytics/{self.virtual_event_identifier}?interval=hour'),
+                self.get(f'event/analytics/{self.event_identifier}?timeFrom=2020-01-01T00:00:00&timeTo=2040-01-01T00:00:00'),
+                self.get(f'event/download/{self.event_identifier}'),
+                self.get(f'event/download/{self.event_identifier}?format=csv'),
+                self.get(f'event/download/{self.event_identifier}?format=binary'),
+                self.post('event/create', dict(
+                    name='new virtual', date='2030-06-01', initial_number_of_tickets=10, virtual=True)),
+                self.put(f'event/add/{self.virtual_event_identifier}', dict(additionalNumberOfTickets=10)),
+                self.get(f'event/download/{self.virtual_event_identifier}'),
+                self.get('event/all?dateFrom=2030-01-10&dateTo=2030-01-20'),
+                self.get('event/all?name=event%201'),
+                self.get('event/all?author=other_organiser'),
+            ]
+
+            page = self.get('event/all?limit=50')
+            responses.append(page)
+            responses.append(self.get(f'event/all?limit=50&cursor={page.json["nextCursor"]}'))
+
+            responses += [
+                self.put(f'event/live/{self.event_identifier}', dict(live=True)),
+                self.post('status/batch', dict(ticketIdentifiers=self.ticket_identifiers[:10])),
+                self.put(f'event/add/{self.event_identifier}', dict(additionalNumberOfTickets=10)),
+                self.put(f'event/live/{self.event_identifier}', dict(live=False)),
+                self.get(f'event/key/{self.event_identifier}'),
+            ]
+
+            job = self.post('event/create', {
+                'name': 'new async', 'date': '2030-06-01', 'initial_number_of_tickets': 10, 'async': True})
+            responses.append(self.get(f'event/jobs/{job.json["jobIdentifier"]}'))
+
+        self.assertEqual(job.status_code, 202, job.data)
+        for response in responses:
+            self.assertEqual(response.status_code, 200, response.data)
+
+        self.assertEfficientPlans(statements)
+
+    def test_ticket_query_plans(self):
+        """ Test the queries of the ticket endpoints use indexes """
+        unknown_identifier = str(uuid.uuid4())
+
+        with self.captured_statements() as statements:
+            responses = [
+                self.get(f'redeem/{self.ticket_identifiers[0]}'),
+                self.get(f'redeem/{self.ticket_identifiers[0]}'),
+                self.get(f'redeem/{unknown_identifier}'),
+                self.get(f'status/{self.ticket_identifiers[1]}'),
+                self.post('redeem/batch', dict(ticketIdentifiers=self.ticket_identifiers[2:500])),
+                self.post('status/batch', dict(ticketIdentifiers=self.ticket_identifiers + [unknown_identifier])),
+                self.get(f'redeem/{self.virtual_ticket_identifiers[-1]}'),
+                self.get(f'status/{self.virtual_ticket_identifiers[-2]}'),
+                self.post('redeem/batch', dict(ticketIdentifiers=self.virtual_ticket_identifiers)),
+                self.post('status/batch', dict(ticketIdentifiers=self.virtual_ticket_identifiers)),
+            ]
+
+        for response in responses:
+            self.assertLess(response.status_code, 500, response.data)
+
+        self.assertEfficientPlans(statements)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,196 @@
+import base64
+import json
+import unittest
+import uuid
+from datetime import datetime
+from unittest import mock
+
+from tests.test_event_ticket import TestEventBlueprint
+from simple_events.core import signed_tickets
+from simple_events.core.signed_tickets import TicketSigner, ticket_signer
+from simple_events.core.export import read_binary_export
+
+
+class TestTicketSigner(unittest.TestCase):
+    def setUp(self):
+        self.signer = TicketSigner()
+        self.signer.init_app(mock.Mock(config={'SECRET_KEY': 'secret'}))
+        self.ticket_guid = uuid.uuid4().bytes
+        self.event_guid = uuid.uuid4().bytes
+
+    def test_signing_tickets(self):
+        """ Test signed ticket codes round trip to their ticket """
+        code = signed_tickets.encode(self.signer.sign(self.ticket_guid, self.event_guid))
+
+        self.assertTrue(code.startswith('SE1'))
+        self.assertTrue(code.isalnum() and code.isupper())
+        self.assertEqual(self.signer.verify_code(code), self.ticket_guid)
+
+        payload = signed_tickets.decode(code)
+        self.assertTrue(signed_tickets.verify_scanner_tag(payload, self.signer.scanner_key(self.event_guid)))
+        self.assertFalse(signed_tickets.verify_scanner_tag(payload, self.signer.scanner_key(uuid.uuid4().bytes)))
+
+    def test_forged_codes(self):
+        """ Test garbage, tampered and foreign codes are rejected """
+        payload = bytearray(self.signer.sign(self.ticket_guid, self.event_guid))
+        payload[0] ^= 1
+
+        other_signer = TicketSigner()
+        other_signer.init_app(mock.Mock(config={'SECRET_KEY': 'other secret'}))
+
+        for code in ('SE1', 'SE1!!!!', 'SE1' + 'A' * 90, str(uuid.uuid4()),
+                     signed_tickets.encode(bytes(payload)),
+                     signed_tickets.encode(other_signer.sign(self.ticket_guid, self.event_guid))):
+            self.assertIsNone(self.signer.verify_code(code), code)
+
+    def test_scanner_key_cannot_sign(self):
+        """ Test codes made with a scanner key pass scanners but not the server """
+        scanner_key = self.signer.scanner_key(self.event_guid)
+        ticket_guid = uuid.uuid4().bytes
+
+        payload = signed_tickets.PAYLOAD.pack(
+            ticket_guid,
+            self.event_guid,
+            signed_tickets.tag(scanner_key, ticket_guid, self.event_guid, signed_tickets.SCANNER_TAG_SIZE),
+            signed_tickets.tag(scanner_key, ticket_guid, self.event_guid, signed_tickets.SERVER_TAG_SIZE))
+
+        self.assertTrue(signed_tickets.verify_scanner_tag(payload, scanner_key))
+        self.assertIsNone(self.signer.verify(payload))
+
+
+class TestSignedTickets(TestEventBlueprint):
+    def setUp(self):
+        super().setUp()
+        reg_response = self.register_user('dummy_username', '12345678')
+        self.auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+        event_response = self.create_event(
+            name='test',
+            date=datetime.now().date(),
+            initial_number_of_tickets=5,
+            auth_token=self.auth_token)
+        self.eventIdentifier = json.loads(event_response.data.decode())['eventIdentifier']
+
+    def download(self, signed):
+        download_response = self.client.get(
+                f'event/download/{self.eventIdentifier}?signed={str(signed).lower()}',
+                headers=dict(Authorization=self.auth_token)
+            )
+        return json.loads(download_response.data.decode())['data']['ticketIdentifiers']
+
+    def get_status(self, ticketIdentifier):
+        return self.client.get(
+                f'status/{ticketIdentifier}',
+                headers=dict(Authorization=self.auth_token)
+            )
+
+    def test_downloading_signed_tickets(self):
+        """ Test signed downloads carry the same tickets as plain ones """
+        codes = self.download(signed=True)
+        ticketIdentifiers = self.download(signed=False)
+
+        self.assertEqual(
+            [str(uuid.UUID(bytes=ticket_signer.verify_code(code))) for code in codes],
+            ticketIdentifiers)
+
+        binary_response = self.client.get(
+                f'event/download/{self.eventIdentifier}?format=binary&signed=true',
+                headers=dict(Authorization=self.auth_token)
+            )
+        event_guid, payloads = read_binary_export(binary_response.data)
+
+        self.assertEqual(event_guid, uuid.UUID(self.eventIdentifier).bytes)
+        self.assertEqual([signed_tickets.encode(payload) for payload in payloads], codes)
+
+    def test_redeeming_signed_ticket(self):
+        """ Test a signed ticket is redeemed, and shares its state with its identifier """
+        code = self.download(signed=True)[0]
+        ticketIdentifier = str(uuid.UUID(bytes=ticket_signer.verify_code(code)))
+
+        self.assertEqual(self.get_status(code).status_code, 200)
+        self.assertEqual(self.client.get(f'redeem/{code}').status_code, 200)
+        self.assertEqual(self.client.get(f'redeem/{code}').status_code, 410)
+        self.assertEqual(self.client.get(f'redeem/{ticketIdentifier}').status_code, 410)
+        self.assertEqual(self.get_status(code).status_code, 410)
+
+    def test_forged_code_rejected_without_database(self):
+        """ Test forged codes are rejected before any lookup """
+        code = self.download(signed=True)[0]
+        forged = code[:-4] + ('AAAA' if not code.endswith('AAAA') else 'BBBB')
+
+        with mock.patch('simple_events.models.event.Ticket.redeem') as redeem, \
+                mock.patch('simple_events.models.event.Ticket.status_many') as status_many:
+            for ticketCode in (forged, 'not-a-ticket'):
+                redeem_response = self.client.get(f'redeem/{ticketCode}')
+
+                self.assertEqual(redeem_response.status_code, 402)
+                self.assertEqual(json.loads(redeem_response.data.decode())['message'], 'Invalid ticketIdentifier.')
+                self.assertEqual(self.get_status(ticketCode).status_code, 402)
+
+            redeem.assert_not_called()
+            status_many.assert_not_called()
+
+    def test_batch_of_signed_tickets(self):
+        """ Test batches mixing signed codes, identifiers and forgeries """
+        codes = self.download(signed=True)
+        ticketIdentifiers = self.download(signed=False)
+        forged = codes[0][:10] + ('B' if codes[0][10] == 'A' else 'A') + codes[0][11:]
+
+        redeem_response = self.client.post(
+                'redeem/batch',
+                content_type='application/json',
+                data=json.dumps(dict(ticketIdentifiers=codes[:2] + ticketIdentifiers[2:3] + [forged]))
+            )
+
+        self.assertEqual(json.loads(redeem_response.data.decode())['data'], {
+            codes[0]: 'redeemed',
+            codes[1]: 'redeemed',
+            ticketIdentifiers[2]: 'redeemed',
+            forged: 'invalid'
+        })
+
+        status_response = self.client.post(
+                'status/batch',
+                content_type='application/json',
+                headers=dict(Authorization=self.auth_token),
+                data=json.dumps(dict(ticketIdentifiers=codes[1:4]))
+            )
+
+        self.assertEqual(json.loads(status_response.data.decode())['data'], {
+            codes[1]: 'redeemed',
+            codes[2]: 'redeemed',
+            codes[3]: 'unredeemed'
+        })
+
+    def test_scanner_key(self):
+        """ Test the scanner key of an event verifies its codes """
+        key_response = self.client.get(
+                f'event/key/{self.eventIdentifier}',
+                headers=dict(Authorization=self.auth_token)
+            )
+        key_data = json.loads(key_response.data.decode())
+
+        self.assertEqual(key_response.status_code, 200)
+        self.assertEqual(key_data['data']['algorithm'], 'HMAC-SHA256')
+        self.assertEqual(key_data['data']['tagSize'], 8)
+
+        scanner_key = base64.b64decode(key_data['data']['key'])
+
+        for code in self.download(signed=True):
+            self.assertTrue(signed_tickets.verify_scanner_tag(signed_tickets.decode(code), scanner_key))
+
+        invalid_response = self.client.get(
+                f'event/key/{uuid.uuid4()}',
+                headers=dict(Authorization=self.auth_token)
+            )
+        self.assertEqual(invalid_response.status_code, 402)
+
+        unauthorised_response = self.client.get(
+                f'event/key/{self.eventIdentifier}',
+                headers=dict(Authorization='invalid_token')
+            )
+        self.assertEqual(unauthorised_response.status_code, 401)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,234 @@
+import json
+import os
+import tempfile
+import unittest
+import uuid
+from datetime import datetime
+from unittest import mock
+
+from tests.test_event_ticket import TestEventBlueprint
+from simple_events.models import db
+from simple_events.models.event import Event, Ticket
+from simple_events.core.generations import Generation
+from simple_events.core.minting import generate_guids, insert_tickets
+from simple_events.core.ticket_filter import BloomFilter, ticket_filter
+
+
+class TestBloomFilter(unittest.TestCase):
+    def test_false_positive_rate(self):
+        """ Test added items are always found, and absent ones rarely """
+        bloom = BloomFilter(capacity=10000, error_rate=0.01)
+        items = generate_guids(10000)
+
+        for item in items:
+            bloom.add(item)
+
+        self.assertTrue(all(item in bloom for item in items))
+
+        false_positives = sum(item in bloom for item in generate_guids(10000))
+
+        self.assertLess(false_positives, 200)
+        self.assertAlmostEqual(bloom.estimated_false_positive_rate, 0.01, delta=0.005)
+
+
+class TestTicketFilter(TestEventBlueprint):
+    def setUp(self):
+        super().setUp()
+        reg_response = self.register_user('dummy_username', '12345678')
+        self.auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+    def create_tickets(self, initial_number_of_tickets):
+        event_response = self.create_event(
+            name='test',
+            date=datetime.now().date(),
+            initial_number_of_tickets=initial_number_of_tickets,
+            auth_token=self.auth_token)
+        eventIdentifier = json.loads(event_response.data.decode())['eventIdentifier']
+
+        download_response = self.client.get(
+                f'event/download/{eventIdentifier}',
+                headers=dict(Authorization=self.auth_token)
+            )
+        return json.loads(download_response.data.decode())['data']['ticketIdentifiers']
+
+    def get_metrics(self):
+        metrics_response = self.client.get(
+                'metrics/ticket-filter',
+                headers=dict(Authorization=self.auth_token)
+            )
+        self.assertEqual(metrics_response.status_code, 200)
+        return json.loads(metrics_response.data.decode())['data']
+
+    def test_unknown_identifiers_rejected_without_database(self):
+        """ Test identifiers of no ticket are rejected without looking them up """
+        ticketIdentifiers = self.create_tickets(5)
+        unknown = [str(uuid.uuid4()) for _ in range(3)]
+
+        with mock.patch('simple_events.models.event.Ticket.redeem') as redeem, \
+                mock.patch('simple_events.models.event.Ticket.status_many') as status_many:
+            for ticketIdentifier in unknown:
+                self.assertEqual(self.client.get(f'redeem/{ticketIdentifier}').status_code, 402)
+
+            status_response = self.client.get(
+                    f'status/{unknown[0]}',
+                    headers=dict(Authorization=self.auth_token)
+                )
+            self.assertEqual(status_response.status_code, 402)
+
+            redeem.assert_not_called()
+            status_many.assert_not_called()
+
+        redeem_response = self.client.post(
+                'redeem/batch',
+                content_type='application/json',
+                data=json.dumps(dict(ticketIdentifiers=ticketIdentifiers[:2] + unknown))
+            )
+        outcomes = json.loads(redeem_response.data.decode())['data']
+
+        self.assertEqual(outcomes[ticketIdentifiers[0]], 'redeemed')
+        self.assertEqual(outcomes[ticketIdentifiers[1]], 'redeemed')
+        self.assertEqual({outcomes[ticketIdentifier] for ticketIdentifier in unknown}, {'invalid'})
+
+        metrics = self.get_metrics()
+
+        self.assertTrue(metrics['enabled'])
+        self.assertEqual(metrics['number_of_insertions'], 5)
+        self.assertEqual(metrics['checked'], 9)
+        self.assertEqual(metrics['rejected'], 7)
+        self.assertAlmostEqual(metrics['hit_rate'], 2 / 9)
+        self.assertEqual(metrics['false_positives'], 0)
+        self.assertEqual(metrics['false_positive_rate'], 0)
+
+    def test_tickets_added_are_let_through(self):
+        """ Test tickets minted after the filter is built pass it """
+        self.create_tickets(2)
+        ticket_filter.sync()
+
+        ticketIdentifiers = self.create_tickets(3)
+
+        for ticketIdentifier in ticketIdentifiers:
+            self.assertEqual(self.client.get(f'redeem/{ticketIdentifier}').status_code, 200)
+
+    def test_false_positives(self):
+        """ Test guids the filter passes but the database doesn't know are counted """
+        self.create_tickets(1)
+        ticket_filter.sync()
+
+        unknown = uuid.uuid4()
+        ticket_filter._filter.add(unknown.bytes)
+
+        self.assertEqual(self.client.get(f'redeem/{unknown}').status_code, 402)
+
+        metrics = self.get_metrics()
+
+        self.assertEqual(metrics['false_positives'], 1)
+        self.assertEqual(metrics['false_positive_rate'], 1)
+
+    def test_tickets_minted_by_other_processes(self):
+        """ Test the filter adds the tickets other processes signal they minted """
+        handle, path = tempfile.mkstemp(suffix='.generation')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+
+        ticket_filter.generation = Generation(path)
+        ticket_filter.sync()
+
+        # Minted by another process, which signals once committed
+        event = Event(name='test', date=datetime.now().date(), initial_number_of_tickets=3, author_id=None)
+        db.session.add(event)
+        db.session.flush()
+
+        guids = generate_guids(3)
+        insert_tickets(event.id, None, guids, datetime.utcnow())
+        Event.increment_counters(event.id, number_of_tickets=3)
+        db.session.commit()
+        Generation(path).bump()
+
+        passed, rejected = ticket_filter.screen(guids)
+
+        self.assertEqual(passed, guids)
+        self.assertEqual(rejected, [])
+
+    def mint_elsewhere(self, ids):
+        """ Mints tickets of a new event with the given ids, as another node would, without signalling """
+        event = Event(name='test', date=datetime.now().date(), initial_number_of_tickets=len(ids), author_id=None)
+        db.session.add(event)
+        db.session.flush()
+
+        guids = generate_guids(len(ids))
+        db.session.execute(Ticket.__table__.insert(), [
+            dict(id=id, event_id=event.id, guid=guid, is_redeemed=False, date_created_utc=datetime.utcnow())
+            for id, guid in zip(ids, guids)
+        ])
+        Event.increment_counters(event.id, number_of_tickets=len(ids))
+        db.session.commit()
+        return guids
+
+    def test_tickets_minted_on_other_nodes(self):
+        """ Test tickets minted elsewhere since the filter was synced are looked up, not rejected """
+        self.create_tickets(2)
+        ticket_filter.sync()
+
+        guids = self.mint_elsewhere([100, 101, 102])
+        unknown = [uuid.uuid4().bytes]
+
+        ticket_filter.sync_seconds = 60
+        self.assertEqual(ticket_filter.screen(guids + unknown), (guids + unknown, []))
+
+        # Caught up, so misses are certain again
+        self.assertEqual(ticket_filter.screen(guids + unknown), (guids, unknown))
+
+    def test_tickets_minted_during_a_sync(self):
+        """ Test the filter doesn't reject while another thread is still catching up """
+        self.create_tickets(2)
+        ticket_filter.sync()
+
+        guids = self.mint_elsewhere([100, 101, 102])
+
+        ticket_filter.sync_seconds = 60
+        with mock.patch.object(ticket_filter, 'sync'):
+            self.assertEqual(ticket_filter.screen(guids), (guids, []))
+
+    def test_tickets_minted_elsewhere_can_be_redeemed(self):
+        """ Test a ticket minted on another node is redeemed before the filter syncs """
+        self.create_tickets(2)
+        ticket_filter.sync()
+        ticket_filter.sync_seconds = 60
+
+        guid, = self.mint_elsewhere([100])
+
+        redeem_response = self.client.get(f'redeem/{uuid.UUID(bytes=guid)}')
+
+        self.assertEqual(redeem_response.status_code, 200)
+
+    def test_tickets_committed_out_of_order(self):
+        """ Test tickets committed below the highest id read are still added """
+        self.create_tickets(2)
+        ticket_filter.sync_seconds = 0
+
+        later_guids = self.mint_elsewhere([100, 101, 102])
+        self.assertEqual(ticket_filter.screen(later_guids), (later_guids, []))
+
+        earlier_guids = self.mint_elsewhere([50, 51, 52])
+
+        with mock.patch.object(ticket_filter, 'build') as build:
+            self.assertEqual(ticket_filter.screen(earlier_guids), (earlier_guids, []))
+
+            build.assert_not_called()
+
+    def test_minting_signals_other_processes(self):
+        """ Test committing minted tickets bumps the generation """
+        handle, path = tempfile.mkstemp(suffix='.generation')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+
+        ticket_filter.generation = Generation(path)
+        generation = ticket_filter.generation.current()
+
+        self.create_tickets(3)
+
+        self.assertGreater(ticket_filter.generation.current(), generation)
+
+
+if __name__ == '__main__':
+    unittest.main()
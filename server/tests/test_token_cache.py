@@ -0,0 +1,149 @@
+import os
+import time
+import tempfile
+import unittest
+from unittest import mock
+
+import jwt
+from sqlalchemy import event
+
+from simple_events.models import db
+from simple_events.models.auth import User, BlacklistToken
+from simple_events.core.generations import Generation
+from simple_events.core.token_cache import TokenCache, token_cache
+from tests.base import BaseTestCase
+
+
+class TestTokenCache(BaseTestCase):
+    def make_token(self):
+        user = User(username='test_username', password='test')
+        db.session.add(user)
+        db.session.commit()
+        return user.encode_auth_token(user.id).decode()
+
+    def test_verified_token_is_cached(self):
+        auth_token = self.make_token()
+
+        with mock.patch('simple_events.models.auth.jwt.decode', wraps=jwt.decode) as decode:
+            self.assertEqual(User.decode_auth_token(auth_token), 1)
+            self.assertEqual(User.decode_auth_token(auth_token), 1)
+
+        self.assertEqual(decode.call_count, 1)
+
+    def test_cached_token_needs_no_database(self):
+        auth_token = self.make_token()
+
+        User.decode_auth_token(auth_token)
+
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        engine = db.get_engine(self.app)
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            self.assertEqual(User.decode_auth_token(auth_token), 1)
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+
+        self.assertEqual(statements, [])
+
+    def test_expired_token_is_not_served_from_cache(self):
+        token_cache.put('token', 1, time.time() - 1)
+
+        self.assertIsNone(token_cache.get('token'))
+
+    def test_cache_size_is_bounded(self):
+        token_cache.max_size = 2
+
+        for i in range(3):
+            token_cache.put(f'token{i}', i, time.time() + 60)
+
+        self.assertIsNone(token_cache.get('token0'))
+        self.assertEqual(token_cache.get('token1'), 1)
+        self.assertEqual(token_cache.get('token2'), 2)
+
+    def test_blacklisted_token_is_rejected(self):
+        auth_token = self.make_token()
+
+        self.assertEqual(User.decode_auth_token(auth_token), 1)
+
+        db.session.add(BlacklistToken(token=auth_token))
+        db.session.commit()
+        token_cache.blacklist(auth_token)
+
+        self.assertEqual(User.decode_auth_token(auth_token), 'Token blacklisted. Please log in again.')
+
+    def test_blacklisting_is_signalled_between_processes(self):
+        """ Test a token blacklisted by one process is seen by another sharing the generation file """
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+
+        self.app.config['TOKEN_BLACKLIST_GENERATION_FILE'] = path
+
+        # Caches standing in for the token caches of two worker processes
+        worker, other_worker = TokenCache(), TokenCache()
+        worker.init_app(self.app)
+        other_worker.init_app(self.app)
+
+        auth_token = self.make_token()
+
+        self.assertFalse(worker.is_blacklisted(auth_token))
+        self.assertFalse(other_worker.is_blacklisted(auth_token))
+
+        db.session.add(BlacklistToken(token=auth_token))
+        db.session.commit()
+        worker.blacklist(auth_token)
+
+        self.assertTrue(worker.is_blacklisted(auth_token))
+        self.assertTrue(other_worker.is_blacklisted(auth_token))
+
+    def test_blacklist_resynced_from_database(self):
+        """ Test a token blacklisted by a process on another node is seen within the sync interval """
+        self.app.config['TOKEN_BLACKLIST_SYNC_SECONDS'] = 2
+
+        # A cache standing in for that of a process on another node, sharing no generation file
+        other_node = TokenCache()
+        other_node.init_app(self.app)
+
+        auth_token = self.make_token()
+
+        with mock.patch('simple_events.core.token_cache.time.monotonic', return_value=1000):
+            self.assertFalse(other_node.is_blacklisted(auth_token))
+
+            db.session.add(BlacklistToken(token=auth_token))
+            db.session.commit()
+            token_cache.blacklist(auth_token)
+
+            self.assertFalse(other_node.is_blacklisted(auth_token))
+
+        with mock.patch('simple_events.core.token_cache.time.monotonic', return_value=1002):
+            self.assertTrue(other_node.is_blacklisted(auth_token))
+
+
+class TestGeneration(unittest.TestCase):
+    def test_generation(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        generation = Generation(os.path.join(directory.name, 'test.generation'))
+
+        self.assertEqual(generation.current(), 0)
+
+        generation.bump()
+        generation.bump()
+
+        self.assertEqual(generation.current(), 2)
+        self.assertEqual(Generation(generation.path).current(), 2)
+
+    def test_disabled_generation(self):
+        generation = Generation()
+        generation.bump()
+
+        self.assertIsNone(generation.current())
+
+
+if __name__ == '__main__':
+    unittest.main()
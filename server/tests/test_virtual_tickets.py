@@ -0,0 +1,282 @@
+import json
+import random
+import unittest
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from tests.base import FileDatabaseTestCase
+from tests.test_event_ticket import TestEventBlueprint
+from simple_events.models import db
+from simple_events.models.event import Event, Ticket
+from simple_events.core import virtual_tickets
+from simple_events.core.counters import find_counter_discrepancies, recompute_counters
+
+
+class TestVirtualTicketGuids(unittest.TestCase):
+    def test_derived_guids(self):
+        """ Test virtual ticket guids are UUIDs naming their event and index """
+        seed = virtual_tickets.new_seed()
+        guids = list(virtual_tickets.derive_guids(7, seed, 100))
+
+        self.assertEqual(len(set(guids)), 100)
+        self.assertEqual(guids[3], virtual_tickets.derive_guid(7, seed, 3))
+
+        for index, guid in enumerate(guids):
+            self.assertEqual(uuid.UUID(bytes=guid).version, 8)
+            self.assertEqual(uuid.UUID(bytes=guid).variant, uuid.RFC_4122)
+            self.assertEqual(virtual_tickets.parse_guid(guid), (7, index))
+            self.assertTrue(virtual_tickets.is_valid(guid, index, 7, seed, 100))
+
+    def test_forged_guids(self):
+        """ Test guids not derived from the event's seed are rejected """
+        seed = virtual_tickets.new_seed()
+        guid = virtual_tickets.derive_guid(7, seed, 3)
+
+        self.assertIsNone(virtual_tickets.parse_guid(uuid.uuid4().bytes))
+        self.assertFalse(virtual_tickets.is_valid(guid, 3, 7, virtual_tickets.new_seed(), 100))
+        # Beyond the event's number of tickets
+        self.assertFalse(virtual_tickets.is_valid(guid, 3, 7, seed, 3))
+
+        forged = bytearray(guid)
+        forged[10] ^= 1
+        self.assertFalse(virtual_tickets.is_valid(bytes(forged), 3, 7, seed, 100))
+
+
+class TestVirtualTicketsBlueprint(TestEventBlueprint):
+    def setUp(self):
+        super().setUp()
+        reg_response = self.register_user('dummy_username', '12345678')
+        self.auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+    def create_virtual_event(self, initial_number_of_tickets):
+        response = self.client.post(
+                'event/create',
+                data=json.dumps({
+                    'name': 'test',
+                    'date': str(datetime.now().date()),
+                    'initial_number_of_tickets': initial_number_of_tickets,
+                    'virtual': True
+                }),
+                content_type='application/json',
+                headers=dict(Authorization=self.auth_token)
+            )
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.data.decode())['eventIdentifier']
+
+    def download(self, eventIdentifier):
+        download_response = self.client.get(
+                f'event/download/{eventIdentifier}',
+                content_type='application/json',
+                headers=dict(Authorization=self.auth_token)
+            )
+        self.assertEqual(download_response.status_code, 200)
+        return json.loads(download_response.data.decode())['data']['ticketIdentifiers']
+
+
+class TestVirtualTickets(TestVirtualTicketsBlueprint):
+    def get_event(self, eventIdentifier):
+        return Event.query.filter_by(guid=uuid.UUID(eventIdentifier).bytes).first()
+
+    def get_status(self, ticketIdentifier):
+        return self.client.get(
+                f'status/{ticketIdentifier}',
+                headers=dict(Authorization=self.auth_token)
+            )
+
+    def test_creating_virtual_event(self):
+        """ Test a virtual event is created without minting its tickets """
+        eventIdentifier = self.create_virtual_event(initial_number_of_tickets=100000)
+        event = self.get_event(eventIdentifier)
+
+        self.assertTrue(event.is_virtual)
+        self.assertTrue(event.is_visible)
+        self.assertEqual(event.number_of_tickets, 100000)
+        self.assertEqual(Ticket.query.count(), 0)
+
+        status_response = self.client.get(
+                f'event/status/{eventIdentifier}',
+                headers=dict(Authorization=self.auth_token)
+            )
+        status = json.loads(status_response.data.decode())['data']
+
+        self.assertEqual(status['number_of_tickets'], 100000)
+        self.assertEqual(status['number_of_redeemed_tickets'], 0)
+
+    def test_downloading_virtual_tickets(self):
+        """ Test the download derives the unredeemed tickets in every format """
+        eventIdentifier = self.create_virtual_event(initial_number_of_tickets=10)
+        ticketIdentifiers = self.download(eventIdentifier)
+
+        self.assertEqual(len(set(ticketIdentifiers)), 10)
+        # Deterministic, the same tickets every time
+        self.assertEqual(self.download(eventIdentifier), ticketIdentifiers)
+
+        self.client.get(f'redeem/{ticketIdentifiers[4]}')
+
+        unredeemed = ticketIdentifiers[:4] + ticketIdentifiers[5:]
+        self.assertEqual(self.download(eventIdentifier), unredeemed)
+
+        csv_response = self.client.get(
+                f'event/download/{eventIdentifier}?format=csv',
+                headers=dict(Authorization=self.auth_token)
+            )
+        self.assertEqual(csv_response.data.decode().split(), ['ticketIdentifier'] + unredeemed)
+
+    def test_redeeming_virtual_ticket(self):
+        """ Test a virtual ticket is stored when redeemed, and only once """
+        eventIdentifier = self.create_virtual_event(initial_number_of_tickets=5)
+        ticketIdentifier = self.download(eventIdentifier)[0]
+
+        self.assertEqual(self.get_status(ticketIdentifier).status_code, 200)
+
+        redeem_response = self.client.get(f'redeem/{ticketIdentifier}')
+        self.assertEqual(redeem_response.status_code, 200)
+
+        redeem_response = self.client.get(f'redeem/{ticketIdentifier}')
+        self.assertEqual(redeem_response.status_code, 410)
+
+        self.assertEqual(self.get_status(ticketIdentifier).status_code, 410)
+
+        ticket = Ticket.query.one()
+        self.assertEqual(ticket.guid, uuid.UUID(ticketIdentifier).bytes)
+        self.assertTrue(ticket.is_redeemed)
+        self.assertEqual(self.get_event(eventIdentifier).number_of_redeemed_tickets, 1)
+
+    def test_redeeming_forged_virtual_ticket(self):
+        """ Test tickets not derived from the event's seed are invalid """
+        eventIdentifier = self.create_virtual_event(initial_number_of_tickets=5)
+        event = self.get_event(eventIdentifier)
+
+        forged = bytearray(uuid.UUID(self.download(eventIdentifier)[0]).bytes)
+        forged[10] ^= 1
+        beyond = virtual_tickets.derive_guid(event.id, event.ticket_seed, 5)
+        unknown_event = virtual_tickets.derive_guid(event.id + 1, event.ticket_seed, 0)
+
+        for guid in (bytes(forged), beyond, unknown_event):
+            ticketIdentifier = str(uuid.UUID(bytes=guid))
+
+            self.assertEqual(self.client.get(f'redeem/{ticketIdentifier}').status_code, 402)
+            self.assertEqual(self.get_status(ticketIdentifier).status_code, 402)
+
+        self.assertEqual(Ticket.query.count(), 0)
+
+    def test_batches_of_virtual_and_minted_tickets(self):
+        """ Test batches mixing virtual and minted tickets """
+        virtual = self.download(self.create_virtual_event(initial_number_of_tickets=5))
+
+        event_response = self.create_event(
+            name='minted',
+            date=datetime.now().date(),
+            initial_number_of_tickets=5,
+            auth_token=self.auth_token)
+        minted = self.download(json.loads(event_response.data.decode())['eventIdentifier'])
+
+        invalid = str(uuid.uuid4())
+        self.client.get(f'redeem/{virtual[0]}')
+
+        redeem_response = self.client.post(
+                'redeem/batch',
+                content_type='application/json',
+                data=json.dumps(dict(ticketIdentifiers=virtual[:3] + minted[:3] + [invalid]))
+            )
+        outcomes = json.loads(redeem_response.data.decode())['data']
+
+        self.assertEqual(outcomes, {
+            virtual[0]: 'already_redeemed',
+            virtual[1]: 'redeemed',
+            virtual[2]: 'redeemed',
+            minted[0]: 'redeemed',
+            minted[1]: 'redeemed',
+            minted[2]: 'redeemed',
+            invalid: 'invalid'
+        })
+
+        status_response = self.client.post(
+                'status/batch',
+                content_type='application/json',
+                headers=dict(Authorization=self.auth_token),
+                data=json.dumps(dict(ticketIdentifiers=virtual[2:] + minted[2:] + [invalid]))
+            )
+        states = json.loads(status_response.data.decode())['data']
+
+        self.assertEqual(states, {
+            virtual[2]: 'redeemed',
+            virtual[3]: 'unredeemed',
+            virtual[4]: 'unredeemed',
+            minted[2]: 'redeemed',
+            minted[3]: 'unredeemed',
+            minted[4]: 'unredeemed',
+            invalid: 'invalid'
+        })
+
+    def test_adding_virtual_tickets(self):
+        """ Test adding tickets to a virtual event only counts them """
+        eventIdentifier = self.create_virtual_event(initial_number_of_tickets=5)
+        ticketIdentifiers = self.download(eventIdentifier)
+
+        add_response = self.client.put(
+                f'event/add/{eventIdentifier}',
+                data=json.dumps({'additionalNumberOfTickets': 3, 'async': True}),
+                content_type='application/json',
+                headers=dict(Authorization=self.auth_token)
+            )
+
+        self.assertEqual(add_response.status_code, 200)
+        self.assertEqual(Ticket.query.count(), 0)
+
+        event = self.get_event(eventIdentifier)
+        self.assertEqual(event.number_of_tickets, 8)
+        self.assertEqual(event.additional_number_of_tickets, 3)
+
+        added = self.download(eventIdentifier)
+        self.assertEqual(added[:5], ticketIdentifiers)
+        self.assertEqual(len(set(added)), 8)
+
+        self.assertEqual(self.client.get(f'redeem/{added[7]}').status_code, 200)
+
+    def test_counters_of_virtual_events(self):
+        """ Test recomputing counters keeps the totals of virtual events """
+        eventIdentifier = self.create_virtual_event(initial_number_of_tickets=5)
+        self.client.get(f'redeem/{self.download(eventIdentifier)[0]}')
+
+        self.assertEqual(find_counter_discrepancies(), [])
+
+        recompute_counters()
+        db.session.commit()
+
+        event = self.get_event(eventIdentifier)
+        self.assertEqual(event.number_of_tickets, 5)
+        self.assertEqual(event.number_of_redeemed_tickets, 1)
+
+
+class TestVirtualTicketConcurrency(FileDatabaseTestCase, TestVirtualTicketsBlueprint):
+    def test_concurrent_virtual_redemption(self):
+        """ Test each virtual ticket is redeemed exactly once by concurrent scanners """
+        ticketIdentifiers = self.download(self.create_virtual_event(initial_number_of_tickets=20))
+
+        def scan(ticketIdentifiers):
+            client = self.app.test_client()
+            return [
+                (ticketIdentifier, client.get(f'redeem/{ticketIdentifier}').status_code)
+                for ticketIdentifier in ticketIdentifiers
+            ]
+
+        n_scanners = 8
+        scans = [random.sample(ticketIdentifiers, len(ticketIdentifiers)) for _ in range(n_scanners)]
+
+        with ThreadPoolExecutor(max_workers=n_scanners) as executor:
+            results = [outcome for outcomes in executor.map(scan, scans) for outcome in outcomes]
+
+        redeemed = Counter(ticketIdentifier for ticketIdentifier, status_code in results if status_code == 200)
+
+        self.assertEqual(set(status_code for _, status_code in results), {200, 410})
+        self.assertEqual(set(redeemed), set(ticketIdentifiers))
+        self.assertEqual(set(redeemed.values()), {1})
+        self.assertEqual(Ticket.query.count(), 20)
+        self.assertEqual(Event.query.one().number_of_redeemed_tickets, 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import json
+import unittest
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy.exc import IntegrityError
+
+from tests.base import FileDatabaseTestCase
+from tests.test_event_ticket import TestEventBlueprint
+from simple_events.models import db
+from simple_events.models.auth import BlacklistToken
+from simple_events.apis.auth import blacklist
+from simple_events.core.writer import writer
+
+
+class TestWriter(FileDatabaseTestCase, TestEventBlueprint):
+    def setUp(self):
+        super().setUp()
+        self.app.config['GROUP_COMMIT_MAX_GROUP_SIZE'] = 64
+        # Long enough for everything submitted together to be grouped
+        self.app.config['GROUP_COMMIT_WINDOW_MS'] = 200
+        writer.init_app(self.app)
+
+        reg_response = self.register_user('dummy_username', '12345678')
+        self.auth_token = json.loads(reg_response.data.decode("utf-8"))['auth_token']
+
+    def test_concurrent_redemptions_committed_together(self):
+        """ Test concurrent redemptions share commits """
+        event_response = self.create_event(
+            name='test',
+            date=datetime.now().date(),
+            initial_number_of_tickets=20,
+            auth_token=self.auth_token)
+        eventIdentifier = json.loads(event_response.data.decode())['eventIdentifier']
+
+        download_response = self.client.get(
+                f'event/download/{eventIdentifier}',
+                headers=dict(Authorization=self.auth_token)
+            )
+        ticketIdentifiers = json.loads(download_response.data.decode())['data']['ticketIdentifiers']
+
+        groups, intents = writer.groups, writer.intents
+
+        with ThreadPoolExecutor(max_workers=len(ticketIdentifiers)) as executor:
+            status_codes = list(executor.map(
+                lambda ticketIdentifier: self.client.get(f'redeem/{ticketIdentifier}').status_code,
+                ticketIdentifiers))
+
+        self.assertEqual(status_codes, [200] * 20)
+        self.assertEqual(writer.intents - intents, 20)
+        self.assertLess(writer.groups - groups, 20)
+
+        self.assertEqual(self.client.get(f'redeem/{ticketIdentifiers[0]}').status_code, 410)
+
+        status_response = self.client.get(
+                f'event/status/{eventIdentifier}',
+                headers=dict(Authorization=self.auth_token)
+            )
+        self.assertEqual(json.loads(status_response.data.decode())['data']['number_of_redeemed_tickets'], 20)
+
+    def test_failing_intent_retried_alone(self):
+        """ Test an intent failing doesn't fail those committed with it """
+        futures = [writer.submit(blacklist, token) for token in ('a', 'a', 'b')]
+
+        self.assertIsNone(futures[0].result())
+        self.assertRaises(IntegrityError, futures[1].result)
+        self.assertIsNone(futures[2].result())
+
+        self.assertEqual({token.token for token in BlacklistToken.query}, {'a', 'b'})
+
+    def test_intent_ending_transaction_retried_alone(self):
+        """ Test an intent which rolls back can't discard the writes grouped with it """
+        def roll_back():
+            db.session.rollback()
+            return 'rolled back'
+
+        futures = [writer.submit(blacklist, 'a'), writer.submit(roll_back), writer.submit(blacklist, 'b')]
+
+        self.assertEqual([future.result() for future in futures], [None, 'rolled back', None])
+        self.assertEqual({token.token for token in BlacklistToken.query}, {'a', 'b'})
+
+    def test_logout(self):
+        """ Test logging out through the writer """
+        logout_response = self.client.post(
+                'auth/logout',
+                headers=dict(Authorization=self.auth_token)
+            )
+
+        self.assertEqual(logout_response.status_code, 200)
+        self.assertEqual(BlacklistToken.query.count(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()